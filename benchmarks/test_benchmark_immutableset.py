@@ -1,7 +1,7 @@
 # pylint: disable=invalid-name
 import random
 
-from immutablecollections import ImmutableDict, ImmutableSet, immutableset
+from immutablecollections import ImmutableDict, ImmutableSet, immutabledict, immutableset
 
 import pytest
 
@@ -74,3 +74,95 @@ def test_perf(constructor, source, benchmark):
     benchmark.name = constructor[0]
     benchmark.group = f"Creating from {source[0]}"
     benchmark(constructor[1], source[1])
+
+
+def python_loop_dedup(iterable):
+    # how immutableset used to de-duplicate, for comparison
+    iteration_order = []
+    containment_set = set()
+    for value in iterable:
+        if value not in containment_set:
+            containment_set.add(value)
+            iteration_order.append(value)
+    return iteration_order
+
+
+big_inputs = ImmutableDict.of(
+    (
+        ("big tuple", big_tuple),
+        ("big list", big_list),
+        ("big list with duplicates", big_list + big_list),
+    )
+)
+
+deduplicating_constructors = ImmutableDict.of(
+    (
+        ("Python loop", python_loop_dedup),
+        ("dict.fromkeys", dict.fromkeys),
+        ("immutableset", immutableset),
+    )
+)
+
+
+@pytest.mark.parametrize("constructor", deduplicating_constructors.items())
+@pytest.mark.parametrize("source", big_inputs.items())
+def test_deduplication(constructor, source, benchmark):
+    benchmark.name = constructor[0]
+    benchmark.group = f"De-duplicating {source[0]}"
+    benchmark(constructor[1], source[1])
+
+
+big_pairs = [(x, x) for x in big_list]
+
+unique_constructors = ImmutableDict.of(
+    (
+        ("immutableset", lambda: immutableset(big_list)),
+        (
+            "immutableset (forbid duplicates)",
+            lambda: immutableset(big_list, forbid_duplicate_elements=True),
+        ),
+        ("immutabledict", lambda: immutabledict(big_pairs)),
+        (
+            "immutabledict (forbid duplicates)",
+            lambda: immutabledict(big_pairs, forbid_duplicate_keys=True),
+        ),
+    )
+)
+
+
+@pytest.mark.parametrize("constructor", unique_constructors.items())
+def test_forbid_duplicates(constructor, benchmark):
+    benchmark.name = constructor[0]
+    benchmark.group = "Creating from big list of unique elements"
+    benchmark(constructor[1])
+
+
+vocabulary = immutableset(str(x) for x in big_list)
+vocabulary_tuple = tuple(vocabulary)
+lookups = [str(x) for x in big_list[::10]]
+
+
+def index_each(set_, items):
+    for item in items:
+        set_.index(item)
+
+
+def tuple_index_each(tuple_, items):
+    for item in items:
+        tuple_.index(item)
+
+
+index_methods = ImmutableDict.of(
+    (
+        ("tuple.index", lambda items: tuple_index_each(vocabulary_tuple, items)),
+        ("ImmutableSet.index", lambda items: index_each(vocabulary, items)),
+        ("ImmutableSet.indices_of", vocabulary.indices_of),
+    )
+)
+
+
+@pytest.mark.parametrize("method", index_methods.items())
+def test_index(method, benchmark):
+    benchmark.name = method[0]
+    benchmark.group = "Index lookups"
+    benchmark(method[1], lookups)
@@ -0,0 +1,55 @@
+# pylint: disable=invalid-name
+from immutablecollections import ImmutableDict, immutabledict
+
+import pytest
+
+# like layering the configuration overrides of a service on top of its defaults
+defaults = immutabledict((f"option{i}", i) for i in range(200))
+overrides = immutabledict((f"option{i}", -i) for i in range(0, 200, 20))
+unchanged_overrides = immutabledict((f"option{i}", i) for i in range(0, 200, 20))
+extra_layer = immutabledict((f"extra{i}", i) for i in range(10))
+
+
+def merge_by_builder(base, other):
+    return base.modified_copy_builder().put_all(other).build()
+
+
+merges = immutabledict(
+    (
+        ("modified_copy_builder", merge_by_builder),
+        ("union", ImmutableDict.union),
+        ("|", lambda base, other: base | other),
+    )
+)
+
+
+@pytest.mark.parametrize("merge", merges.items())
+@pytest.mark.parametrize(
+    "layer",
+    immutabledict(
+        (("overrides", overrides), ("unchanged overrides", unchanged_overrides))
+    ).items(),
+)
+def test_merge(merge, layer, benchmark):
+    benchmark.name = merge[0]
+    benchmark.group = f"Merging {layer[0]} into a 200-item dict"
+    benchmark(merge[1], defaults, layer[1])
+
+
+def merge_all_by_union(layers):
+    ret = layers[0]
+    for layer in layers[1:]:
+        ret = ret.union(layer)
+    return ret
+
+
+layered_merges = immutabledict(
+    (("folded union", merge_all_by_union), ("merge_all", ImmutableDict.merge_all))
+)
+
+
+@pytest.mark.parametrize("merge", layered_merges.items())
+def test_merge_all(merge, benchmark):
+    benchmark.name = merge[0]
+    benchmark.group = "Merging three layers"
+    benchmark(merge[1], [defaults, overrides, extra_layer])
@@ -0,0 +1,43 @@
+# pylint: disable=invalid-name
+import random
+
+from immutablecollections import (
+    ImmutableListMultiDict,
+    ImmutableSetMultiDict,
+    immutabledict,
+    immutablelistmultidict,
+    immutablesetmultidict,
+)
+
+import pytest
+
+rand = random.Random(0)
+
+# like indexing the tokens of a corpus by their first letters
+letters = "abcdefghijklmnopqrstuvwxyz"
+tokens = [
+    "".join(rand.choice(letters) for _ in range(rand.randrange(1, 8)))
+    for _ in range(100000)
+]
+pairs = [(token[:2], token) for token in tokens]
+
+constructions = immutabledict(
+    (
+        ("set multidict", (immutablesetmultidict, ImmutableSetMultiDict.group_by)),
+        ("list multidict", (immutablelistmultidict, ImmutableListMultiDict.group_by)),
+    )
+)
+
+
+@pytest.mark.parametrize("construction", constructions.items())
+def test_from_pairs(construction, benchmark):
+    benchmark.name = "factory"
+    benchmark.group = f"Building a {construction[0]} of 100k items"
+    benchmark(construction[1][0], pairs)
+
+
+@pytest.mark.parametrize("construction", constructions.items())
+def test_group_by(construction, benchmark):
+    benchmark.name = "group_by"
+    benchmark.group = f"Building a {construction[0]} of 100k items"
+    benchmark(construction[1][1], tokens, lambda token: token[:2])
@@ -0,0 +1,74 @@
+# pylint: disable=invalid-name
+from immutablecollections import immutabledict, immutableset
+
+import pytest
+
+big_dim = int(1e5)
+num_derivations = 100
+
+base_set = immutableset(range(big_dim))
+# with_added on a hash trie-backed set no longer copies it
+persistent_base_set = base_set.without(0).with_added(0)
+base_dict = immutabledict((i, str(i)) for i in range(big_dim))
+persistent_base_dict = base_dict.with_item(0, "0")
+
+
+def derive_set_by_union(base):
+    for i in range(num_derivations):
+        base.union((-i,))
+
+
+def derive_set_by_with_added(base):
+    for i in range(num_derivations):
+        base.with_added(-i)
+
+
+def derive_set_by_without(base):
+    for i in range(num_derivations):
+        base.without(i)
+
+
+def derive_dict_by_builder(base):
+    for i in range(num_derivations):
+        base.modified_copy_builder().put(-i, "new").build()
+
+
+def derive_dict_by_with_item(base):
+    for i in range(num_derivations):
+        base.with_item(-i, "new")
+
+
+def derive_dict_by_without_key(base):
+    for i in range(num_derivations):
+        base.without_key(i)
+
+
+set_derivations = immutabledict(
+    (
+        ("union", (derive_set_by_union, base_set)),
+        ("with_added", (derive_set_by_with_added, persistent_base_set)),
+        ("without", (derive_set_by_without, persistent_base_set)),
+    )
+)
+
+dict_derivations = immutabledict(
+    (
+        ("modified_copy_builder", (derive_dict_by_builder, base_dict)),
+        ("with_item", (derive_dict_by_with_item, persistent_base_dict)),
+        ("without_key", (derive_dict_by_without_key, persistent_base_dict)),
+    )
+)
+
+
+@pytest.mark.parametrize("derivation", set_derivations.items())
+def test_set_derivation(derivation, benchmark):
+    benchmark.name = derivation[0]
+    benchmark.group = f"Derive {num_derivations} sets of size {big_dim}"
+    benchmark(*derivation[1])
+
+
+@pytest.mark.parametrize("derivation", dict_derivations.items())
+def test_dict_derivation(derivation, benchmark):
+    benchmark.name = derivation[0]
+    benchmark.group = f"Derive {num_derivations} dicts of size {big_dim}"
+    benchmark(*derivation[1])
@@ -0,0 +1,103 @@
+# pylint: disable=invalid-name
+import operator
+import random
+
+from immutablecollections import ImmutableSet, immutabledict, immutableset
+
+import pytest
+
+rand = random.Random(0)
+
+big_dim = int(1e5)
+
+left_list = rand.sample(range(2 * big_dim), big_dim)
+right_list = rand.sample(range(2 * big_dim), big_dim)
+subset_list = left_list[: big_dim // 2]
+
+operand_pairs = immutabledict(
+    (
+        ("overlapping", (left_list, right_list)),
+        ("with subset", (left_list, subset_list)),
+        ("with disjoint", (left_list, [-x - 1 for x in right_list])),
+    )
+)
+
+representations = immutabledict(
+    (("frozenset", frozenset), ("immutableset", immutableset))
+)
+
+operators = immutabledict(
+    (
+        ("|", operator.or_),
+        ("&", operator.and_),
+        ("-", operator.sub),
+        ("^", operator.xor),
+        ("<=", operator.le),
+        (">=", operator.ge),
+        ("isdisjoint", lambda x, y: x.isdisjoint(y)),
+    )
+)
+
+
+@pytest.mark.parametrize("representation", representations.items())
+@pytest.mark.parametrize("operands", operand_pairs.items())
+@pytest.mark.parametrize("op", operators.items())
+def test_set_algebra(op, operands, representation, benchmark):
+    left = representation[1](operands[1][0])
+    right = representation[1](operands[1][1])
+    benchmark.name = representation[0]
+    benchmark.group = f"{op[0]} {operands[0]}"
+    benchmark(op[1], left, right)
+
+
+posting_lists = [
+    immutableset(rand.sample(range(big_dim), big_dim // 100)) for _ in range(1000)
+]
+
+
+def fold(op, sets):
+    ret = sets[0]
+    for set_ in sets[1:]:
+        ret = op(ret, set_)
+    return ret
+
+
+n_ary_operations = immutabledict(
+    (
+        ("union", (operator.or_, ImmutableSet.union_all)),
+        ("intersection", (operator.and_, ImmutableSet.intersection_all)),
+        ("difference", (operator.sub, ImmutableSet.difference_all)),
+    )
+)
+
+
+@pytest.mark.parametrize("operation", n_ary_operations.items())
+def test_fold_binary(operation, benchmark):
+    benchmark.name = "binary fold"
+    benchmark.group = f"{operation[0]} of 1000 sets"
+    benchmark(fold, operation[1][0], posting_lists)
+
+
+@pytest.mark.parametrize("operation", n_ary_operations.items())
+def test_n_ary(operation, benchmark):
+    benchmark.name = f"{operation[0]}_all"
+    benchmark.group = f"{operation[0]} of 1000 sets"
+    benchmark(operation[1][1], posting_lists)
+
+
+vocabulary = immutabledict((f"word{i}", i) for i in range(big_dim))
+document = [f"word{i}" for i in rand.sample(range(2 * big_dim), big_dim // 100)]
+
+key_sets = immutabledict(
+    (
+        ("immutableset(keys())", lambda dict_: immutableset(dict_.keys())),
+        ("key_set", lambda dict_: dict_.key_set()),
+    )
+)
+
+
+@pytest.mark.parametrize("key_set", key_sets.items())
+def test_dict_key_set(key_set, benchmark):
+    benchmark.name = key_set[0]
+    benchmark.group = "Checking a document's words are keys of a vocabulary dict"
+    benchmark(lambda: key_set[1](vocabulary).issuperset(document))
@@ -0,0 +1,74 @@
+# pylint: disable=invalid-name,protected-access
+import tracemalloc
+
+from immutablecollections import immutabledict, immutableset
+from immutablecollections._immutabledict import _RegularDictBackedImmutableDict
+from immutablecollections._immutableset import _FrozenSetBackedImmutableSet
+
+import pytest
+
+sizes = tuple(range(17))
+num_lookups = 1000
+
+sources = immutabledict((size, [str(x) for x in range(size)]) for size in sizes)
+
+
+def frozenset_backed(elements):
+    return _FrozenSetBackedImmutableSet(elements, tuple(elements), None)
+
+
+def dict_backed(elements):
+    return _RegularDictBackedImmutableDict(zip(elements, elements))
+
+
+def small_dict(elements):
+    return immutabledict(zip(elements, elements))
+
+
+implementations = immutabledict(
+    (
+        ("frozenset + tuple set", frozenset_backed),
+        ("immutableset", immutableset),
+        ("dict-backed dict", dict_backed),
+        ("immutabledict", small_dict),
+    )
+)
+
+
+def allocated_bytes(constructor, elements) -> int:
+    tracemalloc.start()
+    try:
+        result = constructor(elements)
+        allocated = tracemalloc.get_traced_memory()[0]
+        del result
+        return allocated
+    finally:
+        tracemalloc.stop()
+
+
+def look_up(collection, probes):
+    for _ in range(num_lookups):
+        for probe in probes:
+            probe in collection  # pylint:disable=pointless-statement
+
+
+@pytest.mark.parametrize("implementation", implementations.items())
+@pytest.mark.parametrize("size", sizes)
+def test_memory(implementation, size, benchmark):
+    elements = sources[size]
+    benchmark.name = implementation[0]
+    benchmark.group = f"Small collection memory, {size} elements"
+    benchmark.extra_info["allocated_bytes"] = allocated_bytes(implementation[1], elements)
+    benchmark(implementation[1], elements)
+
+
+@pytest.mark.parametrize("implementation", implementations.items())
+@pytest.mark.parametrize("size", sizes)
+def test_lookup(implementation, size, benchmark):
+    elements = sources[size]
+    collection = implementation[1](elements)
+    # half hits and half misses
+    probes = elements + [str(-x - 1) for x in range(size)]
+    benchmark.name = implementation[0]
+    benchmark.group = f"Small collection lookups, {size} elements"
+    benchmark(look_up, collection, probes)
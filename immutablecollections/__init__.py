@@ -29,13 +29,21 @@ from attr.exceptions import FrozenInstanceError
 
 from immutablecollections._immutableset import (
     ImmutableSet,
+    ImmutableSortedSet,
     immutableset,
     immutableset_from_unique_elements,
+    immutableset_lazy,
+    immutablesortedset,
 )
 from immutablecollections._immutabledict import (
+    ImmutableBiDict,
     ImmutableDict,
+    ImmutableDictSchema,
+    immutablebidict,
     immutabledict,
     immutabledict_from_unique_keys,
+    immutabledict_lazy,
+    immutabledict_schema,
 )
 from immutablecollections._immutablemultidict import (
     ImmutableListMultiDict,
@@ -44,4 +52,10 @@ from immutablecollections._immutablemultidict import (
     immutablesetmultidict,
 )
 from immutablecollections.immutablecollection import ImmutableCollection
+from immutablecollections._interning import (
+    InternStatistics,
+    clear_intern_table,
+    intern_statistics,
+    set_intern_max_size,
+)
 from immutablecollections.version import version as __version__
@@ -0,0 +1,429 @@
+"""
+A persistent insertion-ordered hash map, used to implement ``ImmutableSet`` and
+``ImmutableDict`` variants which can cheaply derive copies differing by a single entry.
+
+The map has two parts which share structure between versions:
+
+* a hash array mapped trie (HAMT) from each key to its insertion sequence number and value.
+* a persistent vector, indexed by sequence number, of the keys in insertion order. Removed
+  keys leave a tombstone behind, and the whole map is compacted when tombstones outnumber
+  live keys.
+
+Adding, replacing or removing a single key copies only the O(log n) trie nodes along its path.
+"""
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+# each level of both tries consumes this many bits of the hash or index
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+_HASH_MASK = (1 << 64) - 1
+
+# marks an entry of a bitmap node whose value slot holds a child node rather than a value
+_NODE: Any = object()
+# marks a removed key in the order vector
+_TOMBSTONE: Any = object()
+_MISSING: Any = object()
+
+# never compact maps smaller than this, since rebuilding them would be wasted effort
+_MIN_TOMBSTONES_TO_COMPACT = 32
+
+
+def _hash(key: Any) -> int:
+    return hash(key) & _HASH_MASK
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+class _BitmapNode:
+    """
+    A HAMT node with up to 32 children, selected by 5 bits of a key's hash.
+
+    The entries are stored in a flat tuple of key, value pairs, ordered by their bit in
+    ``bitmap``.  If the key is ``_NODE``, the value is a child node.
+    """
+
+    __slots__ = ("bitmap", "array")
+
+    def __init__(self, bitmap: int, array: Tuple[Any, ...]) -> None:
+        self.bitmap = bitmap
+        self.array = array
+
+    def find(self, shift: int, key_hash: int, key: Any) -> Any:
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return _MISSING
+        idx = 2 * _popcount(self.bitmap & (bit - 1))
+        found_key = self.array[idx]
+        if found_key is _NODE:
+            return self.array[idx + 1].find(shift + _BITS, key_hash, key)
+        if found_key is key or found_key == key:
+            return self.array[idx + 1]
+        return _MISSING
+
+    def assoc(self, shift: int, key_hash: int, key: Any, value: Any) -> "_BitmapNode":
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        idx = 2 * _popcount(self.bitmap & (bit - 1))
+        array = self.array
+        if not self.bitmap & bit:
+            return _BitmapNode(
+                self.bitmap | bit, array[:idx] + (key, value) + array[idx:]
+            )
+        found_key = array[idx]
+        found_value = array[idx + 1]
+        if found_key is _NODE:
+            child = found_value.assoc(shift + _BITS, key_hash, key, value)
+            if child is found_value:
+                return self
+            return _BitmapNode(
+                self.bitmap, array[:idx] + (_NODE, child) + array[idx + 2 :]
+            )
+        if found_key is key or found_key == key:
+            if found_value is value:
+                return self
+            return _BitmapNode(self.bitmap, array[:idx] + (key, value) + array[idx + 2 :])
+        child = _two_entry_node(
+            shift + _BITS, _hash(found_key), found_key, found_value, key_hash, key, value
+        )
+        return _BitmapNode(self.bitmap, array[:idx] + (_NODE, child) + array[idx + 2 :])
+
+    def without(self, shift: int, key_hash: int, key: Any) -> Optional["_BitmapNode"]:
+        """
+        Get this node without *key*, or ``None`` if that would leave it empty.
+
+        If *key* is not present, this node itself is returned.
+        """
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return self
+        idx = 2 * _popcount(self.bitmap & (bit - 1))
+        array = self.array
+        found_key = array[idx]
+        if found_key is _NODE:
+            old_child = array[idx + 1]
+            child = old_child.without(shift + _BITS, key_hash, key)
+            if child is old_child:
+                return self
+            if child is not None:
+                return _BitmapNode(
+                    self.bitmap, array[:idx] + (_NODE, child) + array[idx + 2 :]
+                )
+        elif not (found_key is key or found_key == key):
+            return self
+        if self.bitmap == bit:
+            return None
+        return _BitmapNode(self.bitmap ^ bit, array[:idx] + array[idx + 2 :])
+
+
+class _CollisionNode:
+    """
+    A HAMT node holding entries whose keys have identical hashes.
+    """
+
+    __slots__ = ("key_hash", "array")
+
+    def __init__(self, key_hash: int, array: Tuple[Any, ...]) -> None:
+        self.key_hash = key_hash
+        self.array = array
+
+    def _index_of(self, key: Any) -> int:
+        array = self.array
+        for idx in range(0, len(array), 2):
+            if array[idx] is key or array[idx] == key:
+                return idx
+        return -1
+
+    def find(self, shift: int, key_hash: int, key: Any) -> Any:
+        if key_hash == self.key_hash:
+            idx = self._index_of(key)
+            if idx >= 0:
+                return self.array[idx + 1]
+        return _MISSING
+
+    def assoc(self, shift: int, key_hash: int, key: Any, value: Any) -> Any:
+        if key_hash != self.key_hash:
+            # the new key only shares a prefix of its hash with ours, so split on it
+            bit = 1 << ((self.key_hash >> shift) & _MASK)
+            return _BitmapNode(bit, (_NODE, self)).assoc(shift, key_hash, key, value)
+        idx = self._index_of(key)
+        if idx < 0:
+            return _CollisionNode(key_hash, self.array + (key, value))
+        if self.array[idx + 1] is value:
+            return self
+        return _CollisionNode(
+            key_hash, self.array[:idx] + (key, value) + self.array[idx + 2 :]
+        )
+
+    def without(self, shift: int, key_hash: int, key: Any) -> Optional["_CollisionNode"]:
+        idx = self._index_of(key) if key_hash == self.key_hash else -1
+        if idx < 0:
+            return self
+        if len(self.array) == 2:
+            return None
+        return _CollisionNode(key_hash, self.array[:idx] + self.array[idx + 2 :])
+
+
+def _two_entry_node(
+    shift: int,
+    hash1: int,
+    key1: Any,
+    value1: Any,
+    hash2: int,
+    key2: Any,
+    value2: Any,
+) -> Any:
+    if hash1 == hash2:
+        return _CollisionNode(hash1, (key1, value1, key2, value2))
+    bit1 = 1 << ((hash1 >> shift) & _MASK)
+    bit2 = 1 << ((hash2 >> shift) & _MASK)
+    if bit1 == bit2:
+        return _BitmapNode(
+            bit1,
+            (
+                _NODE,
+                _two_entry_node(shift + _BITS, hash1, key1, value1, hash2, key2, value2),
+            ),
+        )
+    elif bit1 < bit2:
+        return _BitmapNode(bit1 | bit2, (key1, value1, key2, value2))
+    else:
+        return _BitmapNode(bit1 | bit2, (key2, value2, key1, value1))
+
+
+def _build_node(entries: list, shift: int) -> _BitmapNode:
+    """
+    Build a node holding *entries*, a list of distinct ``(hash, key, value)`` triples.
+    """
+    buckets: dict = {}
+    for entry in entries:
+        buckets.setdefault((entry[0] >> shift) & _MASK, []).append(entry)
+    bitmap = 0
+    array: list = []
+    for bit_index in sorted(buckets):
+        bitmap |= 1 << bit_index
+        bucket = buckets[bit_index]
+        if len(bucket) == 1:
+            array.append(bucket[0][1])
+            array.append(bucket[0][2])
+        else:
+            first_hash = bucket[0][0]
+            array.append(_NODE)
+            if all(entry[0] == first_hash for entry in bucket):
+                array.append(
+                    _CollisionNode(
+                        first_hash,
+                        tuple(x for (_, key, value) in bucket for x in (key, value)),
+                    )
+                )
+            else:
+                array.append(_build_node(bucket, shift + _BITS))
+    return _BitmapNode(bitmap, tuple(array))
+
+
+_EMPTY_NODE = _BitmapNode(0, ())
+
+
+class _Vector:
+    """
+    A persistent vector, stored as a trie of tuples of width 32 whose leaves are the elements.
+    """
+
+    __slots__ = ("root", "shift", "count")
+
+    def __init__(self, root: Tuple[Any, ...], shift: int, count: int) -> None:
+        self.root = root
+        self.shift = shift
+        self.count = count
+
+    def get(self, index: int) -> Any:
+        node = self.root
+        shift = self.shift
+        while shift:
+            node = node[(index >> shift) & _MASK]
+            shift -= _BITS
+        return node[index & _MASK]
+
+    def append(self, value: Any) -> "_Vector":
+        if self.count == _WIDTH << self.shift:
+            # the trie is full, so add a level above the root
+            return _Vector(
+                (self.root, _new_path(self.shift, value)),
+                self.shift + _BITS,
+                self.count + 1,
+            )
+        return _Vector(
+            _push(self.root, self.shift, self.count, value), self.shift, self.count + 1
+        )
+
+    def set(self, index: int, value: Any) -> "_Vector":
+        return _Vector(_set(self.root, self.shift, index, value), self.shift, self.count)
+
+    def __iter__(self) -> Iterator[Any]:
+        return _iterate(self.root, self.shift)
+
+
+def _new_path(shift: int, value: Any) -> Tuple[Any, ...]:
+    ret: Tuple[Any, ...] = (value,)
+    while shift:
+        ret = (ret,)
+        shift -= _BITS
+    return ret
+
+
+def _push(node: Tuple[Any, ...], shift: int, index: int, value: Any) -> Tuple[Any, ...]:
+    if not shift:
+        return node + (value,)
+    sub = (index >> shift) & _MASK
+    if sub < len(node):
+        return node[:sub] + (_push(node[sub], shift - _BITS, index, value),)
+    return node + (_new_path(shift - _BITS, value),)
+
+
+def _set(node: Tuple[Any, ...], shift: int, index: int, value: Any) -> Tuple[Any, ...]:
+    sub = (index >> shift) & _MASK
+    if shift:
+        value = _set(node[sub], shift - _BITS, index, value)
+    return node[:sub] + (value,) + node[sub + 1 :]
+
+
+def _iterate(node: Tuple[Any, ...], shift: int) -> Iterator[Any]:
+    if not shift:
+        return iter(node)
+    # a generator per level keeps iteration lazy without recursing per element
+    return (value for child in node for value in _iterate(child, shift - _BITS))
+
+
+def _build_vector(values: Tuple[Any, ...]) -> _Vector:
+    level: Tuple[Any, ...] = tuple(
+        values[start : start + _WIDTH] for start in range(0, len(values), _WIDTH)
+    )
+    shift = 0
+    while len(level) > 1:
+        level = tuple(
+            level[start : start + _WIDTH] for start in range(0, len(level), _WIDTH)
+        )
+        shift += _BITS
+    return _Vector(level[0] if level else (), shift, len(values))
+
+
+_EMPTY_VECTOR = _Vector((), 0, 0)
+
+
+class PersistentOrderedMap:
+    """
+    An immutable mapping which iterates in insertion order and supports deriving a copy with
+    one key added, replaced or removed in O(log n) time.
+
+    Replacing the value of an existing key keeps its position in the iteration order.
+    """
+
+    __slots__ = ("_root", "_order", "_size")
+
+    def __init__(self, root: _BitmapNode, order: _Vector, size: int) -> None:
+        self._root = root
+        self._order = order
+        self._size = size
+
+    @staticmethod
+    def from_distinct_items(
+        keys: Iterable[Any], values: Iterable[Any]
+    ) -> "PersistentOrderedMap":
+        """
+        Build a map from the corresponding elements of *keys* and *values* in bulk, which is
+        much faster than ``assoc``-ing them one at a time.
+
+        *keys* must not contain duplicates.
+        """
+        keys = tuple(keys)
+        if not keys:
+            return _EMPTY_MAP
+        root = _build_node(
+            list(zip(map(_hash, keys), keys, zip(range(len(keys)), values))), 0
+        )
+        return PersistentOrderedMap(root, _build_vector(keys), len(keys))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        found = self._root.find(0, _hash(key), key)
+        if found is _MISSING:
+            return default
+        return found[1]
+
+    def __contains__(self, key: Any) -> bool:
+        return self._root.find(0, _hash(key), key) is not _MISSING
+
+    def sequence_number(self, key: Any) -> Optional[int]:
+        """
+        Get the position of *key* in the iteration order, or ``None`` if it is absent.
+
+        This is only accurate if ``is_compact()``.
+        """
+        found = self._root.find(0, _hash(key), key)
+        if found is _MISSING:
+            return None
+        return found[0]
+
+    def is_compact(self) -> bool:
+        return self._order.count == self._size
+
+    def key_at(self, index: int) -> Any:
+        """
+        Get the key at position *index*, which must be in range and ``is_compact()`` must hold.
+        """
+        return self._order.get(index)
+
+    def assoc(self, key: Any, value: Any) -> "PersistentOrderedMap":
+        """
+        Get a copy of this map with *key* mapped to *value*.
+        """
+        key_hash = _hash(key)
+        found = self._root.find(0, key_hash, key)
+        if found is _MISSING:
+            return PersistentOrderedMap(
+                self._root.assoc(0, key_hash, key, (self._order.count, value)),
+                self._order.append(key),
+                self._size + 1,
+            )
+        if found[1] is value:
+            return self
+        return PersistentOrderedMap(
+            self._root.assoc(0, key_hash, key, (found[0], value)), self._order, self._size
+        )
+
+    def dissoc(self, key: Any) -> "PersistentOrderedMap":
+        """
+        Get a copy of this map without *key*.
+        """
+        key_hash = _hash(key)
+        found = self._root.find(0, key_hash, key)
+        if found is _MISSING:
+            return self
+        ret = PersistentOrderedMap(
+            self._root.without(0, key_hash, key) or _EMPTY_NODE,
+            self._order.set(found[0], _TOMBSTONE),
+            self._size - 1,
+        )
+        tombstones = ret._order.count - ret._size
+        if tombstones >= _MIN_TOMBSTONES_TO_COMPACT and tombstones > ret._size:
+            # amortized over the removals which created the tombstones, this is O(1)
+            return PersistentOrderedMap.from_distinct_items(ret.keys(), ret.values())
+        return ret
+
+    def keys(self) -> Iterator[Any]:
+        if self.is_compact():
+            return iter(self._order)
+        return (key for key in self._order if key is not _TOMBSTONE)
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        find = self._root.find
+        return ((key, find(0, _hash(key), key)[1]) for key in self.keys())
+
+    def values(self) -> Iterator[Any]:
+        return (value for (_, value) in self.items())
+
+
+_EMPTY_MAP = PersistentOrderedMap(_EMPTY_NODE, _EMPTY_VECTOR, 0)
@@ -0,0 +1,149 @@
+"""
+Hash functions shared by the immutable collections, designed so that the hash of a collection
+derived from another by adding or removing a few elements can be computed from the original's
+hash in time proportional to the number of changes.
+
+Sets must hash like an equal ``frozenset``.  CPython's ``frozenset`` hash XORs together a
+shuffled version of the hash of each element and then applies an invertible finalization
+step, so we can recover the XOR accumulator from a set's hash, update it, and finalize it
+again.  Since this depends on interpreter internals, it is checked when this module is
+imported and disabled if it does not match.
+
+Mappings and multidicts only need to hash consistently with each other, so they sum the
+hashes of their ``(key, value)`` pairs.  Unlike XOR-ing them, this does not cancel out
+repeated pairs and can be updated by subtraction, and by hashing pairs from ``zip`` we avoid
+allocating a tuple for each.
+"""
+import sys
+from typing import Any, Iterable, Optional, Tuple
+
+_WIDTH = sys.hash_info.width
+_MASK = (1 << _WIDTH) - 1
+
+# constants from CPython's Objects/setobject.c
+_SHUFFLE_XOR = 89869747
+_SHUFFLE_MULTIPLIER = 3644798167
+_SIZE_MULTIPLIER = 1927868237
+_DISPERSE_MULTIPLIER = 69069
+_DISPERSE_INCREMENT = 907133923
+# used by frozenset in place of -1, which is reserved for errors
+_SET_HASH_FOR_MINUS_ONE = 590923713
+
+
+def _modular_inverse(value: int) -> int:
+    # Newton's iteration doubles the number of correct low bits each step
+    inverse = value
+    for _ in range(7):
+        inverse = (inverse * (2 - value * inverse)) & _MASK
+    return inverse
+
+
+_DISPERSE_MULTIPLIER_INVERSE = _modular_inverse(_DISPERSE_MULTIPLIER)
+
+
+def _to_signed(value: int) -> int:
+    return value - (1 << _WIDTH) if value >> (_WIDTH - 1) else value
+
+
+def shuffled_hash(element: Any) -> int:
+    """
+    Get the contribution of *element* to the XOR accumulator of a set hash.
+    """
+    hash_ = hash(element) & _MASK
+    return (((hash_ ^ _SHUFFLE_XOR) ^ (hash_ << 16)) * _SHUFFLE_MULTIPLIER) & _MASK
+
+
+def _finish_set_hash(accumulator: int, size: int) -> int:
+    hash_ = accumulator ^ (((size + 1) * _SIZE_MULTIPLIER) & _MASK)
+    hash_ ^= (hash_ >> 11) ^ (hash_ >> 25)
+    hash_ = (hash_ * _DISPERSE_MULTIPLIER + _DISPERSE_INCREMENT) & _MASK
+    if hash_ == _MASK:
+        hash_ = _SET_HASH_FOR_MINUS_ONE
+    return _to_signed(hash_)
+
+
+def _set_hash_accumulator(set_hash: int, size: int) -> Optional[int]:
+    hash_ = set_hash & _MASK
+    if hash_ == _SET_HASH_FOR_MINUS_ONE:
+        # this might have been substituted for -1, so we can't invert it
+        return None
+    hash_ = ((hash_ - _DISPERSE_INCREMENT) * _DISPERSE_MULTIPLIER_INVERSE) & _MASK
+    # undo hash ^= (hash >> 11) ^ (hash >> 25); each pass recovers at least 11 more high bits
+    undispersed = hash_
+    for _ in range(_WIDTH // 11 + 1):
+        undispersed = hash_ ^ (undispersed >> 11) ^ (undispersed >> 25)
+    return undispersed ^ (((size + 1) * _SIZE_MULTIPLIER) & _MASK)
+
+
+def _check_set_hash_compatibility() -> bool:
+    samples: Tuple[Tuple[Any, ...], ...] = (
+        (),
+        (0,),
+        (-1,),
+        ("a", "b", "c"),
+        tuple(range(-50, 50)),
+        (1.5, "x", (1, 2), None),
+    )
+    for sample in samples:
+        accumulator = 0
+        for element in sample:
+            accumulator ^= shuffled_hash(element)
+        expected = hash(frozenset(sample))
+        if (
+            _finish_set_hash(accumulator, len(sample)) != expected
+            or _set_hash_accumulator(expected, len(sample)) != accumulator
+        ):
+            return False
+    return True
+
+
+INCREMENTAL_SET_HASH = _check_set_hash_compatibility()
+
+
+def derived_set_hash(
+    set_hash: int, size: int, changed: Iterable[Any], derived_size: int
+) -> Optional[int]:
+    """
+    Get the hash of a set of *derived_size* elements which differs from a set of *size*
+    elements with hash *set_hash* by *changed*, the elements added to or removed from it.
+
+    ``None`` is returned if this cannot be done incrementally.
+    """
+    if not INCREMENTAL_SET_HASH:
+        return None
+    accumulator = _set_hash_accumulator(set_hash, size)
+    if accumulator is None:
+        return None
+    for element in changed:
+        accumulator ^= shuffled_hash(element)
+    return _finish_set_hash(accumulator, derived_size)
+
+
+def item_hash(key: Any, value: Any) -> int:
+    """
+    Get the contribution of a key-value pair to a mapping hash.
+    """
+    return hash((key, value))
+
+
+def mapping_hash_from_sum(item_hash_sum: int, size: int) -> int:
+    """
+    Get the hash of a mapping from the sum of the ``item_hash`` of its items and its size.
+    """
+    return _to_signed((item_hash_sum + size * _SIZE_MULTIPLIER) & _MASK)
+
+
+def mapping_hash_sum(mapping_hash_: int, size: int) -> int:
+    """
+    Invert ``mapping_hash_from_sum``.
+    """
+    return (mapping_hash_ - size * _SIZE_MULTIPLIER) & _MASK
+
+
+def mapping_hash(keys: Iterable[Any], values: Iterable[Any], size: int) -> int:
+    """
+    Get the hash of a mapping (or multidict) with *size* items, whose keys and values are
+    the corresponding elements of *keys* and *values*.
+    """
+    # zip re-uses its result tuple once hash is done with it, so this doesn't allocate
+    return mapping_hash_from_sum(sum(map(hash, zip(keys, values))), size)
@@ -1,24 +1,52 @@
 from abc import ABC, ABCMeta, abstractmethod
+from array import array
 from collections import defaultdict
+from itertools import accumulate, chain, islice, repeat
+from operator import is_, sub
 from typing import (
-    AbstractSet,
     Any,
     Callable,
     Collection,
+    Dict,
     Generic,
     Iterable,
     Iterator,
     List,
     Mapping,
-    MutableMapping,
     Optional,
     Tuple,
+    Type,
     TypeVar,
     Union,
     ValuesView,
 )
 
-from immutablecollections import ImmutableSet, immutabledict, immutableset
+from immutablecollections import (
+    ImmutableDict,
+    ImmutableSet,
+    immutableset,
+)
+from immutablecollections._hashing import mapping_hash
+from immutablecollections._immutabledict import (
+    _immutabledict_from_dict,
+    _item_pairs,
+    _native_items,
+)
+from immutablecollections._immutableset import (
+    _MAX_SMALL_SIZE,
+    _immutableset_from_dict,
+    _ImmutableSetSlice,
+    _SequenceSlice,
+)
+from immutablecollections._interning import intern_collection
+from immutablecollections._lazy import materialization_lock
+from immutablecollections._type_checking import (
+    UNVERIFIED,
+    VerifiedTypes,
+    check_item_types,
+    swapped,
+)
+from immutablecollections._utils import DICT_ITERATION_IS_DETERMINISTIC
 from immutablecollections.immutablecollection import ImmutableCollection
 
 KT = TypeVar("KT")
@@ -30,11 +58,18 @@ KT2 = TypeVar("KT2")
 VT2 = TypeVar("VT2")
 IT2 = Tuple[KT2, VT2]  # item type
 
+# the key and value types of transformed multidicts
+NKT = TypeVar("NKT")
+NVT = TypeVar("NVT")
+
 SelfType = TypeVar("SelfType")  # pylint:disable=invalid-name
 
 
 def immutablesetmultidict(
-    iterable: Optional[Iterable[Tuple[KT, VT]]] = None
+    iterable: Optional[Iterable[Tuple[KT, VT]]] = None,
+    *,
+    intern: bool = False,
+    compact: bool = False,
 ) -> "ImmutableSetMultiDict[" "KT, VT]":
     """
     Create an ``ImmutableSetMultiDict`` with the given mappings.
@@ -45,24 +80,78 @@ def immutablesetmultidict(
     *iterable*. The iteration order of the items will be ordered first by key, then by the order of
     the appearance of that value's association with the key on *iterable*.
 
-    If *iterable* is already an ``ImmutableSetMultiDict``, *iterable* itself will be returned.
+    If *intern* is ``True``, then if an equal ``ImmutableSetMultiDict`` with the same iteration
+    order was previously created with *intern*, that multidict will be returned instead of a new
+    one (see ``intern_statistics``).
+
+    If *compact* is ``True``, the multidict is stored in compressed sparse row form: an
+    index from each key to its row, an array of the offsets at which the rows start and a
+    single tuple of all the values.  When there are many keys with few values each, this
+    takes a fraction of the memory of the usual dict of sets, at the cost of making a view
+    of the values of a key each time they are looked up.
+
+    If *iterable* is already an ``ImmutableSetMultiDict`` (stored compactly, if *compact*
+    is ``True``), *iterable* itself will be returned.
     """
     # immutablesetmultidict() should return an empty collection
     if iterable is None:
         # key and value types don't matter on an empty collection
         return _EMPTY_IMMUTABLE_SET_MULTIDICT
 
-    if isinstance(iterable, ImmutableSetMultiDict):
-        # if an ImmutableSetMultiDict is input, we can safely just return it,
-        # since the object can safely be shared
-        return iterable
+    if intern:
+        return intern_collection(immutablesetmultidict(iterable, compact=compact))
 
-    # TODO: fold the construction logic into here for better efficiency
-    return ImmutableSetMultiDict.of(iterable)
+    if isinstance(iterable, ImmutableSetMultiDict):
+        if not compact or isinstance(iterable, _CompactImmutableSetMultiDict):
+            # if an ImmutableSetMultiDict is input, we can safely just return it,
+            # since the object can safely be shared
+            return iterable
+        iterable = iterable.as_dict()
+
+    if not DICT_ITERATION_IS_DETERMINISTIC:
+        # ImmutableSets keep track of the order of the values themselves, which grouping
+        # them below relies on dicts to do
+        if isinstance(iterable, Mapping):
+            # groups which are already ImmutableSets are kept rather than copied
+            groups = {
+                key: immutableset(values, disable_order_check=True)
+                for (key, values) in iterable.items()
+            }
+            groups = {key: group for (key, group) in groups.items() if group}
+        else:
+            built = ImmutableSetMultiDict.builder().put_all_items(iterable).build()
+            return _compact_set_multidict(built.as_dict()) if compact else built
+        if compact:
+            return _compact_set_multidict(groups)
+        return _set_multidict_from_groups(groups)
+
+    grouped: Dict[KT, Union[ImmutableSet[VT], Dict[VT, None]]]
+    if isinstance(iterable, Mapping):
+        # as with the builder, the values may be in any iterable, even a set
+        grouped = {
+            key: values if isinstance(values, ImmutableSet) else dict.fromkeys(values)
+            for (key, values) in iterable.items()
+        }
+        grouped = {key: group for (key, group) in grouped.items() if group}
+    else:
+        # values are grouped by key in a single pass, into dicts which become their sets
+        grouped = defaultdict(dict)
+        for (key, value) in iterable:
+            grouped[key][value] = None  # type: ignore
+
+    if compact:
+        return _compact_set_multidict(grouped)
+    # pylint:disable=unidiomatic-typecheck
+    return _set_multidict_from_groups(
+        {
+            key: _immutableset_from_dict(group, None) if type(group) is dict else group
+            for (key, group) in grouped.items()
+        }
+    )
 
 
 def immutablelistmultidict(
-    iterable: Optional[Iterable[Tuple[KT, VT]]] = None
+    iterable: Optional[Iterable[Tuple[KT, VT]]] = None, *, intern: bool = False
 ) -> "ImmutableListMultiDict[KT, VT]":
     """
     Create an ``ImmutableListMultiDict`` with the given mappings.
@@ -73,6 +162,10 @@ def immutablelistmultidict(
     *iterable*. The iteration order of the items will be ordered first by key, then by the order of
     the appearance of that value's association with the key on *iterable*.
 
+    If *intern* is ``True``, then if an equal ``ImmutableListMultiDict`` with the same iteration
+    order was previously created with *intern*, that multidict will be returned instead of a new
+    one (see ``intern_statistics``).
+
     If *iterable* is already an ``ImmutableListMultiDict``, *iterable* itself will be returned.
     """
     # immutablelistmultidict() should return an empty collection
@@ -80,21 +173,64 @@ def immutablelistmultidict(
         # key and value types don't matter on an empty collection
         return _EMPTY_IMMUTABLE_LIST_MULTIDICT
 
+    if intern:
+        return intern_collection(immutablelistmultidict(iterable))
+
     if isinstance(iterable, ImmutableListMultiDict):
         # if an ImmutableListMultiDict is input, we can safely just return it,
         # since the object can safely be shared
         return iterable
 
-    # TODO: fold the construction logic into here for better efficiency
-    return ImmutableListMultiDict.of(iterable)
+    if isinstance(iterable, Mapping):
+        groups = {key: tuple(values) for (key, values) in iterable.items()}
+        return _list_multidict_from_groups(
+            {key: group for (key, group) in groups.items() if group}
+        )
+
+    # values are grouped by key in a single pass, into lists which become their tuples
+    grouped: Dict[KT, List[VT]] = defaultdict(list)
+    for (key, value) in iterable:
+        grouped[key].append(value)
+    return _list_multidict_from_groups(
+        {key: tuple(group) for (key, group) in grouped.items()}
+    )
+
+
+def _set_multidict_from_groups(
+    groups: Dict[KT, ImmutableSet[VT]]
+) -> "ImmutableSetMultiDict[KT, VT]":
+    """
+    Get a multidict mapping each key of *groups* to its non-empty set of values, taking
+    ownership of *groups*.
+    """
+    if not groups:
+        return _EMPTY_IMMUTABLE_SET_MULTIDICT
+    return _ImmutableDictBackedImmutableSetMultiDict(
+        _immutabledict_from_dict(groups), frozen=True
+    )
+
+
+def _list_multidict_from_groups(
+    groups: Dict[KT, Tuple[VT, ...]]
+) -> "ImmutableListMultiDict[KT, VT]":
+    """
+    Get a multidict mapping each key of *groups* to its non-empty tuple of values, taking
+    ownership of *groups*.
+    """
+    if not groups:
+        return _EMPTY_IMMUTABLE_LIST_MULTIDICT
+    return _ImmutableDictBackedImmutableListMultiDict(
+        _immutabledict_from_dict(groups), frozen=True
+    )
 
 
 class ImmutableMultiDict(ImmutableCollection[KT], Generic[KT, VT], metaclass=ABCMeta):
-    __slots__ = ("_hash",)
+    __slots__ = ("_hash", "_types")
 
     # pylint:disable=assigning-non-slot
     def __init__(self) -> None:
         self._hash: int = None
+        self._types: Optional[VerifiedTypes] = None
 
     def value_groups(self) -> ValuesView[Collection[VT]]:
         """
@@ -119,11 +255,17 @@ class ImmutableMultiDict(ImmutableCollection[KT], Generic[KT, VT], metaclass=ABC
         """
         return key in self.as_dict()
 
-    def keys(self) -> AbstractSet:
+    def keys(self) -> ImmutableSet[KT]:
         """
-        Gets a set-like object containing the keys of this multidict.
+        Gets an ``ImmutableSet`` of the keys of this multidict.
+
+        Where the multidict is backed by an ``ImmutableDict``, as the standard
+        implementations are, this shares its storage instead of copying the keys.
         """
-        return self.as_dict().keys()
+        key_dict = self.as_dict()
+        if isinstance(key_dict, ImmutableDict):
+            return key_dict.key_set()
+        return immutableset(key_dict.keys())
 
     def items(self):
         # inefficient default implementation
@@ -132,7 +274,8 @@ class ImmutableMultiDict(ImmutableCollection[KT], Generic[KT, VT], metaclass=ABC
                 yield (key, val)
 
     def __eq__(self, other) -> bool:
-        if not isinstance(other, type(self)):
+        # multidicts of the same kind are equal whatever their implementing classes
+        if not isinstance(other, self._kind()):
             return False
         if self.keys() != other.keys():
             return False
@@ -143,10 +286,12 @@ class ImmutableMultiDict(ImmutableCollection[KT], Generic[KT, VT], metaclass=ABC
 
     def __hash__(self) -> int:
         if self._hash is None:
-            h = 0
-            for key, value in self.items():
-                h ^= hash((key, value))
-            self._hash = h
+            value_groups = self.value_groups()
+            self._hash = mapping_hash(
+                chain.from_iterable(map(repeat, self.keys(), map(len, value_groups))),
+                chain.from_iterable(value_groups),
+                len(self),
+            )
         return self._hash
 
     @abstractmethod
@@ -155,6 +300,13 @@ class ImmutableMultiDict(ImmutableCollection[KT], Generic[KT, VT], metaclass=ABC
         Get the number of key-value mappings in this multidict.
         """
 
+    @classmethod
+    def _kind(cls) -> type:
+        """
+        Get the class which multidicts equal to this one must be instances of.
+        """
+        return cls
+
     @abstractmethod
     def as_dict(self) -> Mapping[KT, Collection[VT]]:
         """
@@ -177,7 +329,9 @@ class ImmutableMultiDict(ImmutableCollection[KT], Generic[KT, VT], metaclass=ABC
         """
         sink: ImmutableListMultiDict.Builder[VT, KT] = ImmutableListMultiDict.builder()
         self._invert_to(sink)
-        return sink.build()
+        ret = sink.build()
+        ret._record_verified_types(swapped(self._verified_types()))
+        return ret
 
     def invert_to_set_multidict(self) -> "ImmutableSetMultiDict[VT, KT]":
         """
@@ -188,7 +342,148 @@ class ImmutableMultiDict(ImmutableCollection[KT], Generic[KT, VT], metaclass=ABC
         """
         sink: ImmutableSetMultiDict.Builder[VT, KT] = ImmutableSetMultiDict.builder()
         self._invert_to(sink)
-        return sink.build()
+        ret = sink.build()
+        ret._record_verified_types(swapped(self._verified_types()))
+        return ret
+
+    def filter_values(
+        self, predicate: Callable[[VT], bool]
+    ) -> "ImmutableMultiDict[KT, VT]":
+        """
+        Get a multidict with the key-value mappings of this one whose values satisfy
+        *predicate*.
+
+        Keys left with no values are dropped.  If every value satisfies *predicate*, this
+        multidict itself is returned.
+        """
+        ret = self._with_transformed_groups(
+            lambda _, group: _filtered_group(group, predicate)
+        )
+        if ret is not self:
+            ret._record_verified_types(self._verified_types())
+        return ret
+
+    def filter_items(
+        self, predicate: Callable[[KT, VT], bool]
+    ) -> "ImmutableMultiDict[KT, VT]":
+        """
+        Get a multidict with the key-value mappings of this one for which *predicate*,
+        called with the key and the value, returns a true value.
+
+        Keys left with no values are dropped.  If *predicate* returns a true value for
+        every mapping, this multidict itself is returned.
+        """
+        ret = self._with_transformed_groups(
+            lambda key, group: _filtered_group(group, lambda value: predicate(key, value))
+        )
+        if ret is not self:
+            ret._record_verified_types(self._verified_types())
+        return ret
+
+    def map_values(self, function: Callable[[VT], NVT]) -> "ImmutableMultiDict[KT, NVT]":
+        """
+        Get a multidict mapping each key of this one to the results of applying *function*
+        to each of its values.
+
+        If *function* returns each value itself, this multidict itself is returned.
+        """
+        ret: ImmutableMultiDict[KT, NVT] = self._with_transformed_groups(
+            lambda _, group: _mapped_group(group, function)
+        )
+        if ret is not self:
+            ret._record_verified_types((self._verified_types()[0], None))
+        return ret
+
+    def map_keys(self, function: Callable[[KT], NKT]) -> "ImmutableMultiDict[NKT, VT]":
+        """
+        Get a multidict mapping the result of applying *function* to each key of this one
+        to its values.
+
+        If *function* maps several keys to the same new key, that is mapped to all of
+        their values, in order.  If *function* returns each key itself, this multidict
+        itself is returned.
+        """
+        groups = self.as_dict()
+        mapped: Optional[Dict[Any, Iterable[VT]]] = None
+        for (index, (key, group)) in enumerate(_item_pairs(groups)):
+            new_key = function(key)
+            if mapped is None:
+                if new_key is key:
+                    continue
+                # the value groups before the first changed key are copied in bulk
+                mapped = dict(islice(_item_pairs(groups), index))
+            existing = mapped.get(new_key)
+            mapped[new_key] = group if existing is None else [*existing, *group]
+        if mapped is None:
+            return self  # type: ignore
+        ret: ImmutableMultiDict[NKT, VT] = self._from_groups(mapped)
+        ret._record_verified_types((None, self._verified_types()[1]))
+        return ret
+
+    def _with_transformed_groups(
+        self, transform: Callable[[KT, Collection[VT]], Iterable[Any]]
+    ) -> "ImmutableMultiDict[KT, Any]":
+        """
+        Get a multidict mapping each key of this one to the values *transform* returns for
+        it and its value group, or this multidict itself if *transform* returns each group
+        itself.  Keys for which *transform* returns no values are dropped.
+        """
+        groups = self.as_dict()
+        transformed: Optional[Dict[KT, Iterable[Any]]] = None
+        for (index, (key, group)) in enumerate(_item_pairs(groups)):
+            new_group = transform(key, group)
+            if transformed is None:
+                if new_group is group:
+                    continue
+                # the value groups before the first changed one are copied in bulk
+                transformed = dict(islice(_item_pairs(groups), index))
+            if new_group:
+                transformed[key] = new_group
+        return self if transformed is None else self._from_groups(transformed)
+
+    @abstractmethod
+    def _from_groups(
+        self, groups: Mapping[Any, Iterable[Any]]
+    ) -> "ImmutableMultiDict[Any, Any]":
+        """
+        Get a multidict of the same kind as this one, mapping each key of *groups* to its
+        values.
+        """
+
+    def check_types(
+        self: SelfType, key_type: Optional[Type] = None, value_type: Optional[Type] = None
+    ) -> SelfType:
+        """
+        Check that the keys of this multidict are instances of *key_type* and its values
+        instances of *value_type*, raising a ``TypeError`` if not, and return this
+        multidict.
+
+        Either type may be ``None`` to not check it.
+
+        The most specific types a multidict has been checked against are recorded and
+        passed on to the multidicts derived from it by ``filter_keys`` and inversion, so
+        checking any of them against the same types or their supertypes takes constant
+        time.
+        """
+        types = check_item_types(
+            self.items(), self._verified_types(), key_type, value_type  # type: ignore
+        )
+        self._record_verified_types(types)  # type: ignore
+        return self
+
+    def _verified_types(self) -> VerifiedTypes:
+        """
+        Get the most specific types the keys and values of this multidict are known to be
+        instances of.
+        """
+        return self._types or UNVERIFIED
+
+    def _record_verified_types(self, types: VerifiedTypes) -> None:
+        if types != UNVERIFIED:
+            self._types = types
+
+    def _intern_contents(self) -> Iterable[Tuple[KT, VT]]:
+        return self.items()
 
     def _invert_to(self, sink: "ImmutableMultiDict.Builder[VT, KT]") -> None:
         for (k, v) in self.items():
@@ -229,19 +524,39 @@ class ImmutableSetMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
         of its corresponding values it added to the mapping.
         If a sequence of key-value pair tuples is passed, each is added to the mapping.
         """
-        if isinstance(data, ImmutableSetMultiDict):
-            return data
-        elif isinstance(data, Mapping):
-            return ImmutableSetMultiDict.builder().put_all(data).build()  # type: ignore
-        else:
-            return (  # type: ignore
-                ImmutableSetMultiDict.builder().put_all_items(data).build()
-            )
+        return immutablesetmultidict(data)  # type: ignore
 
     @staticmethod
     def empty() -> "ImmutableSetMultiDict[KT, VT]":
         return _SET_EMPTY
 
+    @classmethod
+    def _kind(cls) -> type:
+        return ImmutableSetMultiDict
+
+    @staticmethod
+    def group_by(
+        items: Iterable[VT], key_function: Callable[[VT], KT]
+    ) -> "ImmutableSetMultiDict[KT, VT]":
+        """
+        Get a multidict mapping the result of applying *key_function* to each of *items*
+        to the set of items with that result.
+
+        This is equivalent to ``immutablesetmultidict((key_function(item), item) for item
+        in items)`` but groups the items without making a pair for each.
+        """
+        if not DICT_ITERATION_IS_DETERMINISTIC:
+            return immutablesetmultidict((key_function(item), item) for item in items)
+        grouped: Dict[KT, Dict[VT, None]] = defaultdict(dict)
+        for item in items:
+            grouped[key_function(item)][item] = None
+        return _set_multidict_from_groups(
+            {
+                key: _immutableset_from_dict(group, None)
+                for (key, group) in grouped.items()
+            }
+        )
+
     # we need to repeat all these inherited/abstract methods with specialized type signatures
     # because mypy doesn't support type parameters which are themselves generic (e.g. parameterizing
     # ImmutableMultiDict by a collection type)
@@ -277,6 +592,14 @@ class ImmutableSetMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
     def modified_copy_builder(self) -> "ImmutableSetMultiDict.Builder[KT, VT]":
         return ImmutableSetMultiDict.Builder(source=self)
 
+    def _from_groups(
+        self, groups: Mapping[Any, Iterable[Any]]
+    ) -> "ImmutableSetMultiDict[Any, Any]":
+        if groups:
+            return _ImmutableDictBackedImmutableSetMultiDict(groups)
+        else:
+            return _EMPTY_IMMUTABLE_SET_MULTIDICT
+
     def filter_keys(
         self, predicate: Callable[[KT], bool]
     ) -> "ImmutableSetMultiDict[KT, VT]":
@@ -298,7 +621,9 @@ class ImmutableSetMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
             for key in retained_keys:
                 for val in self[key]:
                     ret.put(key, val)
-            return ret.build()
+            built = ret.build()
+            built._record_verified_types(self._verified_types())
+            return built
 
     def __repr__(self):
         return "i" + str(self)
@@ -321,31 +646,37 @@ class ImmutableSetMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
             source: Optional["ImmutableMultiDict[KT2,VT2]"] = None,
             order_key: Callable[[VT2], Any] = None,
         ) -> None:
-            self._dict: MutableMapping[KT2, ImmutableSet.Builder[VT2]] = defaultdict(
-                lambda: ImmutableSet.builder(order_key=order_key)
-            )
+            # value groups copied from the source stay ImmutableSets until values are
+            # added to them
+            self._dict: Dict[
+                KT2, Union[ImmutableSet[VT2], ImmutableSet.Builder[VT2]]
+            ] = {}
+            self._order_key = order_key
             self._source = source
-            self._dirty = False
 
         def put(self: SelfType, key: KT2, value: VT2) -> SelfType:
-            if self._source:
+            if self._source is not None:
                 # we only lazily copy the contents of source because if no changes are ever made
                 # we can just reuse it
-                # we need the temporary variable because the call to put_all below will
-                # call this put method again and we need self.source to be None to avoid an
-                # infinite loop
                 tmp_source = self._source
                 # Defend against multithreading scenario where another thread has cleared
                 # self.source already. Not that this code is meant to be thread-safe anyway,
                 # but at least you won't get non-deterministic crashes
                 if tmp_source is not None:
                     self._source = None
-                    for k in tmp_source.keys():
-                        for v in tmp_source[k]:
-                            self.put(k, v)
-
-            self._dict[key].add(value)
-            self._dirty = True
+                    # only the mapping to the value groups is copied, in bulk
+                    self._dict = dict(_native_items(tmp_source.as_dict()))
+
+            group = self._dict.get(key)
+            if group is None:
+                group = ImmutableSet.builder(order_key=self._order_key)
+                self._dict[key] = group
+            elif isinstance(group, ImmutableSet):
+                if value in group:
+                    return self
+                group = group.modified_copy_builder()
+                self._dict[key] = group
+            group.add(value)
             return self
 
         def put_all(self: SelfType, data: Mapping[KT2, Iterable[VT2]]) -> SelfType:
@@ -363,25 +694,26 @@ class ImmutableSetMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
             return self
 
         def build(self) -> "ImmutableSetMultiDict[KT2, VT2]":
-            if self._dirty or self._source is None:
-                result: ImmutableSetMultiDict[
-                    KT2, VT2
-                ] = _ImmutableDictBackedImmutableSetMultiDict(
-                    {k: v.build() for (k, v) in self._dict.items()}  # type: ignore
-                )
+            if self._source is None:
                 # item type doesn't matter on empty collections
-                return (
-                    result if result else _EMPTY_IMMUTABLE_SET_MULTIDICT
-                )  # type: ignore
+                return _set_multidict_from_groups(
+                    {
+                        k: v if isinstance(v, ImmutableSet) else v.build()
+                        for (k, v) in self._dict.items()
+                    }  # type: ignore
+                )
             else:
                 # noinspection PyTypeChecker
                 return self._source  # type: ignore
 
 
 def _freeze_set_multidict(x: Mapping[KT, Iterable[VT]]) -> Mapping[KT, ImmutableSet[VT]]:
-    for (_, v) in x.items():
-        _check_isinstance(v, Iterable)
-    return immutabledict(((k, immutableset(v)) for (k, v) in x.items()))
+    frozen = dict(_native_items(x))
+    for (k, v) in frozen.items():
+        # groups which are already sets are kept as they are
+        if not isinstance(v, ImmutableSet):
+            frozen[k] = immutableset(_check_isinstance(v, Iterable))
+    return _immutabledict_from_dict(frozen)
 
 
 class _ImmutableDictBackedImmutableSetMultiDict(ImmutableSetMultiDict[KT, VT]):
@@ -389,10 +721,18 @@ class _ImmutableDictBackedImmutableSetMultiDict(ImmutableSetMultiDict[KT, VT]):
 
     # pylint:disable=assigning-non-slot
     def __init__(
-        self, init_dict: Mapping[KT, ImmutableSet[VT]], init_len: Optional[int] = None
+        self,
+        init_dict: Mapping[KT, ImmutableSet[VT]],
+        init_len: Optional[int] = None,
+        *,
+        frozen: bool = False,
     ) -> None:
+        """
+        If *frozen* is true, *init_dict* must be an ``ImmutableDict`` whose values are
+        ``ImmutableSet``s, and it is used directly.
+        """
         super(_ImmutableDictBackedImmutableSetMultiDict, self).__init__()
-        self._dict = _freeze_set_multidict(init_dict)
+        self._dict = init_dict if frozen else _freeze_set_multidict(init_dict)
         # The length (total number of key-value mappings) is cached
         # to avoid unnecessary length calls to immutable (unchanging) value groups.
         self._len = init_len
@@ -436,19 +776,34 @@ class ImmutableListMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
     def of(
         data: Union[Mapping[KT, Iterable[VT]], Iterable[IT]]
     ) -> "ImmutableListMultiDict[KT, VT]":
-        if isinstance(data, ImmutableListMultiDict):
-            return data
-        elif isinstance(data, Mapping):
-            return ImmutableListMultiDict.builder().put_all(data).build()  # type: ignore
-        else:
-            return (  # type: ignore
-                ImmutableListMultiDict.builder().put_all_items(data).build()
-            )
+        return immutablelistmultidict(data)  # type: ignore
 
     @staticmethod
     def empty() -> "ImmutableListMultiDict[KT, VT]":
         return _EMPTY_IMMUTABLE_LIST_MULTIDICT  # type: ignore
 
+    @classmethod
+    def _kind(cls) -> type:
+        return ImmutableListMultiDict
+
+    @staticmethod
+    def group_by(
+        items: Iterable[VT], key_function: Callable[[VT], KT]
+    ) -> "ImmutableListMultiDict[KT, VT]":
+        """
+        Get a multidict mapping the result of applying *key_function* to each of *items*
+        to the items with that result, in order.
+
+        This is equivalent to ``immutablelistmultidict((key_function(item), item) for item
+        in items)`` but groups the items without making a pair for each.
+        """
+        grouped: Dict[KT, List[VT]] = defaultdict(list)
+        for item in items:
+            grouped[key_function(item)].append(item)
+        return _list_multidict_from_groups(
+            {key: tuple(group) for (key, group) in grouped.items()}
+        )
+
     @staticmethod
     def builder() -> "ImmutableListMultiDict.Builder[KT, VT]":
         return ImmutableListMultiDict.Builder()
@@ -482,6 +837,14 @@ class ImmutableListMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
     def modified_copy_builder(self) -> "ImmutableListMultiDict.Builder[KT, VT]":
         return ImmutableListMultiDict.Builder(source=self)
 
+    def _from_groups(
+        self, groups: Mapping[Any, Iterable[Any]]
+    ) -> "ImmutableListMultiDict[Any, Any]":
+        if groups:
+            return _ImmutableDictBackedImmutableListMultiDict(groups)
+        else:
+            return _EMPTY_IMMUTABLE_LIST_MULTIDICT
+
     def filter_keys(
         self, predicate: Callable[[KT], bool]
     ) -> "ImmutableListMultiDict[KT, VT]":
@@ -503,7 +866,9 @@ class ImmutableListMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
             for key in retained_keys:
                 for val in self[key]:
                     ret.put(key, val)
-            return ret.build()
+            built = ret.build()
+            built._record_verified_types(self._verified_types())
+            return built
 
     def __repr__(self):
         return "i" + str(self)
@@ -523,29 +888,31 @@ class ImmutableListMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
         def __init__(
             self, *, source: Optional["ImmutableMultiDict[KT2,VT2]"] = None
         ) -> None:
-            self._dict: MutableMapping[KT2, List[VT2]] = defaultdict(list)
+            # value groups copied from the source stay tuples until values are added to
+            # them
+            self._dict: Dict[KT2, Union[Tuple[VT2, ...], List[VT2]]] = {}
             self._source = source
-            self._dirty = False
 
         def put(self: SelfType, key: KT2, value: VT2) -> SelfType:
-            if self._source:
+            if self._source is not None:
                 # we only lazily copy the contents of source because if no changes are ever made
                 # we can just reuse it
-                # we need the temporary variable because the call to put_all below will
-                # call this put method again and we need self.source to be None to avoid an
-                # infinite loop
                 tmp_source = self._source
                 # Defend against multithreading scenario where another thread has cleared
                 # self.source already. Not that this code is meant to be thread-safe anyway,
                 # but at least you won't get non-deterministic crashes
                 if tmp_source is not None:
                     self._source = None
-                    for k in tmp_source.keys():
-                        for v in tmp_source[k]:
-                            self.put(k, v)
-
-            self._dict[key].append(value)
-            self._dirty = True
+                    # only the mapping to the value groups is copied, in bulk
+                    self._dict = dict(_native_items(tmp_source.as_dict()))
+
+            group = self._dict.get(key)
+            if group is None:
+                self._dict[key] = [value]
+            elif isinstance(group, list):
+                group.append(value)
+            else:
+                self._dict[key] = [*group, value]
             return self
 
         def put_all(self: SelfType, dict_: Mapping[KT2, Iterable[VT2]]) -> SelfType:
@@ -563,7 +930,7 @@ class ImmutableListMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
             return self
 
         def build(self) -> "ImmutableListMultiDict[KT2, VT2]":
-            if self._dirty or self._source is None:
+            if self._source is None:
                 result: ImmutableListMultiDict[
                     KT2, VT2
                 ] = _ImmutableDictBackedImmutableListMultiDict(
@@ -578,9 +945,12 @@ class ImmutableListMultiDict(ImmutableMultiDict[KT, VT], metaclass=ABCMeta):
 
 
 def _freeze_list_multidict(x: Mapping[KT, Iterable[VT]]) -> Mapping[KT, Tuple[VT, ...]]:
-    for (_, v) in x.items():
-        _check_isinstance(v, Iterable)
-    return immutabledict(((k, tuple(v)) for (k, v) in x.items()))
+    frozen = dict(_native_items(x))
+    for (k, v) in frozen.items():
+        # groups which are already tuples are kept as they are
+        if type(v) is not tuple:  # pylint:disable=unidiomatic-typecheck
+            frozen[k] = tuple(_check_isinstance(v, Iterable))
+    return _immutabledict_from_dict(frozen)
 
 
 class _ImmutableDictBackedImmutableListMultiDict(ImmutableListMultiDict[KT, VT]):
@@ -588,10 +958,18 @@ class _ImmutableDictBackedImmutableListMultiDict(ImmutableListMultiDict[KT, VT])
 
     # pylint:disable=assigning-non-slot
     def __init__(
-        self, init_dict: Mapping[KT, Tuple[VT, ...]], init_len: Optional[int] = None
+        self,
+        init_dict: Mapping[KT, Tuple[VT, ...]],
+        init_len: Optional[int] = None,
+        *,
+        frozen: bool = False,
     ) -> None:
+        """
+        If *frozen* is true, *init_dict* must be an ``ImmutableDict`` whose values are
+        tuples, and it is used directly.
+        """
         super(_ImmutableDictBackedImmutableListMultiDict, self).__init__()
-        self._dict = _freeze_list_multidict(init_dict)
+        self._dict = init_dict if frozen else _freeze_list_multidict(init_dict)
         self._len = init_len
 
     def as_dict(self) -> Mapping[KT, Tuple[VT, ...]]:
@@ -620,6 +998,267 @@ _EMPTY_IMMUTABLE_LIST_MULTIDICT = _ImmutableDictBackedImmutableListMultiDict(  #
 )
 
 
+def _compact_storage(
+    groups: Mapping[KT, Collection[VT]]
+) -> Tuple[ImmutableDict[KT, int], "array[int]", Tuple[VT, ...]]:
+    """
+    Get the key index, row offsets and values of a compact multidict mapping each key of
+    *groups* to the values in its group.
+    """
+    index = _immutabledict_from_dict(dict(zip(groups, range(len(groups)))))
+    offsets = array("q", [0])
+    offsets.extend(accumulate(map(len, groups.values())))
+    return (index, offsets, tuple(chain.from_iterable(groups.values())))
+
+
+def _compact_set_multidict(
+    groups: Mapping[KT, Collection[VT]]
+) -> "ImmutableSetMultiDict[KT, VT]":
+    """
+    Get a compact multidict mapping each key of *groups* to the values in its group,
+    which must be distinct and non-empty.
+    """
+    if not groups:
+        return _EMPTY_IMMUTABLE_SET_MULTIDICT
+    return _CompactImmutableSetMultiDict(*_compact_storage(groups))
+
+
+def _compact_immutablesetmultidict(
+    items: Iterable[Tuple[KT, VT]]
+) -> "ImmutableSetMultiDict[KT, VT]":
+    # module-level so that compact multidicts can be pickled
+    return immutablesetmultidict(items, compact=True)
+
+
+class _CompactImmutableMultiDict(ImmutableMultiDict[KT, VT]):
+    """
+    Storage of the multidicts made by ``immutablesetmultidict`` with ``compact=True``.
+
+    Rather than a collection of values for each key, all the values are kept in a single
+    tuple, grouped by key.  The values of the key in row *i* of the ``ImmutableDict``
+    indexing the keys are those from ``offsets[i]`` up to ``offsets[i + 1]``, where
+    *offsets* is an array of machine integers.  So beyond its values, a multidict takes
+    only its key index and eight bytes per key.
+    """
+
+    __slots__ = ("_index", "_offsets", "_values")
+
+    # pylint:disable=assigning-non-slot
+    def __init__(
+        self, index: ImmutableDict[KT, int], offsets: "array[int]", values: Tuple[VT, ...]
+    ) -> None:
+        super().__init__()
+        self._index = index
+        self._offsets = offsets
+        self._values = values
+
+    def _positions(self, row: int) -> range:
+        """
+        Get the positions of the values of the key in *row*.
+        """
+        return range(self._offsets[row], self._offsets[row + 1])
+
+    def _group_lengths(self) -> Iterator[int]:
+        return map(sub, islice(self._offsets, 1, None), self._offsets)
+
+    def keys(self) -> ImmutableSet[KT]:
+        return self._index.key_set()
+
+    def __iter__(self) -> Iterator[KT]:
+        return self._index.__iter__()
+
+    def __contains__(self, key: Any) -> bool:
+        return self._index.__contains__(key)
+
+    def __len__(self) -> int:
+        return self._values.__len__()
+
+    def items(self):
+        return zip(
+            chain.from_iterable(map(repeat, self._index, self._group_lengths())),
+            self._values,
+        )
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = mapping_hash(
+                chain.from_iterable(map(repeat, self._index, self._group_lengths())),
+                self._values,
+                len(self._values),
+            )
+        return self._hash
+
+
+class _CompactGroups(Mapping[KT, Collection[VT]]):
+    """
+    A read-only view of a compact multidict as a mapping from its keys to their values.
+    """
+
+    __slots__ = ("_multidict",)
+
+    # pylint:disable=assigning-non-slot
+    def __init__(self, multidict: _CompactImmutableMultiDict[KT, VT]) -> None:
+        self._multidict = multidict
+
+    def __getitem__(self, key: KT) -> Collection[VT]:
+        if key not in self._multidict:
+            raise KeyError(key)
+        return self._multidict[key]
+
+    def __iter__(self) -> Iterator[KT]:
+        return self._multidict.__iter__()
+
+    def __len__(self) -> int:
+        return self._multidict._index.__len__()  # pylint:disable=protected-access
+
+    def __contains__(self, key: Any) -> bool:
+        return self._multidict.__contains__(key)
+
+
+class _CompactValueGroup(_ImmutableSetSlice[VT]):
+    """
+    The values of a key of a ``_CompactImmutableSetMultiDict``, which is a view of the
+    positions of those values in its tuple of all values.
+
+    Containment is checked by scanning the values if there are only a few, and otherwise
+    by looking them up in the multidict's index of the positions of its values.
+    """
+
+    __slots__ = ("_owner",)
+
+    # pylint:disable=assigning-non-slot,super-init-not-called
+    def __init__(
+        self, owner: "_CompactImmutableSetMultiDict[Any, VT]", positions: range
+    ) -> None:
+        self._owner = owner
+        # this is a slice of the values of the multidict rather than of another set
+        self._parent = None
+        self._elements = _SequenceSlice(
+            owner._values, positions  # pylint:disable=protected-access
+        )
+        self._hash: Optional[int] = None
+        self._top_level_type = None
+
+    def _position_of(self, value: Any) -> Optional[int]:
+        # pylint:disable=protected-access
+        return self._owner._position_in_group(self._elements._positions, value)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return immutableset(self._elements)[index]
+        return self._elements[index]
+
+
+class _CompactImmutableSetMultiDict(
+    ImmutableSetMultiDict[KT, VT], _CompactImmutableMultiDict[KT, VT]
+):
+    """
+    Looking up one of the values of a key with more than ``_MAX_SMALL_SIZE`` of them
+    uses a single index of the positions of all such values, built the first time it is
+    needed.  It is a hash table keyed on the value together with the position of the
+    first value of its key, which stores just the positions, unboxed, in an array at most
+    half full: 16 to 32 bytes per value.
+    """
+
+    __slots__ = ("_value_positions",)
+
+    # pylint:disable=assigning-non-slot
+    def __init__(
+        self, index: ImmutableDict[KT, int], offsets: "array[int]", values: Tuple[VT, ...]
+    ) -> None:
+        super().__init__(index, offsets, values)
+        self._value_positions: Optional["array[int]"] = None
+
+    def _position_in_group(self, positions: range, value: Any) -> Optional[int]:
+        """
+        Get the position of *value* among the values at *positions*, or ``None`` if it is
+        not one of them.
+        """
+        if len(positions) <= _MAX_SMALL_SIZE:
+            group = self._values[positions.start : positions.stop]
+            return group.index(value) if value in group else None
+        table = self._value_positions
+        if table is None:
+            with materialization_lock(self):
+                # another thread may have built this while we waited for the lock
+                table = self._value_positions
+                if table is None:
+                    table = self._build_value_positions()
+                    self._value_positions = table
+        mask = len(table) - 1
+        slot = hash((positions.start, value)) & mask
+        # empty slots hold zero, so positions are stored plus one
+        stored = table[slot]
+        while stored:
+            position = stored - 1
+            if position in positions and self._values[position] == value:
+                return position - positions.start
+            slot = (slot + 1) & mask
+            stored = table[slot]
+        return None
+
+    def _build_value_positions(self) -> "array[int]":
+        large_groups = [
+            positions
+            for positions in map(self._positions, range(len(self._index)))
+            if len(positions) > _MAX_SMALL_SIZE
+        ]
+        # a power of two at least twice the number of values, so probes stay short
+        size = 1 << (2 * sum(map(len, large_groups))).bit_length()
+        table = array("q", bytes(8 * size))
+        mask = size - 1
+        values = self._values
+        for positions in large_groups:
+            for position in positions:
+                slot = hash((positions.start, values[position])) & mask
+                while table[slot]:
+                    slot = (slot + 1) & mask
+                table[slot] = position + 1
+        return table
+
+    def __getitem__(self, k: KT) -> ImmutableSet[VT]:
+        row = self._index.get(k)
+        if row is None:
+            return immutableset()
+        return _CompactValueGroup(self, self._positions(row))
+
+    def as_dict(self) -> Mapping[KT, ImmutableSet[VT]]:
+        return _CompactGroups(self)
+
+    def _from_groups(
+        self, groups: Mapping[Any, Iterable[Any]]
+    ) -> "ImmutableSetMultiDict[Any, Any]":
+        # groups merged by map_keys may share values
+        return _compact_set_multidict(
+            {key: dict.fromkeys(group) for (key, group) in groups.items()}
+        )
+
+    def __reduce__(self):
+        return (_compact_immutablesetmultidict, (tuple(self.items()),))
+
+
+def _filtered_group(group: Collection[VT], keep: Callable[[VT], bool]) -> Iterable[VT]:
+    """
+    Get the values of *group* which satisfy *keep*, or *group* itself if they all do.
+    """
+    for (index, value) in enumerate(group):
+        if not keep(value):
+            return [
+                *islice(group, index),
+                *(x for x in islice(group, index + 1, None) if keep(x)),
+            ]
+    return group
+
+
+def _mapped_group(group: Collection[VT], function: Callable[[VT], Any]) -> Iterable[Any]:
+    """
+    Get the results of applying *function* to the values of *group*, or *group* itself if
+    they are the values themselves.
+    """
+    mapped = tuple(map(function, group))
+    return group if all(map(is_, mapped, group)) else mapped
+
+
 # copied from VistaUtils' preconditions.py to avoid dependency loop
 _T = TypeVar("_T")
 _ClassInfo = Union[type, Tuple[Union[type, Tuple], ...]]  # pylint:disable=invalid-name
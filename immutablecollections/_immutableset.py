@@ -1,17 +1,25 @@
 from abc import ABCMeta, abstractmethod
-from itertools import chain, islice
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import partial
+from itertools import chain, count, filterfalse, islice, repeat
+from operator import eq
 from typing import (
     AbstractSet,
     Any,
     Callable,
+    Collection,
     Container,
+    Dict,
     FrozenSet,
     Generic,
+    Hashable,
     ItemsView,
     Iterable,
     Iterator,
     KeysView,
     List,
+    Mapping,
     MutableSet,
     Optional,
     Sequence,
@@ -25,6 +33,10 @@ from typing import (
 )
 
 from immutablecollections import immutablecollection
+from immutablecollections._hamt import PersistentOrderedMap
+from immutablecollections._hashing import derived_set_hash
+from immutablecollections._interning import intern_collection
+from immutablecollections._lazy import materialization_lock
 from immutablecollections._utils import DICT_ITERATION_IS_DETERMINISTIC
 
 T = TypeVar("T")
@@ -40,6 +52,9 @@ def immutableset(
     *,
     disable_order_check: bool = False,
     forbid_duplicate_elements: bool = False,
+    precompute_index: bool = False,
+    element_type: Optional[Type[T]] = None,
+    intern: bool = False,
 ) -> "ImmutableSet[T]":
     """
     Create an immutable set with the given contents.
@@ -56,17 +71,52 @@ def immutableset(
     If *forbid_duplicate_elements* is ``True`` and one item occurs twice in *iterable*, then
     a ``ValueError`` will be thrown.
 
+    If *precompute_index* is ``True``, the map from elements to positions used by
+    ``ImmutableSet.index`` is built up front instead of on the first ``index`` call.
+
+    If *element_type* is ``int``, the elements must all be ints and will be stored
+    unboxed as 64-bit machine integers, which takes much less memory.  No other values of
+    *element_type* are currently supported.  Sets created from a ``range`` are always stored
+    as just that ``range``.
+
+    If *intern* is ``True``, then if an equal ``ImmutableSet`` with the same iteration order
+    was previously created with *intern*, that set will be returned instead of a new one
+    (see ``intern_statistics``).
+
     If *iterable* is already an ``ImmutableSet``, *iterable* itself will be returned.
     """
     # immutableset() should return an empty set
     if iterable is None:
         return _EMPTY
 
+    if intern:
+        ret = intern_collection(
+            immutableset(
+                iterable,
+                disable_order_check=disable_order_check,
+                forbid_duplicate_elements=forbid_duplicate_elements,
+                element_type=element_type,
+            )
+        )
+        if precompute_index:
+            ret._position_index()  # pylint:disable=protected-access
+        return ret
+
     if isinstance(iterable, ImmutableSet):
         # if an ImmutableSet is input, we can safely just return it,
         # since the object can safely be shared
+        if precompute_index:
+            iterable._position_index()  # pylint:disable=protected-access
         return iterable
 
+    if element_type is not None and element_type is not int:
+        raise ValueError(
+            f"The only supported element_type for immutableset is int but got {element_type}"
+        )
+
+    if isinstance(iterable, range):
+        return _immutableset_from_range(iterable)
+
     if not disable_order_check:
         if not DICT_ITERATION_IS_DETERMINISTIC:
             # See https://github.com/isi-vista/immutablecollections/pull/36
@@ -95,11 +145,41 @@ def immutableset(
             )
 
     if forbid_duplicate_elements:
-        # We check for duplicate elements by comparing the original iterable length with the output
-        # set length. Some iterables don't provide a __len__ or are consumed by iteration, so we
-        # listify the iterable to be safe.
-        iterable = list(iterable)
-        original_length = len(iterable)  # must be recorded here for mypy to be happy
+        if isinstance(iterable, (AbstractSet, Mapping)):
+            # the elements of sets and the keys of mappings can't repeat
+            forbid_duplicate_elements = False
+        else:
+            # We check for duplicate elements by comparing the original iterable length
+            # with the output set length, and only look for which elements were duplicated
+            # if they differ. Iterables other than sequences might not provide a __len__
+            # or might be consumed by iteration, so we listify them to be safe.
+            if not isinstance(iterable, Sequence):
+                iterable = list(iterable)
+            original_length = len(iterable)  # must be recorded here for mypy to be happy
+
+    if DICT_ITERATION_IS_DETERMINISTIC:
+        # dict.fromkeys does an order-preserving de-duplication at C speed, and the resulting
+        # dict is exactly the storage _DictBackedImmutableSet wants, so no further copy is needed
+        elements: Dict[T, None] = dict.fromkeys(iterable)
+        if forbid_duplicate_elements and len(elements) != original_length:
+            _raise_duplicate_elements(iterable)  # type: ignore
+        if element_type is int:
+            if set(map(type, elements)) == {int}:
+                try:
+                    return _immutableset_from_int_array(
+                        array("q", elements)  # type: ignore
+                    )
+                except OverflowError:
+                    # some elements don't fit in a machine integer, so fall back to the
+                    # general case
+                    pass
+            else:
+                # an array would turn bools and other subclasses of int into plain ints
+                _check_all_isinstance(elements, int)
+        ret = _immutableset_from_dict(elements, element_type)
+        if precompute_index:
+            ret._position_index()  # pylint:disable=protected-access
+        return ret
 
     iteration_order = []
     containment_set: MutableSet[T] = set()
@@ -109,28 +189,51 @@ def immutableset(
             iteration_order.append(value)
 
     if forbid_duplicate_elements and len(containment_set) != original_length:
-        seen_once: Set[T] = set()
-        seen_twice: Set[T] = set()
-        for item in iterable:
-            if item not in seen_once:
-                seen_once.add(item)
-            else:
-                seen_twice.add(item)
-        # seen_twice is guaranteed to be nonempty
-        raise ValueError(
-            "forbid_duplicate_elements=True, but some elements "
-            f"occur multiple times in input: {seen_twice}"
-        )
+        _raise_duplicate_elements(iterable)  # type: ignore
+
+    if element_type is int:
+        _check_all_isinstance(iteration_order, int)
 
     if iteration_order:
         if len(iteration_order) == 1:
-            return _SingletonImmutableSet(iteration_order[0], None)
+            return _SingletonImmutableSet(iteration_order[0], element_type)
+        elif len(iteration_order) <= _MAX_SMALL_SIZE:
+            return _SmallImmutableSet(tuple(iteration_order), element_type)
         else:
-            return _FrozenSetBackedImmutableSet(containment_set, iteration_order, None)
+            ret = _FrozenSetBackedImmutableSet(
+                containment_set, iteration_order, element_type
+            )
+            if precompute_index:
+                ret._position_index()
+            return ret
     else:
         return _EMPTY
 
 
+# Sets with at most this many elements are stored as just a tuple
+_MAX_SMALL_SIZE = 8
+
+# Deriving a set's hash from another's is slower per changed element than computing it from
+# scratch is per element, so only do it eagerly if the derived set has at least this many
+# elements per changed element.
+_INCREMENTAL_HASH_MIN_SIZE_RATIO = 8
+
+
+def _raise_duplicate_elements(items: Iterable[T]) -> None:
+    seen_once: Set[T] = set()
+    seen_twice: Set[T] = set()
+    for item in items:
+        if item not in seen_once:
+            seen_once.add(item)
+        else:
+            seen_twice.add(item)
+    # seen_twice is guaranteed to be nonempty
+    raise ValueError(
+        "forbid_duplicate_elements=True, but some elements "
+        f"occur multiple times in input: {seen_twice}"
+    )
+
+
 def immutableset_from_unique_elements(
     iterable: Optional[Iterable[T]] = None, *, disable_order_check: bool = False
 ):
@@ -143,6 +246,67 @@ def immutableset_from_unique_elements(
     )
 
 
+def immutableset_lazy(
+    iterable: Optional[Iterable[T]] = None,
+    *,
+    disable_order_check: bool = False,
+    forbid_duplicate_elements: bool = False,
+    precompute_index: bool = False,
+    element_type: Optional[Type[T]] = None,
+    intern: bool = False,
+) -> "ImmutableSet[T]":
+    """
+    Create an immutable set with the given contents, but only once it is needed.
+
+    Rather than consuming *iterable* right away, it is kept until the set is first used
+    (for example, by iterating over it, checking what it contains, or taking its length or
+    hash) and then passed to ``immutableset`` along with the other arguments, which have
+    the same meaning as there.  This happens only once, even if the set is shared between
+    threads.  Any error ``immutableset`` would raise is instead raised by that first use.
+
+    This saves the cost of building sets (e.g. from generator expressions) which may never
+    be used.  Until then, the set takes no more memory than a small object referring to
+    *iterable*.
+
+    If *iterable* is already an ``ImmutableSet``, *iterable* itself will be returned.
+    """
+    if iterable is None:
+        return _EMPTY
+    if isinstance(iterable, ImmutableSet) and not (precompute_index or intern):
+        return iterable
+    options = dict(
+        disable_order_check=disable_order_check,
+        forbid_duplicate_elements=forbid_duplicate_elements,
+        precompute_index=precompute_index,
+        element_type=element_type,
+        intern=intern,
+    )
+    # most lazy sets use the default options, so don't spend memory on them
+    return _LazyImmutableSet(iterable, options if any(options.values()) else None)
+
+
+def immutablesortedset(
+    iterable: Optional[Iterable[T]] = None, *, key: Optional[Callable[[T], Any]] = None
+) -> "ImmutableSortedSet[T]":
+    """
+    Create an immutable set with the given contents whose iteration order is sorted.
+
+    Elements are ordered by *key* if it is provided, and otherwise by their natural ordering.
+    Elements with equal keys are ordered as they appear in *iterable*.
+
+    Because the result is sorted, *iterable* may be a (non-``ImmutableSet``) set.
+
+    If *iterable* is already an ``ImmutableSortedSet`` with the same *key*, *iterable* itself
+    will be returned.
+    """
+    if iterable is None:
+        return _immutablesortedset_from_sorted((), key, None)
+    # pylint:disable=protected-access
+    if isinstance(iterable, ImmutableSortedSet) and iterable._key is key:
+        return iterable
+    return _immutablesortedset_from_sorted(sorted(iterable, key=key), key, None)
+
+
 # typing.AbstractSet matches collections.abc.Set
 class ImmutableSet(  # pylint: disable=duplicate-bases
     Generic[T],
@@ -171,8 +335,8 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
     typing.Set, as that matches the built-in mutable set type.
     """
 
-    # note to implementers: if a new implementing class is created besides the frozen set one,
-    # we need to change how the equals method works
+    # note to implementers: each implementing class provides its own __eq__ and __hash__, which
+    # must agree with those of frozenset and of the other implementing classes
 
     # Signature of the of method varies by collection
     # pylint: disable = arguments-differ
@@ -185,16 +349,9 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
         """
         Deprecated - prefer ``immutableset`` module-level factory method.
         """
-        # pylint:disable=protected-access
         if isinstance(seq, ImmutableSet):
             if check_top_type_matches:
-                # we assume each sub-class provides _top_level_type
-                if seq._top_level_type:  # type: ignore
-                    _check_issubclass(
-                        seq._top_level_type, check_top_type_matches  # type: ignore
-                    )  # type: ignore
-                else:
-                    _check_all_isinstance(seq, check_top_type_matches)
+                _check_element_type(seq, check_top_type_matches)
             return seq
         else:
             return (
@@ -213,6 +370,90 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
         """
         return _EMPTY
 
+    @staticmethod
+    def union_all(sets: Iterable[Iterable[T]]) -> "ImmutableSet[T]":
+        """
+        Get the union of all of *sets*.
+
+        This is equivalent to folding `union` over *sets* (so the iteration order is that of the
+        first set, followed by the new elements of each later set in turn), but the result is
+        built in a single pass without creating any intermediate sets.
+        """
+        non_empty = [x for x in sets if not isinstance(x, AbstractSet) or x]
+        if not non_empty:
+            return _EMPTY
+        first = non_empty[0]
+        if len(non_empty) == 1 and isinstance(first, ImmutableSet):
+            return first
+        ret = immutableset(chain.from_iterable(non_empty))
+        if isinstance(first, ImmutableSet) and len(ret) == len(first):
+            return first
+        return ret
+
+    @staticmethod
+    def intersection_all(sets: Iterable[Iterable[T]]) -> "ImmutableSet[T]":
+        """
+        Get the intersection of all of *sets*.
+
+        The iteration order is that of the first set. If *sets* is empty, so is the result.
+
+        This is equivalent to folding `intersection` over *sets*, but the common elements are
+        found at C speed starting from the smallest input and the only set created in
+        *sets*' iteration order is the result.  Inputs which are not ImmutableSets or
+        built-in sets are first converted to ImmutableSets.
+        """
+        as_sets = [
+            x if isinstance(x, (ImmutableSet, set, frozenset)) else immutableset(x)
+            for x in sets
+        ]
+        if not as_sets or not all(as_sets):
+            return _EMPTY
+        first = as_sets[0]
+        natives = sorted((_native_set(x) for x in as_sets), key=len)
+        # pylint:disable=protected-access
+        top_level_type = (
+            first._top_level_type if isinstance(first, ImmutableSet) else None
+        )
+        common = set(natives[0]).intersection(*natives[1:])
+        if len(common) == len(first) and isinstance(first, ImmutableSet):
+            return first
+        return _immutableset_from_distinct(
+            filter(common.__contains__, first), top_level_type
+        )
+
+    @staticmethod
+    def difference_all(sets: Iterable[Iterable[T]]) -> "ImmutableSet[T]":
+        """
+        Get the elements of the first of *sets* which are not in any of the others.
+
+        The iteration order is that of the first set. If *sets* is empty, so is the result.
+
+        This is equivalent to folding `difference` over *sets*, but the result is built in a
+        single pass over the first set without creating any intermediate sets. Inputs which
+        are not ImmutableSets or built-in sets are first converted to ImmutableSets.
+        """
+        as_sets = [
+            x if isinstance(x, (ImmutableSet, set, frozenset)) else immutableset(x)
+            for x in sets
+        ]
+        if not as_sets or not as_sets[0]:
+            return _EMPTY
+        first = as_sets[0]
+        # pylint:disable=protected-access
+        top_level_type = (
+            first._top_level_type if isinstance(first, ImmutableSet) else None
+        )
+        remaining: Iterable[T] = first
+        for other in as_sets[1:]:
+            if other:
+                remaining = filterfalse(_native_set(other).__contains__, remaining)
+        if remaining is first and isinstance(first, ImmutableSet):
+            return first
+        ret = _immutableset_from_distinct(remaining, top_level_type)
+        if len(ret) == len(first) and isinstance(first, ImmutableSet):
+            return first
+        return ret
+
     def issubset(self, other: Iterable[T]) -> bool:
         """
         This set is a subset of another set if all the elements of this set are
@@ -248,7 +489,13 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
         type.
         """
         if check_top_type_matches:
+            if not isinstance(other, ImmutableSet):
+                # other may be consumed by iteration, but we need to check it before
+                # using it
+                other = tuple(other)
             for (side_name, side) in (("left", self), ("right", other)):
+                if _has_verified_type(side, check_top_type_matches):
+                    continue
                 items_not_matching = [
                     x for x in side if not isinstance(x, check_top_type_matches)
                 ]
@@ -259,16 +506,29 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
                         f"{list(islice(items_not_matching, 10))} "
                         f"on the {side_name}"
                     )
-            return (
-                ImmutableSet.builder(check_top_type_matches)
-                .add_all(self)
-                .add_all(other)
-                .build()
-            )
+                _record_verified_type(side, check_top_type_matches)
+            ret = self.union(other)
+            # every element of both sides has been checked
+            _record_verified_type(ret, check_top_type_matches)
+            return ret
         else:
+            native_other = _native_set(other)
+            if native_other is not None:
+                # avoid copying when we know the answer up front
+                if not native_other:
+                    return self
+                if not self and isinstance(other, ImmutableSet):
+                    return other
+                if native_other <= self._native_set():
+                    return self
             # When we don't need to do check_top_type_matches,
             # we can use the more efficient factory method.
-            return immutableset(chain(self, other))
+            ret = immutableset(chain(self, other))
+            # the elements of other which are new come after all of ours
+            self._derive_hash(
+                ret, len(ret) - len(self), lambda: islice(ret, len(self), None)
+            )
+            return ret
 
     # we deliberately tighten the type bounds from our parent
     def __or__(self, other: AbstractSet[T]) -> "ImmutableSet[T]":  # type: ignore
@@ -288,12 +548,24 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
         should have already been in this set, so you can type check this set itself if you are
         concerned.
         """
-        return (
-            ImmutableSet.builder(
-                check_top_type_matches=self._top_level_type  # type: ignore
-            )
-            .add_all(x for x in self if x in other)
-            .build()
+        native_other = _native_set(other)
+        if native_other is not None:
+            if not self or not native_other:
+                return _EMPTY
+            # These C-level checks usually exit early, so they are cheap even when they fail
+            native_self = self._native_set()
+            if native_self <= native_other:
+                return self
+            elif native_self.isdisjoint(native_other):
+                return _EMPTY
+            else:
+                return _immutableset_from_distinct(
+                    filter(native_other.__contains__, self),
+                    self._top_level_type,  # type: ignore
+                )
+        # the result's elements were already type-checked as elements of this set
+        return _immutableset_from_distinct(
+            (x for x in self if x in other), self._top_level_type  # type: ignore
         )
 
     def __and__(self, other: AbstractSet[Any]) -> "ImmutableSet[T]":
@@ -306,9 +578,28 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
         """
         Gets a new set with all items in this set not in the other.
         """
-        return ImmutableSet.of(
-            (x for x in self if x not in other),
-            check_top_type_matches=self._top_level_type,  # type: ignore
+        native_other = _native_set(other)
+        if native_other is not None:
+            if not self or not native_other:
+                return self
+            native_self = self._native_set()
+            if native_self.isdisjoint(native_other):
+                return self
+            elif native_self <= native_other:
+                return _EMPTY
+            else:
+                ret = _immutableset_from_distinct(
+                    filterfalse(native_other.__contains__, self),
+                    self._top_level_type,  # type: ignore
+                )
+                self._derive_hash(
+                    ret,
+                    len(self) - len(ret),
+                    lambda: filter(native_self.__contains__, native_other),  # type: ignore
+                )
+                return ret
+        return _immutableset_from_distinct(
+            (x for x in self if x not in other), self._top_level_type  # type: ignore
         )
 
     def __sub__(self, other: AbstractSet[Any]) -> "ImmutableSet[T]":
@@ -336,6 +627,58 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
             return self ^ other
         return self ^ immutableset(other)
 
+    def __xor__(self, other: AbstractSet[V]) -> "AbstractSet[Union[T, V]]":  # type: ignore
+        """
+        Get the symmetric difference of this set and another.
+
+        Elements only in this set come first, in this set's iteration order, followed by
+        elements only in `other`, in its iteration order.
+        """
+        native_other = _native_set(other)
+        if native_other is None:
+            return super().__xor__(other)
+        if not native_other:
+            return self
+        if not self and isinstance(other, ImmutableSet):
+            return other
+        native_self = self._native_set()
+        if native_self.isdisjoint(native_other):
+            return self.union(other)
+        return _immutableset_from_distinct(
+            chain(
+                filterfalse(native_other.__contains__, self),
+                filterfalse(native_self.__contains__, other),
+            ),
+            None,
+        )
+
+    def __le__(self, other: AbstractSet[Any]) -> bool:
+        native_other = _native_set(other)
+        if native_other is None:
+            return super().__le__(other)
+        return len(self) <= len(native_other) and self._native_set() <= native_other
+
+    def __ge__(self, other: AbstractSet[Any]) -> bool:
+        native_other = _native_set(other)
+        if native_other is None:
+            return super().__ge__(other)
+        return len(self) >= len(native_other) and self._native_set() >= native_other
+
+    def isdisjoint(self, other: Iterable[Any]) -> bool:
+        native_other = _native_set(other)
+        return self._native_set().isdisjoint(
+            other if native_other is None else native_other
+        )
+
+    def _native_set(self) -> AbstractSet[T]:
+        """
+        Get a built-in set-like object (e.g. a ``frozenset`` or a dict's keys) with the same
+        elements as this set, to allow set operations to run at C speed.
+
+        Implementing classes should return an internal data structure where possible.
+        """
+        return frozenset(self)
+
     def copy(self) -> "ImmutableSet[T]":
         """
         Return this set.
@@ -345,6 +688,117 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
         """
         return self
 
+    def with_added(self, item: T) -> "ImmutableSet[T]":
+        """
+        Get a set with the elements of this set followed by *item*.
+
+        If *item* is already in this set, this set itself is returned.
+
+        The returned set is backed by a persistent hash trie which shares structure with the
+        set it was derived from, so each further ``with_added`` or ``without`` on it takes
+        logarithmic rather than linear time.  Only the first such call on a set of any other
+        kind needs to copy it.
+        """
+        if item in self:
+            return self
+        return _HamtBackedImmutableSet.from_set(self).with_added(item)
+
+    def without(self, item: Any) -> "ImmutableSet[T]":
+        """
+        Get a set with the elements of this set except *item*, in the same order.
+
+        If *item* is not in this set, this set itself is returned.  Like ``with_added``, this
+        takes logarithmic time on sets derived by ``with_added`` or ``without``.
+        """
+        if item not in self:
+            return self
+        return _HamtBackedImmutableSet.from_set(self).without(item)
+
+    def index(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        """
+        Get the position of *value* in the iteration order of this set.
+
+        A ``ValueError`` is raised if *value* is not in this set or its position is not within
+        *start* and *stop*, which are interpreted as for ``Sequence.index``.
+
+        Rather than scanning the set, this consults a map from elements to positions, which
+        is built on the first call (or up front if requested by ``precompute_index``).
+        """
+        position = self._position_of(value)
+        if position is not None:
+            if start < 0:
+                start = max(len(self) + start, 0)
+            if stop is None:
+                stop = len(self)
+            elif stop < 0:
+                stop += len(self)
+            if start <= position < stop:
+                return position
+        raise ValueError(f"{value!r} is not in ImmutableSet")
+
+    def indices_of(self, items: Iterable[Any]) -> Tuple[int, ...]:
+        """
+        Get the position in the iteration order of this set of each of *items*.
+
+        This is equivalent to ``tuple(self.index(item) for item in items)`` but avoids the
+        per-item method call overhead.  A ``ValueError`` is raised if any item is not in this set.
+        """
+        try:
+            return tuple(map(self._position_index().__getitem__, items))
+        except KeyError as e:
+            raise ValueError(f"{e.args[0]!r} is not in ImmutableSet") from None
+
+    def _position_index(self) -> Mapping[T, int]:
+        """
+        Get a map from each element of this set to its position in the iteration order.
+
+        Implementing classes should cache this.
+        """
+        return dict(zip(self, range(len(self))))
+
+    def _position_of(self, value: Any) -> Optional[int]:
+        """
+        Get the position of *value* in the iteration order, or ``None`` if it is not present.
+        """
+        return self._position_index().get(value)
+
+    def _cached_hash(self) -> Optional[int]:
+        """
+        Get the hash of this set if it has already been computed, or otherwise ``None``.
+        """
+        cached = getattr(self, "_hash", None)
+        # an implementation without a _hash slot would find the _hash method of
+        # collections.abc.Set
+        return cached if isinstance(cached, int) else None
+
+    def _derive_hash(
+        self,
+        derived: "ImmutableSet[Any]",
+        num_changed: int,
+        changed: Callable[[], Iterable[Any]],
+    ) -> None:
+        """
+        Cache the hash of *derived*, which differs from this set by the *num_changed* elements
+        returned by *changed* (each of which was either added or removed), if it can cheaply
+        be computed from this set's cached hash.
+        """
+        if (
+            num_changed * _INCREMENTAL_HASH_MIN_SIZE_RATIO <= len(derived)
+            and derived is not self
+            and derived._cached_hash() is None  # pylint:disable=protected-access
+        ):
+            own_hash = self._cached_hash()
+            if own_hash is not None:
+                derived_hash = derived_set_hash(
+                    own_hash, len(self), changed(), len(derived)
+                )
+                if derived_hash is not None:
+                    try:
+                        derived._hash = derived_hash  # type: ignore
+                    except AttributeError:
+                        # this implementation has its own way of caching its hash
+                        pass
+
     # we can be more efficient than Sequence's default implementation
     def count(self, value: Any) -> int:
         if value in self:
@@ -360,6 +814,18 @@ class ImmutableSet(  # pylint: disable=duplicate-bases
         as_list = str(list(self))
         return "{%s}" % as_list[1:-1]
 
+    def modified_copy_builder(self) -> "ImmutableSet.Builder[T]":
+        """
+        Get a builder holding the elements of this set, to which more can be added.
+
+        Nothing is copied until the builder is first modified, when all the elements are
+        copied in one bulk operation.  If it never is, ``build`` returns this set itself.
+        Elements of any type may be added.  If this set is known to hold only instances of
+        some type, the built set is known to as well if all the added elements are
+        instances of it.
+        """
+        return _NoTypeCheckingBuilder(source=self)
+
     @staticmethod
     def builder(
         check_top_type_matches: Optional[Type[T]] = None,
@@ -422,6 +888,9 @@ class _TypeCheckingBuilder(ImmutableSet.Builder[T]):
         top_level_type: Optional[Type] = None,
         require_ordered_input: bool = False,
         order_key: Callable[[T], Any] = None,
+        *,
+        source: Optional["ImmutableSet[T]"] = None,
+        sorted_set: bool = False,
     ) -> None:
         if not isinstance(top_level_type, (type, type(None))):
             raise TypeError(
@@ -436,13 +905,28 @@ class _TypeCheckingBuilder(ImmutableSet.Builder[T]):
             )
         self._require_ordered_input = require_ordered_input
         self._order_key = order_key
-
-        self._set: AbstractSet[T] = set()
-        self._iteration_order: List[T] = list()
+        # whether to build an ImmutableSortedSet rather than a set which is only sorted
+        # when it is built
+        self._sorted_set = sorted_set
+
+        # The elements are the keys of a dict, which build hands over to the set it
+        # builds rather than copying it.  If dict iteration is not deterministic, the
+        # order of the elements is also kept in a list.  Until a builder made by
+        # modified_copy_builder is modified, the set it was made from stands in for both.
+        self._elements: Union[Dict[T, None], ImmutableSet[T]] = (
+            {} if source is None else source
+        )
+        self._iteration_order: Optional[Sequence[T]] = (
+            None
+            if DICT_ITERATION_IS_DETERMINISTIC
+            else ([] if source is None else source)
+        )
+        # whether a set holds our storage, so it must be copied before being modified
+        self._storage_is_shared = source is not None
 
     def add(self: SelfType, item: T) -> SelfType:
         # Any changes made to add should also be made to add_all
-        if item not in self._set:
+        if item not in self._elements:
             # Optimization: Don't use use check_isinstance to cut down on method calls
             if not isinstance(item, self._top_level_type):
                 raise TypeError(
@@ -450,8 +934,11 @@ class _TypeCheckingBuilder(ImmutableSet.Builder[T]):
                         self._top_level_type, type(item), item
                     )
                 )
-            self._set.add(item)
-            self._iteration_order.append(item)
+            if self._storage_is_shared:
+                self._copy_storage()
+            self._elements[item] = None
+            if self._iteration_order is not None:
+                self._iteration_order.append(item)
         return self
 
     def add_all(self: SelfType, items: Iterable[T]) -> SelfType:
@@ -468,51 +955,76 @@ class _TypeCheckingBuilder(ImmutableSet.Builder[T]):
                 "determinism."
             )
 
-        # Optimization: These methods are looked up once outside the inner loop. Note that applying
-        # the same approach to the containment check does not improve performance, probably because
-        # the containment check syntax itself is already optimized.
-        add = self._set.add
-        append = self._iteration_order.append
-        # Optimization: Store self._top_level_type to avoid repeated lookups
+        if self._storage_is_shared:
+            self._copy_storage()
+        # Optimization: Store these to avoid repeated attribute lookups in the inner loop
+        elements = self._elements
+        iteration_order = self._iteration_order
         top_level_type = self._top_level_type
+        if _has_verified_type(items, top_level_type):
+            # the items have already been type-checked, so they only need de-duplicating
+            _add_all_distinct(elements, iteration_order, items)
+            return self
         for item in items:
             # Optimization: to save method call overhead in an inner loop, we don't call add and
             # instead do the same thing. We don't use check_isinstance for the same reason.
-            if item not in self._set:
+            if item not in elements:
                 if not isinstance(item, top_level_type):
                     raise TypeError(
                         "Expected instance of type {!r} but got type {!r} for {!r}".format(
                             top_level_type, type(item), item
                         )
                     )
-                add(item)
-                append(item)
+                elements[item] = None
+                if iteration_order is not None:
+                    iteration_order.append(item)
 
         return self
 
+    def _copy_storage(self) -> None:
+        self._elements = dict.fromkeys(self._elements)
+        if self._iteration_order is not None:
+            self._iteration_order = list(self._iteration_order)
+        self._storage_is_shared = False
+
     def __contains__(self, item):
-        return self._set.__contains__(item)
+        return self._elements.__contains__(item)
 
     def build(self) -> "ImmutableSet[T]":
-        if self._set:
-            if len(self._set) > 1:
-                if self._order_key:
-                    self._iteration_order.sort(key=self._order_key)
-                return _FrozenSetBackedImmutableSet(
-                    self._set, self._iteration_order, top_level_type=self._top_level_type
-                )
-            else:
-                return _SingletonImmutableSet(
-                    self._set.__iter__().__next__(), top_level_type=self._top_level_type
+        if isinstance(self._elements, ImmutableSet):
+            # we were never modified, so we can reuse the set we were made from
+            return self._elements
+        if self._order_key:
+            in_order = sorted(
+                self._elements
+                if self._iteration_order is None
+                else self._iteration_order,
+                key=_sort_key(self._order_key),
+            )
+            if self._sorted_set:
+                return _immutablesortedset_from_sorted(
+                    in_order, self._order_key, self._top_level_type
                 )
-        else:
-            return _EMPTY
+            return _immutableset_from_distinct(in_order, self._top_level_type)
+        if self._iteration_order is not None:
+            return _immutableset_from_distinct(
+                self._iteration_order, self._top_level_type
+            )
+        # the built set takes ownership of our storage, so we copy it if we are modified
+        # later
+        self._storage_is_shared = True
+        return _immutableset_from_dict(self._elements, self._top_level_type)
 
 
 # When modifying this class, make sure any relevant changes are also made to _TypeCheckingBuilder
 class _NoTypeCheckingBuilder(ImmutableSet.Builder[T]):
     def __init__(
-        self, require_ordered_input: bool = False, order_key: Callable[[T], Any] = None
+        self,
+        require_ordered_input: bool = False,
+        order_key: Callable[[T], Any] = None,
+        *,
+        source: Optional["ImmutableSet[T]"] = None,
+        sorted_set: bool = False,
     ) -> None:
         if not isinstance(require_ordered_input, bool):
             raise TypeError(
@@ -521,15 +1033,39 @@ class _NoTypeCheckingBuilder(ImmutableSet.Builder[T]):
             )
         self._require_ordered_input = require_ordered_input
         self._order_key = order_key
-
-        self._set: AbstractSet[T] = set()
-        self._iteration_order: List[T] = list()
+        # whether to build an ImmutableSortedSet rather than a set which is only sorted
+        # when it is built
+        self._sorted_set = sorted_set
+
+        # The elements are the keys of a dict, which build hands over to the set it
+        # builds rather than copying it.  If dict iteration is not deterministic, the
+        # order of the elements is also kept in a list.  Until a builder made by
+        # modified_copy_builder is modified, the set it was made from stands in for both.
+        self._elements: Union[Dict[T, None], ImmutableSet[T]] = (
+            {} if source is None else source
+        )
+        self._iteration_order: Optional[Sequence[T]] = (
+            None
+            if DICT_ITERATION_IS_DETERMINISTIC
+            else ([] if source is None else source)
+        )
+        # whether a set holds our storage, so it must be copied before being modified
+        self._storage_is_shared = source is not None
+        # the type all the elements are known to be instances of, which is only known
+        # for those of the source, and only as long as those added are too
+        self._verified_type: Optional[Type] = (
+            None if source is None else source._top_level_type  # type: ignore
+        )
 
     def add(self: SelfType, item: T) -> SelfType:
         # Any changes made to add should also be made to add_all
-        if item not in self._set:
-            self._set.add(item)
-            self._iteration_order.append(item)
+        if item not in self._elements:
+            if self._storage_is_shared:
+                self._copy_storage()
+            self._verified_type = _type_also_verified_for(self._verified_type, item)
+            self._elements[item] = None
+            if self._iteration_order is not None:
+                self._iteration_order.append(item)
         return self
 
     def add_all(self: SelfType, items: Iterable[T]) -> SelfType:
@@ -546,68 +1082,169 @@ class _NoTypeCheckingBuilder(ImmutableSet.Builder[T]):
                 "determinism."
             )
 
-        # Optimization: These methods are looked up once outside the inner loop. Note that applying
-        # the same approach to the containment check does not improve performance, probably because
-        # the containment check syntax itself is already optimized.
-        add = self._set.add
-        append = self._iteration_order.append
-        for item in items:
-            # Optimization: to save method call overhead in an inner loop, we don't call add and
-            # instead do the same thing.
-            if item not in self._set:
-                add(item)
-                append(item)
-
+        if self._storage_is_shared:
+            self._copy_storage()
+        if self._verified_type is not None:
+            if not isinstance(items, Collection):
+                items = list(items)
+            if not all(isinstance(item, self._verified_type) for item in items):
+                self._verified_type = None
+        _add_all_distinct(self._elements, self._iteration_order, items)
         return self
 
+    def _copy_storage(self) -> None:
+        self._elements = dict.fromkeys(self._elements)
+        if self._iteration_order is not None:
+            self._iteration_order = list(self._iteration_order)
+        self._storage_is_shared = False
+
     def __contains__(self, item):
-        return self._set.__contains__(item)
+        return self._elements.__contains__(item)
 
     def build(self) -> "ImmutableSet[T]":
-        if self._set:
-            if len(self._set) > 1:
-                if self._order_key:
-                    self._iteration_order.sort(key=self._order_key)
-                return _FrozenSetBackedImmutableSet(
-                    self._set, self._iteration_order, top_level_type=None
-                )
-            else:
-                return _SingletonImmutableSet(
-                    self._set.__iter__().__next__(), top_level_type=None
+        if isinstance(self._elements, ImmutableSet):
+            # we were never modified, so we can reuse the set we were made from
+            return self._elements
+        if self._order_key:
+            in_order = sorted(
+                self._elements
+                if self._iteration_order is None
+                else self._iteration_order,
+                key=_sort_key(self._order_key),
+            )
+            if self._sorted_set:
+                return _immutablesortedset_from_sorted(
+                    in_order, self._order_key, self._verified_type
                 )
-        else:
-            return _EMPTY
+            return _immutableset_from_distinct(in_order, self._verified_type)
+        if self._iteration_order is not None:
+            return _immutableset_from_distinct(self._iteration_order, self._verified_type)
+        # the built set takes ownership of our storage, so we copy it if we are modified
+        # later
+        self._storage_is_shared = True
+        return _immutableset_from_dict(self._elements, self._verified_type)
+
+
+def _add_all_distinct(
+    elements: Dict[T, None], iteration_order: Optional[List[T]], items: Iterable[T]
+) -> None:
+    """
+    Add each of *items* not already among the keys of *elements* to them, and to
+    *iteration_order* if it is present.
+    """
+    if iteration_order is None:
+        # this runs at C speed, and setting a key which is already present doesn't move it
+        elements.update(zip(items, repeat(None)))
+    else:
+        for item in items:
+            if item not in elements:
+                elements[item] = None
+                iteration_order.append(item)
 
 
-class _FrozenSetBackedImmutableSet(ImmutableSet[T]):
+def _immutableset_from_dict(
+    elements: Dict[T, Any], top_level_type: Optional[Type]
+) -> "ImmutableSet[T]":
+    """
+    Get an ``ImmutableSet`` of the keys of *elements*, taking ownership of *elements*.
+
+    This should only be used when dict iteration is deterministic.
+    """
+    if len(elements) > _MAX_SMALL_SIZE:
+        return _DictBackedImmutableSet(elements, top_level_type)
+    elif len(elements) > 1:
+        return _SmallImmutableSet(tuple(elements), top_level_type)
+    elif elements:
+        return _SingletonImmutableSet(next(iter(elements)), top_level_type)
+    else:
+        return _EMPTY
+
+
+def _immutableset_from_distinct(
+    elements: Iterable[T], top_level_type: Optional[Type]
+) -> "ImmutableSet[T]":
+    """
+    Get an ``ImmutableSet`` of *elements*, which are already known to be distinct, without
+    any of the checks done by ``immutableset``.
+    """
+    if DICT_ITERATION_IS_DETERMINISTIC:
+        return _immutableset_from_dict(dict.fromkeys(elements), top_level_type)
+    iteration_order = tuple(elements)
+    if len(iteration_order) > _MAX_SMALL_SIZE:
+        return _FrozenSetBackedImmutableSet(
+            iteration_order, iteration_order, top_level_type
+        )
+    elif len(iteration_order) > 1:
+        return _SmallImmutableSet(iteration_order, top_level_type)
+    elif iteration_order:
+        return _SingletonImmutableSet(iteration_order[0], top_level_type)
+    else:
+        return _EMPTY
+
+
+class _DictBackedImmutableSet(ImmutableSet[T]):
     """
     Implementing class for the general case for ImmutableSet.
 
+    Each element is stored exactly once, as a key of an insertion-ordered ``dict``. This
+    gives the same C-level containment checks as a ``frozenset`` and deterministic
+    iteration without also keeping a ``tuple`` of the elements.
+
+    A dict can't be indexed by position, so a tuple of the elements is materialized (and
+    then cached) the first time the set is indexed, sliced or iterated in reverse.  This
+    gives back some of the saving.  For 100,000 strings, not counting the strings
+    themselves, the set takes about 38 bytes per element, and 46 once it has been indexed.
+    The ``frozenset`` and ``tuple`` of ``_FrozenSetBackedImmutableSet`` take 50.
+
+    The values of the ``dict`` are unused until the position of an element is first
+    needed (or the set is built with ``precompute_index``), when each is set to the
+    position of its key, so that ``index`` needs no table besides the ``dict``.  Those
+    positions take about another 28 bytes per element.
+
+    This relies on dict iteration being deterministic.  On interpreters where it is not,
+    ``_FrozenSetBackedImmutableSet`` is used instead.
+
     This class should *never*
     be directly instantiated by users or the ImmutableSet contract may fail to be satisfied!
     """
 
-    __slots__ = "_set", "_iteration_order", "_top_level_type"
+    __slots__ = "_dict", "_iteration_order", "_numbered", "_hash", "_top_level_type"
 
     # pylint:disable=assigning-non-slot
-    def __init__(
-        self,
-        init_set: Iterable[T],
-        iteration_order: Sequence[T],
-        top_level_type: Optional[Type],
-    ) -> None:
-        self._set: FrozenSet[T] = frozenset(init_set)
-        self._iteration_order = tuple(iteration_order)
+    def __init__(self, init_dict: Dict[T, Any], top_level_type: Optional[Type]) -> None:
+        # init_dict is taken ownership of, not copied.  Callers must not retain it.
+        self._dict = init_dict
+        self._iteration_order: Optional[Tuple[T, ...]] = None
+        # whether the values of _dict are the positions of their keys
+        self._numbered = False
+        self._hash: Optional[int] = None
         self._top_level_type = top_level_type
 
     def __iter__(self) -> Iterator[T]:
-        return self._iteration_order.__iter__()
+        return self._dict.__iter__()
 
     def __len__(self) -> int:
-        return self._set.__len__()
+        return self._dict.__len__()
 
     def __contains__(self, item) -> bool:
-        return self._set.__contains__(item)
+        return self._dict.__contains__(item)
+
+    def _ordered(self) -> Tuple[T, ...]:
+        if self._iteration_order is None:
+            # racing threads will at worst both compute equal tuples
+            self._iteration_order = tuple(self._dict)
+        return self._iteration_order
+
+    def _position_index(self) -> Mapping[T, int]:
+        if not self._numbered:
+            # setting the values of keys which are present neither adds to nor reorders
+            # the dict, and racing threads will at worst both set the same values
+            self._dict.update(zip(self._dict, count()))
+            self._numbered = True
+        return self._dict
+
+    def _native_set(self) -> AbstractSet[T]:
+        return self._dict.keys()
 
     @overload
     def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
@@ -622,39 +1259,51 @@ class _FrozenSetBackedImmutableSet(ImmutableSet[T]):
     def __getitem__(  # pylint:disable=function-redefined
         self, index: Union[int, slice]
     ) -> Union[T, Sequence[T]]:
-        # this works because Tuple can handle either type of index
-        return self._iteration_order[index]
+        if isinstance(index, slice):
+            return _slice_view(self, _OrderedElements(self), index)
+        return self._ordered()[index]
+
+    def __reversed__(self) -> Iterator[T]:
+        return reversed(self._ordered())
 
     def __eq__(self, other):
         # pylint:disable=protected-access
-        if isinstance(other, AbstractSet):
-            return self._set == other
+        if isinstance(other, _DictBackedImmutableSet):
+            return self._dict.keys() == other._dict.keys()
+        elif isinstance(other, (set, frozenset)):
+            return self._dict.keys() == other
+        elif isinstance(other, AbstractSet):
+            return len(self) == len(other) and all(map(other.__contains__, self._dict))
         else:
             return False
 
     def __hash__(self):
-        return self._set.__hash__()
+        # must match the hash of an equal frozenset
+        if self._hash is None:
+            self._hash = frozenset(self._dict).__hash__()
+        return self._hash
 
     def __reduce__(self):
-        return (immutableset, (self._iteration_order,))
+        iteration_order = self._iteration_order
+        if iteration_order is None:
+            iteration_order = tuple(self._dict)
+        return (immutableset, (iteration_order,))
 
 
-class _SingletonImmutableSet(ImmutableSet[T]):
-    __slots__ = "_single_value", "_top_level_type"
-
-    # pylint:disable=assigning-non-slot
-    def __init__(self, single_value: T, top_level_type: Optional[Type]) -> None:
-        self._single_value = single_value
-        self._top_level_type = top_level_type
+class _OrderedElements(Sequence[T]):
+    """
+    The elements of a ``_DictBackedImmutableSet`` in order, which are only materialized
+    as a tuple if one is accessed by position.
 
-    def __iter__(self) -> Iterator[T]:
-        return iter((self._single_value,))
+    Slices of the set are views of this, so that slicing copies nothing and checking if a
+    slice contains an element needs only the position of the element in the set.
+    """
 
-    def __len__(self) -> int:
-        return 1
+    __slots__ = ("_set",)
 
-    def __contains__(self, item) -> bool:
-        return self._single_value == item
+    # pylint:disable=assigning-non-slot
+    def __init__(self, set_: _DictBackedImmutableSet[T]) -> None:
+        self._set = set_
 
     @overload
     def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
@@ -667,55 +1316,1459 @@ class _SingletonImmutableSet(ImmutableSet[T]):
         pass  # pragma: no cover
 
     def __getitem__(  # pylint:disable=function-redefined
-        self, item: Union[int, slice]
+        self, index: Union[int, slice]
     ) -> Union[T, Sequence[T]]:
-        # this works because Tuple can handle either type of index
-        if item == 0 or item == -1:
-            return self._single_value
-        elif isinstance(item, slice):
-            if item.step is None or item.step > 0:
-                if (
-                    (item.start is None and item.stop is None)
-                    or (item.start is None and (item.stop is None or item.stop >= 1))
-                    or (item.start <= 0 and (item.stop is None or item.stop >= 1))
-                ):
-                    return self
-                else:
-                    return _EMPTY
-            elif item.step < 0:
-                return self.__getitem__(slice(item.stop, item.start, -item.step))
-            else:
-                raise ValueError("Can't slice with step size of zero.")
-        else:
-            raise IndexError(f"Index {item} out-of-bounds for size 1 ImmutableSet")
+        return self._set._ordered()[index]  # pylint:disable=protected-access
 
-    def __eq__(self, other):
-        # pylint:disable=protected-access
-        if isinstance(other, AbstractSet):
-            return len(other) == 1 and self._single_value in other
-        else:
-            return False
+    def __len__(self) -> int:
+        return self._set.__len__()
+
+    def __iter__(self) -> Iterator[T]:
+        return self._set.__iter__()
+
+
+class _DictKeysImmutableSet(_DictBackedImmutableSet[T]):
+    """
+    Implementing class for the ``key_set`` of a ``dict``-backed ``ImmutableDict``, which
+    shares the ``dict`` of the dictionary.
+
+    Since the values of that ``dict`` are those of the dictionary, the positions of the
+    keys are kept in a separate map, which is built the first time one is needed.
+    """
+
+    __slots__ = ("_positions",)
+
+    # pylint:disable=assigning-non-slot
+    def __init__(self, init_dict: Dict[T, Any], top_level_type: Optional[Type]) -> None:
+        super().__init__(init_dict, top_level_type)
+        self._positions: Optional[Dict[T, int]] = None
+
+    def _position_index(self) -> Mapping[T, int]:
+        if self._positions is None:
+            # racing threads will at worst both compute equal maps
+            self._positions = dict(zip(self._dict, count()))
+        return self._positions
+
+
+class ImmutableSortedSet(ImmutableSet[T], metaclass=ABCMeta):
+    """
+    An ``ImmutableSet`` whose iteration order is sorted, either by the natural ordering of its
+    elements or by a key function.
+
+    In addition to the usual ``ImmutableSet`` operations, this supports ordered queries
+    (`floor`, `ceiling`, `range`, `rank` and `select`), all of which take logarithmic time.
+    Slicing a sorted set with a non-negative step gives another sorted set.
+
+    ImmutableSortedSets should be created via ``immutablesortedset`` or
+    ``ImmutableSortedSet.builder``.
+    """
+
+    __slots__ = ()
+
+    # Signature of the of method varies by collection
+    # pylint: disable = arguments-differ
+    @staticmethod
+    def of(
+        seq: Iterable[T], key: Optional[Callable[[T], Any]] = None
+    ) -> "ImmutableSortedSet[T]":
+        """
+        Deprecated - prefer ``immutablesortedset`` module-level factory method.
+        """
+        return immutablesortedset(seq, key=key)
+
+    @staticmethod
+    def empty() -> "ImmutableSortedSet[T]":
+        """
+        Get an empty ImmutableSortedSet.
+        """
+        return _immutablesortedset_from_sorted((), None, None)
+
+    @staticmethod
+    def builder(  # type: ignore
+        check_top_type_matches: Optional[Type[T]] = None,
+        key: Optional[Callable[[T], Any]] = None,
+    ) -> "ImmutableSet.Builder[T]":
+        """
+        Gets an object which can build an ImmutableSortedSet sorted by *key* (or by the
+        natural ordering of the elements, if *key* is not provided).
+        """
+        order_key = key if key is not None else _natural_order
+        if check_top_type_matches is not None:
+            return _TypeCheckingBuilder(
+                top_level_type=check_top_type_matches,
+                order_key=order_key,
+                sorted_set=True,
+            )
+        return _NoTypeCheckingBuilder(order_key=order_key, sorted_set=True)
+
+    def modified_copy_builder(self) -> "ImmutableSet.Builder[T]":
+        """
+        Like ``ImmutableSet.modified_copy_builder``, but the builder keeps the elements
+        sorted the same way as this set.
+        """
+        order_key = self._key if self._key is not None else _natural_order
+        return _NoTypeCheckingBuilder(order_key=order_key, source=self, sorted_set=True)
+
+    @property
+    @abstractmethod
+    def _key(self) -> Optional[Callable[[T], Any]]:
+        """
+        The key function this set is sorted by, or ``None`` for the natural ordering.
+        """
+
+    @abstractmethod
+    def _sort_keys(self) -> Sequence[Any]:
+        """
+        Get the sort keys of the elements of this set, in iteration order.
+        """
+
+    def _sort_key_of(self, value: Any) -> Any:
+        return self._key(value) if self._key is not None else value
+
+    def floor(self, value: Any) -> Optional[T]:
+        """
+        Get the greatest element of this set less than or equal to *value*, or ``None`` if
+        there is no such element.
+        """
+        position = bisect_right(self._sort_keys(), self._sort_key_of(value))
+        return self[position - 1] if position else None
+
+    def ceiling(self, value: Any) -> Optional[T]:
+        """
+        Get the least element of this set greater than or equal to *value*, or ``None`` if
+        there is no such element.
+        """
+        position = bisect_left(self._sort_keys(), self._sort_key_of(value))
+        return self[position] if position < len(self) else None
+
+    def range(
+        self, low: Optional[Any] = None, high: Optional[Any] = None
+    ) -> "ImmutableSortedSet[T]":
+        """
+        Get the sorted set of elements of this set which are at least *low* and less than
+        *high*.
+
+        Either bound may be ``None`` to leave that side of the range unbounded.
+        """
+        sort_keys = self._sort_keys()
+        start = bisect_left(sort_keys, self._sort_key_of(low)) if low is not None else 0
+        stop = (
+            bisect_left(sort_keys, self._sort_key_of(high))
+            if high is not None
+            else len(sort_keys)
+        )
+        return self[start:stop]  # type: ignore
+
+    def rank(self, value: Any) -> int:
+        """
+        Get the number of elements of this set less than *value*.
+        """
+        return bisect_left(self._sort_keys(), self._sort_key_of(value))
+
+    def select(self, rank: int) -> T:
+        """
+        Get the element of this set with the given *rank* (that is, the element with *rank*
+        elements less than it).
+
+        This is the same as ``self[rank]``.
+        """
+        return self[rank]
+
+    def union(
+        self, other: Iterable[T], check_top_type_matches: Optional[Type[T]] = None
+    ) -> "ImmutableSet[T]":
+        """
+        Get the union of this set and another, which is sorted in the same way as this set.
+
+        If *other* is sorted in the same way, this takes linear time.
+
+        If check top level types is provided, all elements of both sets must match the
+        specified type.
+        """
+        if check_top_type_matches is not None:
+            if not isinstance(other, ImmutableSet):
+                # other may be consumed by iteration, but we need to check it before
+                # using it
+                other = tuple(other)
+            _check_element_type(self, check_top_type_matches)
+            _check_element_type(other, check_top_type_matches)
+        # the elements of the union are known to be instances of whatever type those of
+        # both sides are
+        top_level_type = self._top_level_type
+        if top_level_type is not None and not _has_verified_type(other, top_level_type):
+            top_level_type = check_top_type_matches
+        # Python's sort merges pre-sorted runs in linear time
+        ret = _immutablesortedset_from_sorted(
+            sorted(chain(self, other), key=self._key), self._key, top_level_type
+        )
+        return self if len(ret) == len(self) else ret
+
+    def intersection(self, other: Iterable[Any]) -> "ImmutableSet[T]":
+        """
+        Get the intersection of this set and another, which is sorted in the same way as
+        this set.
+        """
+        native_other = _native_set(other)
+        if native_other is None:
+            return self._sorted_subset(super().intersection(other))
+        return self._sorted_subset(filter(native_other.__contains__, self))
+
+    def difference(self, other: AbstractSet[Any]) -> "ImmutableSet[T]":
+        """
+        Gets a new set with all items in this set not in the other, which is sorted in the
+        same way as this set.
+        """
+        native_other = _native_set(other)
+        if native_other is None:
+            return self._sorted_subset(super().difference(other))
+        return self._sorted_subset(filterfalse(native_other.__contains__, self))
+
+    def __xor__(self, other: AbstractSet[V]) -> "AbstractSet[Union[T, V]]":  # type: ignore
+        """
+        Get the symmetric difference of this set and another, which is sorted in the same
+        way as this set.
+        """
+        return self.difference(other).union(  # type: ignore
+            x for x in other if x not in self
+        )
+
+    def with_added(self, item: T) -> "ImmutableSet[T]":
+        """
+        Get the sorted set of the elements of this set and *item*.
+
+        Unlike for other sets, this copies the set, taking linear time.
+        """
+        if item in self:
+            return self
+        position = bisect_right(self._sort_keys(), self._sort_key_of(item))
+        return _immutablesortedset_from_sorted(
+            chain(islice(self, position), (item,), islice(self, position, None)),
+            self._key,
+            _type_also_verified_for(self._top_level_type, item),
+        )
+
+    def without(self, item: Any) -> "ImmutableSet[T]":
+        """
+        Get the sorted set of the elements of this set except *item*.
+
+        Unlike for other sets, this copies the set, taking linear time.
+        """
+        if item not in self:
+            return self
+        return self._sorted_subset(x for x in self if x != item)
+
+    def _intern_key(self) -> Hashable:
+        # sets with the same elements are only interchangeable if they sort the same way
+        return (type(self), self._key, hash(self))
+
+    def _sorted_subset(self, elements: Iterable[T]) -> "ImmutableSortedSet[T]":
+        """
+        Get the sorted set of *elements*, which must be a subset of this set in iteration
+        order.
+        """
+        if elements is self:
+            return self
+        # pylint:disable=protected-access
+        ret = _immutablesortedset_from_sorted(elements, self._key, self._top_level_type)
+        return self if len(ret) == len(self) else ret
+
+
+class _DictBackedImmutableSortedSet(ImmutableSortedSet[T], _DictBackedImmutableSet[T]):
+    """
+    Implementing class for ``ImmutableSortedSet``.
+
+    The elements are held in a ``dict`` for containment checks, in a tuple in sorted order
+    for bisection, and, if there is a key function, in a parallel tuple of their sort keys
+    (not counting the keys themselves).  So, unlike ``_DictBackedImmutableSet``, this
+    always keeps two references to each element: for 100,000 strings, not
+    counting the strings themselves, the set takes about 46 bytes per element, or 54 with
+    a key function.  As for ``_DictBackedImmutableSet``, the values of the ``dict`` are
+    set to the positions of their keys when the position of an element is first needed.
+    """
+
+    __slots__ = "_key_function", "_keys"
+
+    # pylint:disable=assigning-non-slot
+    def __init__(
+        self,
+        sorted_elements: Dict[T, Any],
+        key: Optional[Callable[[T], Any]],
+        top_level_type: Optional[Type],
+    ) -> None:
+        super().__init__(sorted_elements, top_level_type)
+        # unlike in the superclass, this is always materialized since bisection needs it
+        self._iteration_order = tuple(sorted_elements)
+        self._key_function = key
+        self._keys = (
+            tuple(map(key, self._iteration_order))
+            if key is not None
+            else self._iteration_order
+        )
+
+    @property
+    def _key(self) -> Optional[Callable[[T], Any]]:
+        return self._key_function
+
+    def _sort_keys(self) -> Sequence[Any]:
+        return self._keys
+
+    def __iter__(self) -> Iterator[T]:
+        return self._iteration_order.__iter__()  # type: ignore
+
+    @overload
+    def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: Union[int, slice]
+    ) -> Union[T, Sequence[T]]:
+        if isinstance(index, slice):
+            return _slice_view(self, self._iteration_order, index)  # type: ignore
+        return self._iteration_order[index]  # type: ignore
+
+    def __reduce__(self):
+        return (_unpickle_sorted_set, (self._iteration_order, self._key_function))
+
+
+class _SequenceSlice(Sequence[T]):
+    """
+    A read-only view of the elements of *sequence* at the positions in the ``range``
+    *positions*.
+    """
+
+    __slots__ = "_sequence", "_positions"
+
+    # pylint:disable=assigning-non-slot
+    def __init__(self, sequence: Sequence[T], positions: range) -> None:
+        self._sequence = sequence
+        self._positions = positions
+
+    @overload
+    def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: Union[int, slice]
+    ) -> Union[T, Sequence[T]]:
+        if isinstance(index, slice):
+            return _SequenceSlice(self._sequence, self._positions[index])
+        return self._sequence[self._positions[index]]
+
+    def __len__(self) -> int:
+        return self._positions.__len__()
+
+    def __iter__(self) -> Iterator[T]:
+        return map(self._sequence.__getitem__, self._positions)
+
+
+class _ImmutableSetSlice(ImmutableSet[T]):
+    """
+    Implementing class for slices of an ``ImmutableSet``.
+
+    Rather than copying the sliced elements, this refers to the positional storage of the
+    set it was sliced from (its *parent*).  Containment is checked by finding the position of
+    an element in the parent and checking if that position is within the slice.
+
+    The elements are only copied if this is hashed or pickled.
+    """
+
+    __slots__ = "_parent", "_elements", "_hash", "_top_level_type"
+
+    # pylint:disable=assigning-non-slot
+    def __init__(
+        self, parent: ImmutableSet[T], sequence: Sequence[T], positions: range
+    ) -> None:
+        self._parent = parent
+        self._elements = _SequenceSlice(sequence, positions)
+        self._hash: Optional[int] = None
+        # pylint:disable=protected-access
+        self._top_level_type = parent._top_level_type  # type: ignore
+
+    def __iter__(self) -> Iterator[T]:
+        return self._elements.__iter__()
+
+    def __len__(self) -> int:
+        return self._elements.__len__()
+
+    def __contains__(self, item) -> bool:
+        return self._position_of(item) is not None
+
+    def _position_of(self, value: Any) -> Optional[int]:
+        # pylint:disable=protected-access
+        parent_position = self._parent._position_of(value)
+        positions = self._elements._positions
+        if parent_position is not None and parent_position in positions:
+            return positions.index(parent_position)
+        return None
+
+    @overload
+    def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: Union[int, slice]
+    ) -> Union[T, Sequence[T]]:
+        if isinstance(index, slice):
+            # slice the parent directly rather than stacking views
+            # pylint:disable=protected-access
+            return _slice_view(
+                self._parent,
+                self._elements._sequence,
+                slice(None),
+                self._elements._positions[index],
+            )
+        return self._elements[index]
+
+    def __eq__(self, other):
+        if isinstance(other, AbstractSet):
+            return len(self) == len(other) and all(map(other.__contains__, self))
+        else:
+            return False
+
+    def __hash__(self):
+        # must match the hash of an equal frozenset
+        if self._hash is None:
+            self._hash = frozenset(self).__hash__()
+        return self._hash
+
+    def __reduce__(self):
+        return (immutableset, (tuple(self),))
+
+
+class _ImmutableSortedSetSlice(ImmutableSortedSet[T], _ImmutableSetSlice[T]):
+    """
+    Implementing class for positive-step slices of an ``ImmutableSortedSet``, which
+    are views like ``_ImmutableSetSlice``.
+    """
+
+    __slots__ = ("_sort_key_slice",)
+
+    # pylint:disable=assigning-non-slot
+    def __init__(
+        self, parent: ImmutableSortedSet[T], sequence: Sequence[T], positions: range
+    ) -> None:
+        super().__init__(parent, sequence, positions)
+        # pylint:disable=protected-access
+        self._sort_key_slice = _SequenceSlice(parent._sort_keys(), positions)
+
+    @property
+    def _key(self) -> Optional[Callable[[T], Any]]:
+        return self._parent._key  # type: ignore # pylint:disable=protected-access
+
+    def _sort_keys(self) -> Sequence[Any]:
+        return self._sort_key_slice
+
+    def _position_of(self, value: Any) -> Optional[int]:
+        return _ImmutableSetSlice._position_of(self, value)
+
+    def __hash__(self):
+        return _ImmutableSetSlice.__hash__(self)
+
+
+def _slice_view(
+    parent: ImmutableSet[T],
+    sequence: Sequence[T],
+    index: slice,
+    positions: Optional[range] = None,
+) -> ImmutableSet[T]:
+    """
+    Get the slice *index* of *parent*, whose elements in iteration order are *sequence*,
+    without copying.
+
+    If *positions* is given, it is used instead of the positions selected by *index*.
+    """
+    if positions is None:
+        positions = range(len(sequence))[index]
+    if len(positions) == len(sequence) and positions.step == 1:
+        return parent
+    # pylint:disable=protected-access
+    if isinstance(parent, ImmutableSortedSet) and positions.step > 0:
+        if len(positions) <= 1:
+            # too small to be worth a view, but must remain sorted sets
+            return _immutablesortedset_from_sorted(
+                map(sequence.__getitem__, positions),
+                parent._key,
+                parent._top_level_type,  # type: ignore
+            )
+        return _ImmutableSortedSetSlice(parent, sequence, positions)
+    elif not positions:
+        return _EMPTY
+    elif len(positions) == 1:
+        return _SingletonImmutableSet(
+            sequence[positions[0]], parent._top_level_type  # type: ignore
+        )
+    else:
+        return _ImmutableSetSlice(parent, sequence, positions)
+
+
+class _HamtBackedImmutableSet(ImmutableSet[T]):
+    """
+    Implementing class for sets derived by ``with_added`` and ``without``.
+
+    The elements are held in a ``PersistentOrderedMap``, which versions derived from one
+    another share most of.
+    """
+
+    __slots__ = "_map", "_iteration_order", "_hash", "_top_level_type"
+
+    # pylint:disable=assigning-non-slot
+    def __init__(
+        self, map_: PersistentOrderedMap, top_level_type: Optional[Type]
+    ) -> None:
+        self._map = map_
+        self._iteration_order: Optional[Tuple[T, ...]] = None
+        self._hash: Optional[int] = None
+        self._top_level_type = top_level_type
+
+    @staticmethod
+    def from_set(elements: ImmutableSet[T]) -> "_HamtBackedImmutableSet[T]":
+        if isinstance(elements, _HamtBackedImmutableSet):
+            return elements
+        # pylint:disable=protected-access
+        ret: _HamtBackedImmutableSet[T] = _HamtBackedImmutableSet(
+            PersistentOrderedMap.from_distinct_items(elements, repeat(None)),
+            elements._top_level_type,  # type: ignore
+        )
+        ret._hash = elements._cached_hash()
+        return ret
+
+    def with_added(self, item: T) -> "ImmutableSet[T]":
+        ret_map = self._map.assoc(item, None)
+        if ret_map is self._map:
+            return self
+        ret: ImmutableSet[T] = _HamtBackedImmutableSet(
+            ret_map, _type_also_verified_for(self._top_level_type, item)
+        )
+        self._derive_hash(ret, 1, lambda: (item,))
+        return ret
+
+    def without(self, item: Any) -> "ImmutableSet[T]":
+        ret_map = self._map.dissoc(item)
+        if ret_map is self._map:
+            return self
+        elif not ret_map:
+            return _EMPTY
+        ret: ImmutableSet[T] = _HamtBackedImmutableSet(ret_map, self._top_level_type)
+        self._derive_hash(ret, 1, lambda: (item,))
+        return ret
+
+    def __iter__(self) -> Iterator[T]:
+        return self._map.keys()
+
+    def __len__(self) -> int:
+        return self._map.__len__()
+
+    def __contains__(self, item) -> bool:
+        return self._map.__contains__(item)
+
+    def _ordered(self) -> Tuple[T, ...]:
+        if self._iteration_order is None:
+            self._iteration_order = tuple(self._map.keys())
+        return self._iteration_order
+
+    def _position_of(self, value: Any) -> Optional[int]:
+        if self._map.is_compact():
+            return self._map.sequence_number(value)
+        return super()._position_of(value)
+
+    def _position_index(self) -> Mapping[T, int]:
+        return dict(zip(self._ordered(), range(len(self))))
+
+    @overload
+    def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: Union[int, slice]
+    ) -> Union[T, Sequence[T]]:
+        if isinstance(index, slice):
+            return _slice_view(self, self._ordered(), index)
+        if self._map.is_compact():
+            # range handles negative and out of bounds indices for us
+            return self._map.key_at(range(len(self))[index])
+        return self._ordered()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, AbstractSet):
+            return len(self) == len(other) and all(map(other.__contains__, self))
+        else:
+            return False
+
+    def __hash__(self):
+        # must match the hash of an equal frozenset
+        if self._hash is None:
+            self._hash = frozenset(self).__hash__()
+        return self._hash
+
+    def __reduce__(self):
+        return (immutableset, (tuple(self),))
+
+
+def _immutablesortedset_from_sorted(
+    elements: Iterable[T],
+    key: Optional[Callable[[T], Any]],
+    top_level_type: Optional[Type],
+) -> "ImmutableSortedSet[T]":
+    """
+    Get an ``ImmutableSortedSet`` of *elements*, which must already be sorted by *key*.
+    """
+    if key is _natural_order:
+        key = None
+    return _DictBackedImmutableSortedSet(dict.fromkeys(elements), key, top_level_type)
+
+
+def _unpickle_sorted_set(
+    elements: Tuple[T, ...], key: Optional[Callable[[T], Any]]
+) -> "ImmutableSortedSet[T]":
+    return _immutablesortedset_from_sorted(elements, key, None)
+
+
+def _natural_order(value: T) -> T:
+    """
+    Key function which sorts by the natural ordering of values.
+    """
+    return value
+
+
+def _sort_key(key: Callable[[T], Any]) -> Optional[Callable[[T], Any]]:
+    # avoid calling a key function at all for the natural order
+    return None if key is _natural_order else key
+
+
+class _FrozenSetBackedImmutableSet(ImmutableSet[T]):
+    """
+    Implementing class for the general case for ImmutableSet on interpreters without
+    deterministic dict iteration.  It keeps both a ``frozenset`` and a ``tuple`` of the elements.
+
+    This class should *never*
+    be directly instantiated by users or the ImmutableSet contract may fail to be satisfied!
+    """
+
+    __slots__ = "_set", "_iteration_order", "_positions", "_hash", "_top_level_type"
+
+    # pylint:disable=assigning-non-slot
+    def __init__(
+        self,
+        init_set: Iterable[T],
+        iteration_order: Sequence[T],
+        top_level_type: Optional[Type],
+    ) -> None:
+        self._set: FrozenSet[T] = frozenset(init_set)
+        self._iteration_order = tuple(iteration_order)
+        self._positions: Optional[Dict[T, int]] = None
+        # without this slot, _cached_hash would find the _hash method of
+        # collections.abc.Set
+        self._hash: Optional[int] = None
+        self._top_level_type = top_level_type
+
+    def _position_index(self) -> Mapping[T, int]:
+        if self._positions is None:
+            # racing threads will at worst both compute equal maps
+            self._positions = dict(
+                zip(self._iteration_order, range(len(self._iteration_order)))
+            )
+        return self._positions
+
+    def __iter__(self) -> Iterator[T]:
+        return self._iteration_order.__iter__()
+
+    def __len__(self) -> int:
+        return self._set.__len__()
+
+    def _native_set(self) -> AbstractSet[T]:
+        return self._set
+
+    def __contains__(self, item) -> bool:
+        return self._set.__contains__(item)
+
+    @overload
+    def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: Union[int, slice]
+    ) -> Union[T, Sequence[T]]:
+        if isinstance(index, slice):
+            return _slice_view(self, self._iteration_order, index)
+        return self._iteration_order[index]
+
+    def __eq__(self, other):
+        # pylint:disable=protected-access
+        if isinstance(other, AbstractSet):
+            return self._set == other
+        else:
+            return False
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = self._set.__hash__()
+        return self._hash
+
+    def __reduce__(self):
+        return (immutableset, (self._iteration_order,))
+
+
+class _SingletonImmutableSet(ImmutableSet[T]):
+    __slots__ = "_single_value", "_top_level_type", "_hash"
+
+    # pylint:disable=assigning-non-slot
+    def __init__(self, single_value: T, top_level_type: Optional[Type]) -> None:
+        self._single_value = single_value
+        self._top_level_type = top_level_type
+        self._hash: Optional[int] = None
+
+    def __iter__(self) -> Iterator[T]:
+        return iter((self._single_value,))
+
+    def __len__(self) -> int:
+        return 1
+
+    def __contains__(self, item) -> bool:
+        return self._single_value == item
+
+    def _position_index(self) -> Mapping[T, int]:
+        return {self._single_value: 0}
+
+    @overload
+    def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, item: Union[int, slice]
+    ) -> Union[T, Sequence[T]]:
+        # this works because Tuple can handle either type of index
+        if item == 0 or item == -1:
+            return self._single_value
+        elif isinstance(item, slice):
+            if item.step is None or item.step > 0:
+                if (
+                    (item.start is None and item.stop is None)
+                    or (item.start is None and (item.stop is None or item.stop >= 1))
+                    or (item.start <= 0 and (item.stop is None or item.stop >= 1))
+                ):
+                    return self
+                else:
+                    return _EMPTY
+            elif item.step < 0:
+                return self.__getitem__(slice(item.stop, item.start, -item.step))
+            else:
+                raise ValueError("Can't slice with step size of zero.")
+        else:
+            raise IndexError(f"Index {item} out-of-bounds for size 1 ImmutableSet")
+
+    def __eq__(self, other):
+        # pylint:disable=protected-access
+        if isinstance(other, AbstractSet):
+            return len(other) == 1 and self._single_value in other
+        else:
+            return False
 
     def __hash__(self):
-        return hash(frozenset((self._single_value,)))
+        # must match the hash of an equal frozenset
+        if self._hash is None:
+            self._hash = frozenset((self._single_value,)).__hash__()
+        return self._hash
 
     def __reduce__(self):
         return (immutableset, ((self._single_value,),))
 
 
+class _SmallImmutableSet(ImmutableSet[T]):
+    """
+    Implementing class for sets with a few elements.
+
+    For so few elements, checking containment by scanning a tuple is about as fast as
+    hashing, and it takes much less memory than a ``dict`` or ``frozenset``.  Since the
+    elements must be hashable anyway, the hash is computed up front.
+    """
+
+    __slots__ = "_elements", "_hash", "_top_level_type"
+
+    # pylint:disable=assigning-non-slot
+    def __init__(self, elements: Tuple[T, ...], top_level_type: Optional[Type]) -> None:
+        self._elements = elements
+        self._hash = frozenset(elements).__hash__()
+        self._top_level_type = top_level_type
+
+    def __iter__(self) -> Iterator[T]:
+        return self._elements.__iter__()
+
+    def __len__(self) -> int:
+        return self._elements.__len__()
+
+    def __contains__(self, item) -> bool:
+        return self._elements.__contains__(item)
+
+    def _position_of(self, value: Any) -> Optional[int]:
+        try:
+            return self._elements.index(value)
+        except ValueError:
+            return None
+
+    @overload
+    def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: Union[int, slice]
+    ) -> Union[T, Sequence[T]]:
+        if isinstance(index, slice):
+            return _slice_view(self, self._elements, index)
+        return self._elements[index]
+
+    def __reversed__(self) -> Iterator[T]:
+        return reversed(self._elements)
+
+    def __eq__(self, other):
+        if isinstance(other, AbstractSet):
+            return len(self) == len(other) and all(
+                map(other.__contains__, self._elements)
+            )
+        else:
+            return False
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (immutableset, (self._elements,))
+
+
+class _LazyImmutableSet(ImmutableSet[T]):
+    """
+    Implementing class for sets created by ``immutableset_lazy``.
+
+    Until it is first used, this just holds what it was created from.  Then the real set
+    is built (under a lock, so that is done only once) and every operation is delegated to
+    it.
+    """
+
+    __slots__ = "_source", "_options", "_materialized", "_verified_type", "_failure"
+
+    # pylint:disable=assigning-non-slot,protected-access
+    def __init__(self, source: Iterable[T], options: Optional[Dict[str, Any]]) -> None:
+        self._source: Optional[Iterable[T]] = source
+        self._options = options
+        self._materialized: Optional[ImmutableSet[T]] = None
+        # a type recorded before materializing, to be passed on to the real set
+        self._verified_type: Optional[Type] = None
+        self._failure: Optional[Exception] = None
+
+    def _materialize(self) -> ImmutableSet[T]:
+        materialized = self._materialized
+        if materialized is None:
+            with materialization_lock(self):
+                # another thread may have materialized this while we waited for the lock
+                materialized = self._materialized
+                if materialized is None:
+                    source = self._source
+                    if source is None:
+                        raise ValueError(
+                            "Lazy ImmutableSet was used while it was being materialized "
+                            "or after materializing it failed"
+                        ) from self._failure
+                    # the source may be a one-shot iterator, so it must never be reused
+                    self._source = None
+                    try:
+                        if self._options:
+                            materialized = immutableset(source, **self._options)
+                        else:
+                            materialized = immutableset(source)
+                    except Exception as e:
+                        self._failure = e
+                        raise
+                    self._options = None
+                    if self._verified_type is not None:
+                        _record_verified_type(materialized, self._verified_type)
+                    self._materialized = materialized
+        return materialized
+
+    @property
+    def _top_level_type(self) -> Optional[Type]:
+        materialized = self._materialized
+        if materialized is None:
+            return self._verified_type
+        return materialized._top_level_type  # type: ignore
+
+    @_top_level_type.setter
+    def _top_level_type(self, top_level_type: Optional[Type]) -> None:
+        with materialization_lock(self):
+            materialized = self._materialized
+            if materialized is None:
+                self._verified_type = top_level_type
+                return
+        materialized._top_level_type = top_level_type  # type: ignore
+
+    def __iter__(self) -> Iterator[T]:
+        return self._materialize().__iter__()
+
+    def __len__(self) -> int:
+        return self._materialize().__len__()
+
+    def __contains__(self, item) -> bool:
+        return self._materialize().__contains__(item)
+
+    @overload
+    def __getitem__(self, index: int) -> T:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[T]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: Union[int, slice]
+    ) -> Union[T, Sequence[T]]:
+        return self._materialize().__getitem__(index)
+
+    def __reversed__(self) -> Iterator[T]:
+        return self._materialize().__reversed__()
+
+    def union(
+        self, other: Iterable[T], check_top_type_matches: Optional[Type[T]] = None
+    ) -> "ImmutableSet[T]":
+        return self._materialize().union(other, check_top_type_matches)
+
+    def intersection(self, other: Iterable[Any]) -> "ImmutableSet[T]":
+        return self._materialize().intersection(other)
+
+    def difference(self, other: AbstractSet[Any]) -> "ImmutableSet[T]":
+        return self._materialize().difference(other)
+
+    def with_added(self, item: T) -> "ImmutableSet[T]":
+        return self._materialize().with_added(item)
+
+    def without(self, item: Any) -> "ImmutableSet[T]":
+        return self._materialize().without(item)
+
+    def _native_set(self) -> AbstractSet[T]:
+        return self._materialize()._native_set()
+
+    def _position_index(self) -> Mapping[T, int]:
+        return self._materialize()._position_index()
+
+    def _position_of(self, value: Any) -> Optional[int]:
+        return self._materialize()._position_of(value)
+
+    def _cached_hash(self) -> Optional[int]:
+        materialized = self._materialized
+        return None if materialized is None else materialized._cached_hash()
+
+    def _intern_key(self) -> Hashable:
+        return self._materialize()._intern_key()
+
+    def __eq__(self, other):
+        return self._materialize().__eq__(other)
+
+    def __hash__(self):
+        return self._materialize().__hash__()
+
+    def __reduce__(self):
+        return self._materialize().__reduce__()
+
+
+class _ImmutableIntSet(ImmutableSet[int], metaclass=ABCMeta):
+    """
+    Base for implementing classes of ``ImmutableSet`` which hold only ints.
+
+    Rather than boxing each element in a hash table, implementations keep the elements unboxed
+    in iteration order together with a sorted sequence of them, which is searched with
+    bisection for containment checks.  Set algebra between two such sets is done by merging
+    the sorted sequences.
+    """
+
+    __slots__ = ()
+
+    # every element has been checked to be an int
+    _top_level_type = int
+
+    @abstractmethod
+    def _values(self) -> Sequence[int]:
+        """
+        Get the elements of this set in iteration order.
+        """
+
+    @abstractmethod
+    def _sorted_values(self) -> Sequence[int]:
+        """
+        Get the elements of this set in ascending order.
+        """
+
+    def _is_sorted(self) -> bool:
+        """
+        Get whether the iteration order of this set is ascending.
+        """
+        return self._values() is self._sorted_values()
+
+    def _contains_int(self, value: int) -> bool:
+        return _in_sorted(self._sorted_values(), value)
+
+    def __iter__(self) -> Iterator[int]:
+        return self._values().__iter__()
+
+    def __reversed__(self) -> Iterator[int]:
+        return reversed(self._values())
+
+    def __len__(self) -> int:
+        return self._values().__len__()
+
+    def __contains__(self, item) -> bool:
+        as_int = _as_int(item)
+        return as_int is not None and self._contains_int(as_int)
+
+    @overload
+    def __getitem__(self, index: int) -> int:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[int]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: Union[int, slice]
+    ) -> Union[int, Sequence[int]]:
+        if isinstance(index, slice):
+            return _slice_view(self, self._values(), index)
+        return self._values()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, _ImmutableIntSet):
+            # pylint:disable=protected-access
+            return len(self) == len(other) and all(
+                map(eq, self._sorted_values(), other._sorted_values())
+            )
+        elif isinstance(other, AbstractSet):
+            return len(self) == len(other) and all(
+                map(other.__contains__, self._values())
+            )
+        else:
+            return False
+
+    def _native_set(self) -> AbstractSet[int]:
+        # containment is checked against our own storage, so nothing is copied
+        return _IntSetView(self)
+
+    def __hash__(self):
+        # must match the hash of an equal frozenset
+        if self._hash is None:  # type: ignore
+            self._hash = frozenset(self._values()).__hash__()  # type: ignore
+        return self._hash  # type: ignore
+
+    def union(
+        self, other: Iterable[int], check_top_type_matches: Optional[Type[int]] = None
+    ) -> "ImmutableSet[int]":
+        if not isinstance(other, _ImmutableIntSet) or check_top_type_matches:
+            return super().union(other, check_top_type_matches)
+        # pylint:disable=protected-access
+        new_sorted = _sorted_difference(other._sorted_values(), self._sorted_values())
+        if not new_sorted:
+            return self
+        elif not self:
+            return other
+        if other._is_sorted():
+            new_in_order: Iterable[int] = new_sorted
+        else:
+            new_in_order = filter(partial(_in_sorted, new_sorted), other._values())
+        values = array("q", self._values())
+        values.extend(new_in_order)
+        # sorting two concatenated sorted runs is a linear-time merge
+        return _immutableset_from_int_array(
+            values, array("q", sorted(chain(self._sorted_values(), new_sorted)))
+        )
+
+    def intersection(self, other: Iterable[Any]) -> "ImmutableSet[int]":
+        if isinstance(other, _ImmutableIntSet):
+            # pylint:disable=protected-access
+            common = _sorted_intersection(self._sorted_values(), other._sorted_values())
+            return self._sub_set(common, keep=True)
+        native_other = _native_set(other)
+        if native_other is None:
+            return super().intersection(other)
+        return self._filtered(filter(native_other.__contains__, self._values()))
+
+    def difference(self, other: AbstractSet[Any]) -> "ImmutableSet[int]":
+        if isinstance(other, _ImmutableIntSet):
+            # pylint:disable=protected-access
+            removed = _sorted_intersection(self._sorted_values(), other._sorted_values())
+            return self._sub_set(removed, keep=False)
+        native_other = _native_set(other)
+        if native_other is None:
+            return super().difference(other)
+        return self._filtered(filterfalse(native_other.__contains__, self._values()))
+
+    def _sub_set(self, sorted_members: array, *, keep: bool) -> "ImmutableSet[int]":
+        """
+        Get the subset of this set containing (if *keep*) or not containing (otherwise)
+        *sorted_members*, which must be a sorted subset of this set.
+        """
+        if not sorted_members:
+            return self if not keep else _EMPTY
+        elif len(sorted_members) == len(self):
+            return self if keep else _EMPTY
+        elif keep and self._is_sorted():
+            return _immutableset_from_int_array(sorted_members, sorted_members)
+        else:
+            filter_type = filter if keep else filterfalse
+            return _immutableset_from_int_array(
+                array(
+                    "q", filter_type(partial(_in_sorted, sorted_members), self._values())
+                )
+            )
+
+    def _filtered(self, values: Iterable[int]) -> "ImmutableSet[int]":
+        ret = array("q", values)
+        if len(ret) == len(self):
+            return self
+        return _immutableset_from_int_array(ret)
+
+
+class _IntSetView(AbstractSet[int]):
+    """
+    A read-only ``Set`` of the elements of an ``_ImmutableIntSet``.
+
+    Such sets use this rather than a ``frozenset`` in set operations with other sets,
+    since copying a large range or array into one would defeat the point of storing it
+    compactly.
+    """
+
+    __slots__ = ("_set",)
+
+    # pylint:disable=assigning-non-slot
+    def __init__(self, set_: _ImmutableIntSet) -> None:
+        self._set = set_
+
+    def __contains__(self, item) -> bool:
+        return self._set.__contains__(item)
+
+    def __iter__(self) -> Iterator[int]:
+        return self._set.__iter__()
+
+    def __len__(self) -> int:
+        return self._set.__len__()
+
+
+class _ArrayBackedImmutableSet(_ImmutableIntSet):
+    """
+    Implementing class for ImmutableSets of ints, requested by
+    ``immutableset(..., element_type=int)``.
+
+    Elements are stored unboxed in an ``array``, with a second, sorted ``array`` for
+    containment checks unless the iteration order is already sorted.
+    """
+
+    __slots__ = "_array", "_sorted", "_positions", "_hash"
+
+    # pylint:disable=assigning-non-slot
+    def __init__(self, values: array, sorted_values: Optional[array] = None) -> None:
+        # values is taken ownership of, not copied.  Callers must not retain it.
+        self._array = values
+        if sorted_values is None:
+            sorted_values = array("q", sorted(values))
+            if sorted_values == values:
+                # share the storage when the iteration order is sorted
+                sorted_values = values
+        self._sorted = sorted_values
+        self._positions: Optional[Dict[int, int]] = None
+        self._hash: Optional[int] = None
+
+    def _values(self) -> Sequence[int]:
+        return self._array
+
+    def _sorted_values(self) -> Sequence[int]:
+        return self._sorted
+
+    def _position_index(self) -> Mapping[int, int]:
+        if self._positions is None:
+            self._positions = dict(zip(self._array, range(len(self._array))))
+        return self._positions
+
+    def _position_of(self, value: Any) -> Optional[int]:
+        if self._array is self._sorted:
+            # the position in the iteration order is the position in the sorted order
+            as_int = _as_int(value)
+            if as_int is not None:
+                position = bisect_left(self._sorted, as_int)
+                if position < len(self._sorted) and self._sorted[position] == as_int:
+                    return position
+            return None
+        return super()._position_of(value)
+
+    def __reduce__(self):
+        return (_immutableset_from_int_array, (self._array,))
+
+
+class _RangeBackedImmutableSet(_ImmutableIntSet):
+    """
+    Implementing class for ImmutableSets created from a ``range``, which takes constant
+    memory regardless of the size of the range.
+    """
+
+    __slots__ = "_range", "_hash"
+
+    # pylint:disable=assigning-non-slot
+    def __init__(self, range_: range) -> None:
+        self._range = range_
+        self._hash: Optional[int] = None
+
+    def _values(self) -> Sequence[int]:
+        return self._range
+
+    def _sorted_values(self) -> Sequence[int]:
+        return self._range if self._range.step > 0 else self._range[::-1]
+
+    def _is_sorted(self) -> bool:
+        return self._range.step > 0
+
+    def _contains_int(self, value: int) -> bool:
+        return self._range.__contains__(value)
+
+    @overload
+    def __getitem__(self, index: int) -> int:  # pylint:disable=function-redefined
+        pass  # pragma: no cover
+
+    @overload
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: slice
+    ) -> Sequence[int]:
+        pass  # pragma: no cover
+
+    def __getitem__(  # pylint:disable=function-redefined
+        self, index: Union[int, slice]
+    ) -> Union[int, Sequence[int]]:
+        if isinstance(index, slice):
+            # a slice of a range is a range, so there is nothing to copy
+            return _immutableset_from_range(self._range[index])
+        return self._range[index]
+
+    def _position_of(self, value: Any) -> Optional[int]:
+        as_int = _as_int(value)
+        if as_int is not None and as_int in self._range:
+            return self._range.index(as_int)
+        return None
+
+    def intersection(self, other: Iterable[Any]) -> "ImmutableSet[int]":
+        native_other = _native_set(other)
+        if (
+            native_other is None
+            or isinstance(other, _ImmutableIntSet)
+            or len(native_other) >= len(self)
+        ):
+            return super().intersection(other)
+        # look up the elements of the smaller set in the range rather than scanning it
+        common = [
+            as_int
+            for as_int in map(_as_int, native_other)
+            if as_int is not None and as_int in self._range
+        ]
+        common.sort(reverse=self._range.step < 0)
+        return self._filtered(common)
+
+    def __eq__(self, other):
+        if isinstance(other, _RangeBackedImmutableSet):
+            # pylint:disable=protected-access
+            return self._sorted_values() == other._sorted_values()
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return super().__hash__()
+
+    def __reduce__(self):
+        return (immutableset, (self._range,))
+
+
+def _immutableset_from_int_array(
+    values: array, sorted_values: Optional[array] = None
+) -> "ImmutableSet[int]":
+    """
+    Get an ``ImmutableSet`` of *values*, which must be distinct, taking ownership of *values*
+    and *sorted_values* (which, if present, must be *values* in sorted order).
+    """
+    if len(values) > 1:
+        return _ArrayBackedImmutableSet(values, sorted_values)
+    elif values:
+        return _SingletonImmutableSet(values[0], int)
+    else:
+        return _EMPTY
+
+
+def _immutableset_from_range(range_: range) -> "ImmutableSet[int]":
+    if len(range_) > 1:
+        return _RangeBackedImmutableSet(range_)
+    elif range_:
+        return _SingletonImmutableSet(range_[0], int)
+    else:
+        return _EMPTY
+
+
+def _as_int(value: Any) -> Optional[int]:
+    """
+    Get the ``int`` equal to *value*, if there is one.
+    """
+    if type(value) is int:  # pylint:disable=unidiomatic-typecheck
+        return value
+    try:
+        as_int = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return as_int if as_int == value else None
+
+
+def _in_sorted(sorted_values: Sequence[int], value: int) -> bool:
+    position = bisect_left(sorted_values, value)
+    return position < len(sorted_values) and sorted_values[position] == value
+
+
+def _sorted_intersection(left: Sequence[int], right: Sequence[int]) -> array:
+    ret = array("q")
+    append = ret.append
+    left_iter = iter(left)
+    right_iter = iter(right)
+    try:
+        x = next(left_iter)
+        y = next(right_iter)
+        while True:
+            if x < y:
+                x = next(left_iter)
+            elif y < x:
+                y = next(right_iter)
+            else:
+                append(x)
+                x = next(left_iter)
+                y = next(right_iter)
+    except StopIteration:
+        return ret
+
+
+def _sorted_difference(left: Sequence[int], right: Sequence[int]) -> array:
+    ret = array("q")
+    append = ret.append
+    right_iter = iter(right)
+    y = next(right_iter, None)
+    for x in left:
+        while y is not None and y < x:
+            y = next(right_iter, None)
+        if x != y:
+            append(x)
+    return ret
+
+
 # Singleton instance for empty
 _EMPTY: ImmutableSet = _FrozenSetBackedImmutableSet((), (), None)
 
+
+def _native_set(obj: Any) -> Optional[AbstractSet[Any]]:
+    """
+    Get a built-in set-like object for *obj* if it is a built-in set or an ``ImmutableSet``
+    (so that set operations on it can run at C speed), and otherwise ``None``.
+    """
+    if isinstance(obj, (set, frozenset)):
+        return obj
+    elif isinstance(obj, ImmutableSet):
+        return obj._native_set()  # pylint:disable=protected-access
+    else:
+        return None
+
+
 # copied from VistaUtils' precondtions.py to avoid a dependency loop
 _ClassInfo = Union[type, Tuple[Union[type, Tuple], ...]]  # pylint:disable=invalid-name
 
 
-def _check_issubclass(item, classinfo: _ClassInfo):
-    if not issubclass(item, classinfo):
-        raise TypeError(
-            "Expected subclass of type {!r} but got {!r}".format(classinfo, type(item))
-        )
-    return item
+def _has_verified_type(elements: Iterable[Any], type_: Type) -> bool:
+    """
+    Get whether *elements* is an ``ImmutableSet`` whose elements are already known to be
+    instances of *type_*.
+    """
+    # pylint:disable=protected-access
+    if isinstance(elements, ImmutableSet):
+        verified_type = elements._top_level_type  # type: ignore
+        return verified_type is not None and issubclass(verified_type, type_)
+    return False
+
+
+def _record_verified_type(elements: Iterable[Any], type_: Type) -> None:
+    """
+    Record that the elements of *elements* have all been checked to be instances of
+    *type_*, if *elements* is an ``ImmutableSet`` and *type_* is more specific than what
+    was recorded.
+    """
+    # pylint:disable=protected-access
+    if isinstance(elements, ImmutableSet):
+        verified_type = elements._top_level_type  # type: ignore
+        if verified_type is None or issubclass(type_, verified_type):
+            try:
+                elements._top_level_type = type_  # type: ignore
+            except AttributeError:
+                # the element type of this implementation is fixed
+                pass
+
+
+def _check_element_type(elements: Iterable[Any], type_: Type) -> None:
+    """
+    Check that all of *elements* are instances of *type_*.
+
+    Because the most specific type an ``ImmutableSet`` has been checked against is
+    recorded, this only needs to look at its elements the first time it is checked against
+    a type which is not a supertype of the one recorded.
+    """
+    if not _has_verified_type(elements, type_):
+        _check_all_isinstance(elements, type_)
+        _record_verified_type(elements, type_)
+
+
+def _type_also_verified_for(verified_type: Optional[Type], item: Any) -> Optional[Type]:
+    """
+    Get the type the elements of a set whose elements are verified to be instances of
+    *verified_type* are still verified to be instances of once *item* is added.
+    """
+    if verified_type is not None and isinstance(item, verified_type):
+        return verified_type
+    return None
 
 
 def _check_all_isinstance(items: Iterable[Any], classinfo: _ClassInfo):
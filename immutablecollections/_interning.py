@@ -0,0 +1,208 @@
+from itertools import starmap, zip_longest
+from threading import Lock
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, TypeVar
+from weakref import KeyedRef
+
+from immutablecollections.immutablecollection import ImmutableCollection
+
+T = TypeVar("T")
+
+# enough to hold the working set of most applications without letting the table itself
+# become a memory problem
+_DEFAULT_MAX_SIZE = 100000
+
+
+class InternStatistics(NamedTuple):
+    """
+    Statistics about collections created with ``intern=True`` (see ``intern_statistics``).
+
+    *hits* counts collections for which an existing canonical instance was returned, and
+    *misses* those which became the canonical instance for their contents.  *evictions* counts
+    canonical instances dropped to keep the table within *max_size*, and *size* is the number
+    of canonical instances currently held.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+class _InternTable:
+    """
+    A table of canonical instances of immutable collections.
+
+    The table is keyed by the implementation and hash of the collections (see
+    ``ImmutableCollection._intern_key``), which collections with different contents may
+    share.  So each key maps to a list of candidate instances, and a collection is matched
+    to one with the same contents by ``same_contents``.  This keeps no copy of their
+    contents.
+
+    Canonical instances are only weakly referenced, so they can be garbage-collected when no
+    longer used elsewhere.  If the table is over its size bound, the least recently used
+    canonical instances are evicted.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        # kept in order from the least to the most recently used key
+        self._canonical: Dict[Hashable, List[KeyedRef]] = {}
+        self._size = 0
+        # references to collections which have been garbage-collected, which are removed
+        # from the table by the next thread to take the lock
+        self._dead: List[KeyedRef] = []
+        self._lock = Lock()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def intern(self, collection: T) -> T:
+        try:
+            key = collection._intern_key()  # type: ignore # pylint:disable=protected-access
+        except TypeError:
+            # collections with unhashable contents (e.g. dicts with list values) can't be
+            # looked up in the table
+            return collection
+        with self._lock:
+            self._remove_dead()
+            # re-insert to mark this as the most recently used
+            candidates = self._canonical.pop(key, [])
+            self._canonical[key] = candidates
+            # pylint:disable=protected-access
+            contents = collection._intern_contents  # type: ignore
+            for candidate in candidates:
+                canonical = candidate()
+                if canonical is not None and same_contents(
+                    canonical._intern_contents(), contents()
+                ):
+                    self.hits += 1
+                    return canonical
+            self.misses += 1
+            candidates.append(KeyedRef(collection, self._dead.append, key))
+            self._size += 1
+            while self._size > self.max_size:
+                # dicts are insertion ordered, so the first key is the least recently used
+                (oldest_key, oldest) = next(iter(self._canonical.items()))
+                del oldest[0]
+                if not oldest:
+                    del self._canonical[oldest_key]
+                self._size -= 1
+                self.evictions += 1
+            return collection
+
+    def _remove_dead(self) -> None:
+        """
+        Remove the references to garbage-collected collections from the table.
+
+        This must be called with the lock held.
+        """
+        while self._dead:
+            dead = self._dead.pop()
+            candidates = self._canonical.get(dead.key)
+            if candidates is None:
+                # already evicted or cleared
+                continue
+            for (index, candidate) in enumerate(candidates):
+                if candidate is dead:
+                    del candidates[index]
+                    if not candidates:
+                        del self._canonical[dead.key]
+                    self._size -= 1
+                    break
+
+    def statistics(self) -> InternStatistics:
+        with self._lock:
+            self._remove_dead()
+            return InternStatistics(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                size=self._size,
+                max_size=self.max_size,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._canonical.clear()
+            self._size = 0
+            self._dead.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+_INTERN_TABLE = _InternTable(_DEFAULT_MAX_SIZE)
+
+
+def intern_collection(collection: T) -> T:
+    """
+    Get the canonical instance of an immutable collection with the same contents, in the
+    same order, as *collection*.
+
+    If there is none, *collection* becomes the canonical instance.
+    """
+    return _INTERN_TABLE.intern(collection)
+
+
+def same_contents(first: Iterable[Any], second: Iterable[Any]) -> bool:
+    """
+    Get whether *first* and *second* have equal elements of the same types in the same
+    order.
+
+    The types are compared so that, for example, collections of ``1`` and of ``1.0`` are
+    interned separately.  They are compared within tuples, lists and immutable collections
+    nested in the elements as well, but not within any other values, which are only
+    compared with ``==``: so ``frozenset([1])`` and ``frozenset([1.0])`` are the same.
+    """
+    return all(starmap(_same_element, zip_longest(first, second, fillvalue=_MISSING)))
+
+
+_MISSING = object()
+
+
+def _same_element(first: Any, second: Any) -> bool:
+    if first is second:
+        return True
+    # pylint:disable=unidiomatic-typecheck
+    if type(first) is not type(second):
+        return False
+    if isinstance(first, (tuple, list)):
+        return same_contents(first, second)
+    if isinstance(first, ImmutableCollection):
+        # pylint:disable=protected-access
+        return first._intern_key() == second._intern_key() and same_contents(
+            first._intern_contents(), second._intern_contents()
+        )
+    return first == second
+
+
+def intern_statistics() -> InternStatistics:
+    """
+    Get hit, miss and size statistics for collections created with ``intern=True``.
+    """
+    return _INTERN_TABLE.statistics()
+
+
+def set_intern_max_size(max_size: int) -> None:
+    """
+    Set the maximum number of canonical instances kept for collections created with
+    ``intern=True``.
+
+    The least recently used instances will be evicted as new ones are added beyond this
+    size.  Evicted instances stay valid; they just won't be returned for future interning.
+    """
+    if max_size < 0:
+        raise ValueError(
+            f"Maximum intern table size must be non-negative but got {max_size}"
+        )
+    with _INTERN_TABLE._lock:  # pylint:disable=protected-access
+        _INTERN_TABLE.max_size = max_size
+
+
+def clear_intern_table() -> None:
+    """
+    Forget all canonical instances of collections created with ``intern=True`` and reset
+    the interning statistics.
+    """
+    _INTERN_TABLE.clear()
@@ -0,0 +1,17 @@
+from threading import RLock
+
+# Giving each lazy collection its own lock would make up most of its size, so they share a
+# fixed pool of locks instead.
+_NUM_LOCKS = 64
+_LOCKS = tuple(RLock() for _ in range(_NUM_LOCKS))
+
+
+def materialization_lock(lazy: object) -> RLock:
+    """
+    Get the lock to hold while materializing the lazy collection *lazy*.
+
+    The locks are re-entrant, so materializing one lazy collection may materialize others
+    which share its lock.
+    """
+    # objects are aligned to 16 bytes, so the low bits of their ids don't vary
+    return _LOCKS[(id(lazy) >> 4) % _NUM_LOCKS]
@@ -0,0 +1,88 @@
+"""
+Tracking of the types the keys and values of mappings and multidicts have been checked to be
+instances of.
+
+Each such collection records the most specific key and value types it has been checked
+against, and passes them on to collections derived from it, so that checking against the
+same types or their supertypes again takes constant time.  (Sets do the same for their
+elements with their ``_top_level_type``.)
+"""
+from typing import Any, Iterable, Optional, Tuple, Type
+
+# the key type and value type, either of which may be unknown
+VerifiedTypes = Tuple[Optional[Type], Optional[Type]]
+
+UNVERIFIED: VerifiedTypes = (None, None)
+
+
+def _needs_check(verified_type: Optional[Type], type_: Optional[Type]) -> bool:
+    return type_ is not None and (
+        verified_type is None or not issubclass(verified_type, type_)
+    )
+
+
+def _more_specific(verified_type: Optional[Type], type_: Type) -> Type:
+    if verified_type is None or issubclass(type_, verified_type):
+        return type_
+    return verified_type
+
+
+def check_item_types(
+    items: Iterable[Tuple[Any, Any]],
+    verified: VerifiedTypes,
+    key_type: Optional[Type],
+    value_type: Optional[Type],
+) -> VerifiedTypes:
+    """
+    Check that the keys of *items* are instances of *key_type* and the values instances of
+    *value_type*, raising a ``TypeError`` if not, and get the types they are then known to be
+    instances of.
+
+    Either type may be ``None`` to not check it.  *verified* holds the types the keys and
+    values are already known to be instances of, and *items* is not scanned at all if those
+    are subtypes of what is asked for.
+    """
+    (verified_key_type, verified_value_type) = verified
+    check_keys = _needs_check(verified_key_type, key_type)
+    check_values = _needs_check(verified_value_type, value_type)
+    if check_keys or check_values:
+        for (key, value) in items:
+            if check_keys and not isinstance(key, key_type):  # type: ignore
+                raise TypeError(
+                    f"Expected keys of type {key_type!r} but got type {type(key)!r} "
+                    f"for {key!r}"
+                )
+            if check_values and not isinstance(value, value_type):  # type: ignore
+                raise TypeError(
+                    f"Expected values of type {value_type!r} but got type "
+                    f"{type(value)!r} for {value!r}"
+                )
+    return (
+        _more_specific(verified_key_type, key_type) if check_keys else verified_key_type,
+        _more_specific(verified_value_type, value_type)
+        if check_values
+        else verified_value_type,
+    )
+
+
+def verified_types_with(verified: VerifiedTypes, key: Any, value: Any) -> VerifiedTypes:
+    """
+    Get the types which keys and values known to be instances of *verified* are still known
+    to be instances of once *key* and *value* are added.
+    """
+    (verified_key_type, verified_value_type) = verified
+    return (
+        verified_key_type
+        if verified_key_type is not None and isinstance(key, verified_key_type)
+        else None,
+        verified_value_type
+        if verified_value_type is not None and isinstance(value, verified_value_type)
+        else None,
+    )
+
+
+def swapped(verified: VerifiedTypes) -> VerifiedTypes:
+    """
+    Get the verified types of the inverse of a mapping with *verified* types.
+    """
+    return (verified[1], verified[0])
@@ -1,4 +1,5 @@
 import platform
+import sys
 
 # these next two variables are used when guarding against the user
 # initializing an ImmutableSet from something without deterministic
@@ -7,7 +8,7 @@ import platform
 # In Python 3.7+, the spec guarantees dicts have an iteration order
 # which matches insertion order
 _PYTHON_VERSION_GUARANTEES_DETERMINISTIC_DICT_ITERATION = (
-    platform.python_version_tuple() >= ("3", "7", "0")
+    sys.version_info >= (3, 7)
     or platform.python_implementation() == "PyPy"
 )
 
@@ -15,7 +16,7 @@ _PYTHON_VERSION_GUARANTEES_DETERMINISTIC_DICT_ITERATION = (
 # in 3.6+ as an implementation detail.  If other implementations
 # guarantee this as well, we can add them here.
 _PYTHON_IMPLEMENTATION_HAS_DETERMINISTIC_DICT_ITERATION = (
-    platform.python_version_tuple() >= ("3", "6", "0")
+    sys.version_info >= (3, 6)
     and platform.python_implementation() == "CPython"
 )
 
@@ -1,11 +1,12 @@
 from abc import ABCMeta, abstractmethod
-from typing import Generic, Iterable, Iterator, TypeVar
+from typing import Any, Generic, Hashable, Iterable, Iterator, TypeVar
 
 T = TypeVar("T")
 
 
 class ImmutableCollection(Generic[T], Iterable[T], metaclass=ABCMeta):
-    __slots__ = ()
+    # __weakref__ allows collections to be interned in weak-value tables
+    __slots__ = ("__weakref__",)
 
     @abstractmethod
     def __iter__(self) -> Iterator[T]:
@@ -15,6 +16,22 @@ class ImmutableCollection(Generic[T], Iterable[T], metaclass=ABCMeta):
     def __reduce__(self):
         raise NotImplementedError()
 
+    def _intern_key(self) -> Hashable:
+        """
+        Get a key which is equal for collections which may be interned as the same
+        instance if their ``_intern_contents`` are the same (see ``intern_collection``).
+
+        This raises ``TypeError`` if the collection has unhashable contents.
+        """
+        return (type(self), hash(self))
+
+    def _intern_contents(self) -> Iterable[Any]:
+        """
+        Get the contents of this collection which distinguish it from others with the same
+        ``_intern_key``, in order.
+        """
+        return self
+
     # TODO: of/empty needed to avoid warnings for attrib_opt_immutable, but are they a good idea?
     @staticmethod
     @abstractmethod
@@ -0,0 +1 @@
+Added `ImmutableBiDict`, made by `immutablebidict`, a dictionary with unique values whose `inverse` and `get_key` take constant time.
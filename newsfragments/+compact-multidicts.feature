@@ -0,0 +1 @@
+Added a `compact` argument to `immutablesetmultidict` which stores the multidict in compressed sparse row form, taking much less memory when there are many keys with few values each.
@@ -0,0 +1 @@
+Added `ImmutableDict.key_at` and `ImmutableDict.slice_by_position` for positional access to dictionaries.
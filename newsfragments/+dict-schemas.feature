@@ -0,0 +1 @@
+Added `immutabledict_schema`, whose `immutabledict` method makes dictionaries which all have the same keys and share one index of them, storing only their values.
@@ -0,0 +1 @@
+Added `ImmutableDict.union`, the `|` operator and `ImmutableDict.merge_all` for merging dictionaries, with an `on_conflict` policy for keys mapped to different values.
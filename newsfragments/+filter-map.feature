@@ -0,0 +1 @@
+Added `filter_values`, `filter_items`, `map_values` and `map_keys` to `ImmutableDict` and to the multidicts.
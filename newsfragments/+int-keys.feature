@@ -0,0 +1 @@
+Added a `key_type` argument to `immutabledict`.  With `key_type=int`, dictionaries whose keys are consecutive integers are stored as just a tuple of their values.
@@ -0,0 +1 @@
+Added an `intern` argument to `immutableset`, `immutabledict`, `immutablesetmultidict` and `immutablelistmultidict` which returns a previously interned equal collection rather than a new one.  The intern table is managed with `set_intern_max_size` and `clear_intern_table` and reported on by `intern_statistics`.
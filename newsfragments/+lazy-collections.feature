@@ -0,0 +1 @@
+Added `immutableset_lazy` and `immutabledict_lazy`, which defer building a collection from an iterable until it is first used.
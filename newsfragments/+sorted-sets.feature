@@ -0,0 +1 @@
+Added `ImmutableSortedSet`, made by `immutablesortedset` or `ImmutableSortedSet.builder`, which iterates in sorted order (optionally by a key function) and supports `floor`, `ceiling`, `range`, `rank` and `select` in logarithmic time.
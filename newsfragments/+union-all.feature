@@ -0,0 +1 @@
+Added `ImmutableSet.union_all`, `ImmutableSet.intersection_all` and `ImmutableSet.difference_all` for combining many sets at once.
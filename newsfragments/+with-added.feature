@@ -0,0 +1 @@
+Added `ImmutableSet.with_added` and `ImmutableSet.without` to get a copy of a set with one element added or removed, and `ImmutableDict.with_item` and `ImmutableDict.without_key` for dictionaries.
@@ -3,9 +3,15 @@ from collections.abc import Mapping
 from unittest import TestCase
 
 from immutablecollections import (
+    ImmutableBiDict,
     ImmutableDict,
+    ImmutableSet,
+    immutablebidict,
     immutabledict,
     immutabledict_from_unique_keys,
+    immutabledict_lazy,
+    immutabledict_schema,
+    immutableset,
 )
 
 from pytest import raises
@@ -48,6 +54,39 @@ class TestImmutableDict(TestCase):
         dict2 = dict1.modified_copy_builder().put_all({"c": "d", "e": "f"}).build()
         self.assertEqual(immutabledict({"a": 1, "c": "d", "e": "f"}), dict2)
 
+    def test_builder_reuse_after_build(self):
+        builder = ImmutableDict.builder()
+        builder.put_all((i, str(i)) for i in range(10))
+        first = builder.build()
+        # building hands the builder's dict to the built dictionary, so later changes must
+        # not be seen by it
+        builder.put(10, "10").put(3, "three")
+        second = builder.build()
+        self.assertEqual(immutabledict((i, str(i)) for i in range(10)), first)
+        self.assertEqual("3", first[3])
+        self.assertNotIn(10, first)
+        self.assertEqual("three", second[3])
+        self.assertEqual(11, len(second))
+
+    def test_modified_copy_builder(self):
+        source = immutabledict((i, str(i)) for i in range(20))
+        self.assertIs(source, source.modified_copy_builder().build())
+        builder = source.modified_copy_builder()
+        builder.put_all({3: "three", 30: "thirty"})
+        derived = builder.build()
+        self.assertEqual(list(range(20)) + [30], list(derived))
+        self.assertEqual("three", derived[3])
+        self.assertEqual("3", source[3])
+
+        # builders from dictionaries backed by a hash trie only apply the changes
+        persistent = source.with_item(20, "20")
+        hash(persistent)
+        derived = persistent.modified_copy_builder().put(3, "three").put(30, "30").build()
+        self.assertEqual(list(range(21)) + [30], list(derived))
+        self.assertEqual("three", derived[3])
+        self.assertEqual("3", persistent[3])
+        self.assertEqual(hash(immutabledict(list(derived.items()))), hash(derived))
+
     def test_hash_eq(self):
         dict1 = immutabledict({"a": 1, "b": 2})
         dict2 = immutabledict({"b": 2, "a": 1})
@@ -162,6 +201,10 @@ class TestImmutableDict(TestCase):
         immutabledict_from_unique_keys(good)
         immutabledict((x for x in good), forbid_duplicate_keys=True)
         immutabledict_from_unique_keys(x for x in good)
+        self.assertEqual(good, list(immutabledict_from_unique_keys(tuple(good)).items()))
+        # the keys of a mapping can't repeat
+        big = {i: str(i) for i in range(20)}
+        self.assertEqual(big, immutabledict_from_unique_keys(big))
 
     def test_inverse(self):
         self.assertEqual(
@@ -175,3 +218,478 @@ class TestImmutableDict(TestCase):
             match="forbid_duplicate_keys=True, but some keys occur multiple times in input: .*",
         ):
             immutabledict({"foo": "bar", "bat": "bar"}).inverse()
+
+    def test_with_item(self):
+        source = immutabledict([(1, "a"), (2, "b")])
+        added = source.with_item(3, "c")
+        self.assertEqual([(1, "a"), (2, "b"), (3, "c")], list(added.items()))
+        self.assertEqual(immutabledict([(1, "a"), (2, "b"), (3, "c")]), added)
+        self.assertEqual(hash(immutabledict([(1, "a"), (2, "b"), (3, "c")])), hash(added))
+        # the original is unchanged
+        self.assertEqual([(1, "a"), (2, "b")], list(source.items()))
+        # replacing a value keeps the key's position
+        replaced = added.with_item(1, "z")
+        self.assertEqual([(1, "z"), (2, "b"), (3, "c")], list(replaced.items()))
+        self.assertEqual("a", added[1])
+        self.assertIs(added, added.with_item(3, "c"))
+        with self.assertRaises(KeyError):
+            added[4]  # pylint:disable=pointless-statement
+        self.assertIsNone(added.get(4))
+        self.assertEqual(added, pickle.loads(pickle.dumps(added)))
+
+    def test_derived_hash(self):
+        source = immutabledict((i, str(i)) for i in range(100))
+        hash(source)
+        derived = [
+            source.with_item(100, "100"),
+            source.with_item(5, "new"),
+            source.without_key(7),
+            source.filter_keys(lambda key: key != 3),
+            source.modified_copy_builder().put(5, "new").put(100, "100").build(),
+        ]
+        for derived_dict in derived:
+            # the hash was computed when the dict was derived
+            # pylint:disable=protected-access
+            self.assertIsNotNone(derived_dict._cached_hash())
+            self.assertEqual(
+                hash(immutabledict(list(derived_dict.items()))), hash(derived_dict)
+            )
+        # items which mirror one another don't cancel out
+        self.assertNotEqual(hash(immutabledict()), hash(immutabledict({1: 1, 2: 2})))
+
+    def test_without_key(self):
+        source = immutabledict((i, str(i)) for i in range(100))
+        self.assertIs(source, source.without_key(100))
+        current = source
+        for i in range(0, 100, 2):
+            current = current.without_key(i)
+        self.assertEqual(immutabledict((i, str(i)) for i in range(1, 100, 2)), current)
+        self.assertEqual(list(range(1, 100, 2)), list(current))
+        self.assertEqual(100, len(source))
+        self.assertEqual(
+            [(1, "1"), (5, "5")], list(current.with_item(5, "5").items())[:3:2]
+        )
+        self.assertIs(immutabledict(), immutabledict({1: 2}).without_key(1))
+
+    def test_small(self):
+        for size in range(12):
+            items = [(i, str(i)) for i in range(size)]
+            for small in (
+                immutabledict(items),
+                immutabledict(dict(items)),
+                ImmutableDict.builder().put_all(items).build(),
+            ):
+                self.assertEqual(dict(items), small)
+                self.assertEqual(items, list(small.items()))
+                self.assertEqual(
+                    0 < size <= 8, type(small).__name__ == "_SmallImmutableDict"
+                )
+                self.assertEqual(size > 0, 0 in small)
+                self.assertNotIn(size, small)
+                self.assertIsNone(small.get(size))
+                with self.assertRaises(KeyError):
+                    small[size]  # pylint:disable=pointless-statement
+                self.assertEqual(
+                    hash(immutabledict(items + [(100, "100")]).without_key(100)),
+                    hash(small),
+                )
+                self.assertEqual(small, pickle.loads(pickle.dumps(small)))
+        self.assertEqual({"a": [1]}, immutabledict({"a": [1]}))
+
+    def test_check_types(self):
+        dict_ = immutabledict({"a": 1, "b": 2})
+        self.assertIs(dict_, dict_.check_types(str, int))
+        with self.assertRaises(TypeError):
+            dict_.check_types(key_type=int)
+        with self.assertRaises(TypeError):
+            dict_.check_types(value_type=str)
+        # checking against a supertype needs no scan
+        self.assertEqual((str, int), dict_.check_types(object, object)._verified_types())
+        # types are passed on to derived dictionaries
+        self.assertEqual(
+            (str, int), dict_.filter_keys(lambda k: k == "a")._verified_types()
+        )
+        self.assertEqual((str, int), dict_.with_item("c", 3)._verified_types())
+        self.assertEqual((None, int), dict_.with_item(3, 3)._verified_types())
+        self.assertEqual((str, int), dict_.without_key("a")._verified_types())
+        self.assertEqual((int, str), dict_.inverse()._verified_types())
+        with self.assertRaises(TypeError):
+            dict_.with_item(3, 3).check_types(key_type=str)
+
+    def test_lazy(self):
+        consumed = []
+
+        def items():
+            for item in [(1, "a"), (2, "b")]:
+                consumed.append(item)
+                yield item
+
+        lazy = immutabledict_lazy(items())
+        self.assertIsInstance(lazy, ImmutableDict)
+        self.assertEqual([], consumed)
+        self.assertEqual("a", lazy[1])
+        self.assertEqual(2, len(consumed))
+        self.assertEqual({1: "a", 2: "b"}, lazy)
+        self.assertEqual(lazy, immutabledict_lazy({1: "a", 2: "b"}))
+        self.assertEqual([(1, "a"), (2, "b")], list(lazy.items()))
+        self.assertEqual(hash(immutabledict({1: "a", 2: "b"})), hash(lazy))
+        self.assertEqual({1: "a", 2: "b", 3: "c"}, lazy.with_item(3, "c"))
+        self.assertEqual(lazy, pickle.loads(pickle.dumps(lazy)))
+        self.assertEqual(2, len(consumed))
+
+        existing = immutabledict({1: 2})
+        self.assertIs(existing, immutabledict_lazy(existing))
+        self.assertIs(immutabledict(), immutabledict_lazy())
+        lazy_bad = immutabledict_lazy([(1, 2), (1, 3)], forbid_duplicate_keys=True)
+        with self.assertRaisesRegex(ValueError, "[Dd]uplicate"):
+            lazy_bad.get(1)
+        # later uses still report why materializing failed
+        with self.assertRaises(ValueError) as context:
+            len(lazy_bad)
+        self.assertRegex(str(context.exception.__cause__), "[Dd]uplicate")
+
+        # recording types doesn't consume the source
+        consumed.clear()
+        typed = immutabledict_lazy(items())
+        typed._record_verified_types((int, str))
+        self.assertEqual([], consumed)
+        self.assertEqual((int, str), typed._verified_types())
+        self.assertEqual({1: "a", 2: "b"}, typed)
+        self.assertEqual((int, str), typed._verified_types())
+
+    def test_schema(self):
+        schema = immutabledict_schema(["word", "pos", "lemma"])
+        self.assertEqual(("word", "pos", "lemma"), schema.keys())
+        token = schema.immutabledict(["ran", "VBD", "run"])
+        other = schema.immutabledict(("dog", "NN", "dog"))
+        regular = immutabledict([("word", "ran"), ("pos", "VBD"), ("lemma", "run")])
+        self.assertIsInstance(token, ImmutableDict)
+        self.assertEqual(regular, token)
+        self.assertEqual(token, regular)
+        self.assertEqual(hash(regular), hash(token))
+        self.assertNotEqual(token, other)
+        self.assertEqual(["word", "pos", "lemma"], list(token))
+        self.assertEqual(
+            [("word", "dog"), ("pos", "NN"), ("lemma", "dog")], list(other.items())
+        )
+        self.assertEqual("VBD", token["pos"])
+        self.assertIn("lemma", token)
+        self.assertNotIn("tag", token)
+        self.assertIsNone(token.get("tag"))
+        with self.assertRaises(KeyError):
+            token["tag"]  # pylint:disable=pointless-statement
+        self.assertEqual(regular, pickle.loads(pickle.dumps(token)))
+
+        # replacing a value keeps the schema, while adding a key does not
+        self.assertIs(token, token.with_item("pos", "VBD"))
+        hash(token)
+        changed = token.with_item("pos", "VBN")
+        self.assertEqual(regular.with_item("pos", "VBN"), changed)
+        self.assertEqual(hash(regular.with_item("pos", "VBN")), hash(changed))
+        self.assertEqual("ran", changed["word"])
+        self.assertEqual("VBD", token["pos"])
+        self.assertEqual(
+            {"word": "ran", "pos": "VBD", "lemma": "run", "tag": 1},
+            token.with_item("tag", 1),
+        )
+        self.assertEqual({"word": "ran", "lemma": "run"}, token.without_key("pos"))
+
+        with self.assertRaises(ValueError):
+            schema.immutabledict(["ran", "VBD"])
+        with self.assertRaises(ValueError):
+            immutabledict_schema(["a", "b", "a"])
+
+    def test_union(self):
+        base = immutabledict([(i, str(i)) for i in range(20)])
+        overrides = immutabledict({3: "three", 30: "thirty"})
+        merged = base.union(overrides)
+        self.assertEqual(list(range(20)) + [30], list(merged))
+        self.assertEqual("three", merged[3])
+        self.assertEqual(merged, base | overrides)
+        self.assertEqual(merged, base | {3: "three", 30: "thirty"})
+        self.assertEqual("3", base.union(overrides, on_conflict="keep_first")[3])
+        self.assertEqual(
+            "3three", base.union(overrides, on_conflict=lambda x, y: x + y)[3]
+        )
+        with self.assertRaisesRegex(ValueError, r"\[3\]"):
+            base.union(overrides, on_conflict="raise")
+        with self.assertRaises(ValueError):
+            base.union(overrides, on_conflict="keep_middle")
+
+        # nothing new means no copy
+        self.assertIs(base, base.union(immutabledict()))
+        self.assertIs(base, base | {3: base[3], 4: base[4]})
+        self.assertIs(base, base.union({3: "three"}, on_conflict="keep_first"))
+        self.assertIs(base, base.union({3: "3"}, on_conflict="raise"))
+        self.assertIs(overrides, immutabledict().union(overrides))
+        self.assertEqual({1: 2}, immutabledict().union({1: 2}))
+        # values which are equal but not the same are still replaced
+        replaced = immutabledict([(1, 1)]).union(immutabledict([(1, 1.0)]))
+        self.assertIs(float, type(replaced[1]))
+        self.assertIs(int, type(immutabledict([(1, 1)]).union({1: 1.0}, "raise")[1]))
+
+    def test_merge_all(self):
+        layers = [{"a": 1, "b": 1}, immutabledict({"b": 2, "c": 2}), {}, {"c": 3, "d": 3}]
+        self.assertEqual(
+            [("a", 1), ("b", 2), ("c", 3), ("d", 3)],
+            list(ImmutableDict.merge_all(layers).items()),
+        )
+        self.assertEqual(
+            {"a": 1, "b": 1, "c": 2, "d": 3},
+            ImmutableDict.merge_all(layers, on_conflict="keep_first"),
+        )
+        self.assertEqual(
+            {"a": 1, "b": 3, "c": 5, "d": 3},
+            ImmutableDict.merge_all(layers, on_conflict=lambda x, y: x + y),
+        )
+        with self.assertRaises(ValueError):
+            ImmutableDict.merge_all(layers, on_conflict="raise")
+        self.assertIs(immutabledict(), ImmutableDict.merge_all([]))
+        first = immutabledict({"a": 1})
+        self.assertIs(first, ImmutableDict.merge_all([{}, first, {"a": 1}]))
+        self.assertIs(float, type(ImmutableDict.merge_all([first, {"a": 1.0}])["a"]))
+
+    def test_transforms(self):
+        source = immutabledict((i, str(i)) for i in range(20))
+        hash(source)
+        self.assertIs(source, source.filter_keys(lambda key: key < 100))
+        self.assertIs(source, source.filter_values(lambda value: value))
+        self.assertIs(source, source.filter_items(lambda key, value: str(key) == value))
+        self.assertIs(source, source.map_values(lambda value: value))
+        self.assertIs(source, source.map_keys(lambda key: key))
+
+        odd = source.filter_items(lambda key, value: key % 2 == 1 and value != "5")
+        self.assertEqual([1, 3, 7, 9, 11, 13, 15, 17, 19], list(odd))
+        self.assertEqual(hash(immutabledict(list(odd.items()))), hash(odd))
+        self.assertEqual(
+            {1: "1", 10: "10"}, source.filter_values(lambda v: v in ("1", "10"))
+        )
+        mapped = source.map_values(lambda value: value + "!")
+        self.assertEqual(list(source), list(mapped))
+        self.assertEqual("3!", mapped[3])
+        self.assertEqual([-i for i in range(20)], list(source.map_keys(lambda k: -k)))
+
+        # keys mapped to the same key are resolved by on_conflict
+        halves = {0: "a", 1: "b", 2: "c"}
+        with self.assertRaises(ValueError):
+            immutabledict(halves).map_keys(lambda k: k // 2)
+        self.assertEqual(
+            {0: "b", 1: "c"},
+            immutabledict(halves).map_keys(lambda k: k // 2, on_conflict="keep_last"),
+        )
+        self.assertEqual(
+            {0: "ab", 1: "c"},
+            immutabledict(halves).map_keys(lambda k: k // 2, on_conflict=str.__add__),
+        )
+        self.assertEqual(
+            {0: "a"}, immutabledict({0: "a", 1: "a"}).map_keys(lambda k: k // 2)
+        )
+        # each conflicting key is reported once
+        words = immutabledict((f"w{i}", i) for i in range(20))
+        with self.assertRaisesRegex(ValueError, r"values: \[2, 3\]$"):
+            words.map_keys(len)
+        # identical values never conflict, even if they are unequal to themselves
+        nan = float("nan")
+        self.assertIs(
+            nan, immutabledict({0: nan, 1: nan}).map_keys(lambda k: k // 2)[0]
+        )
+
+        # schema dictionaries keep their schema when their values are mapped
+        token = immutabledict_schema(["word", "lemma"]).immutabledict(["ran", "run"])
+        upper = token.map_values(str.upper)
+        self.assertEqual({"word": "RAN", "lemma": "RUN"}, upper)
+        self.assertIs(type(token), type(upper))
+        self.assertIs(token, token.map_values(lambda value: value))
+
+        typed = source.check_types(int, str)
+        self.assertEqual((int, str), typed.filter_values(bool)._verified_types())
+        self.assertEqual((int, None), typed.map_values(len)._verified_types())
+        self.assertEqual((None, str), typed.map_keys(str)._verified_types())
+
+    def test_int_keys(self):
+        names = [f"name{i}" for i in range(100)]
+        dense = immutabledict(enumerate(names))
+        sparse = immutabledict(
+            ((i * 3, name) for (i, name) in enumerate(names)), key_type=int
+        )
+        shuffled_keys = list(range(50, 100)) + list(range(50))
+        shuffled = immutabledict(((i, str(i)) for i in shuffled_keys), key_type=int)
+        for (dict_, keys, values) in (
+            (dense, range(100), names),
+            (sparse, range(0, 300, 3), names),
+            (shuffled, shuffled_keys, [str(i) for i in shuffled_keys]),
+        ):
+            regular = dict(zip(keys, values))
+            self.assertEqual(regular, dict_)
+            self.assertEqual(dict_, immutabledict(regular.items()))
+            self.assertEqual(hash(immutabledict(regular.items())), hash(dict_))
+            self.assertEqual(list(keys), list(dict_))
+            self.assertEqual(list(values), list(dict_.values()))
+            self.assertEqual(values[1], dict_[keys[1]])
+            self.assertEqual(values[1], dict_.get(keys[1]))
+            for missing in (-1, 1000, 1.5, "1", None):
+                self.assertNotIn(missing, dict_)
+                self.assertIsNone(dict_.get(missing))
+                with self.assertRaises(KeyError):
+                    dict_[missing]  # pylint:disable=pointless-statement
+            # keys which are equal to ints find them
+            self.assertEqual(regular[keys[1]], dict_[float(keys[1])])
+            self.assertEqual(regular[0], dict_[False])
+            self.assertEqual(dict_, pickle.loads(pickle.dumps(dict_)))
+            self.assertEqual(regular, dict_.with_item(-5, "x").without_key(-5))
+        self.assertNotIn(1, sparse)
+        self.assertEqual((int, None), sparse._verified_types())
+
+        # keys which only look dense are stored as usual
+        self.assertEqual([0, 1.0, 2], list(immutabledict({0: 0, 1.0: 1, 2: 2})))
+        self.assertEqual(
+            [0, True] + list(range(2, 10)),
+            list(immutabledict([(0, 0), (True, 1)] + [(i, i) for i in range(2, 10)])),
+        )
+        with self.assertRaises(TypeError):
+            immutabledict([("a", 1)], key_type=int)
+        with self.assertRaises(ValueError):
+            immutabledict([("a", 1)], key_type=str)
+
+    def test_key_set(self):
+        names = [f"key{i}" for i in range(20)]
+        schema = immutabledict_schema(["word", "lemma"])
+        for dict_ in (
+            immutabledict(),
+            immutabledict({"a": 1}),
+            immutabledict({"a": 1, "b": 2}),
+            immutabledict((name, i) for (i, name) in enumerate(names)),
+            immutabledict((name, i) for (i, name) in enumerate(names)).with_item("x", 1),
+            immutabledict_lazy((name, i) for (i, name) in enumerate(names)),
+            immutabledict(((i, i) for i in range(20)), key_type=int),
+            immutabledict(((i, i) for i in range(0, 40, 3)), key_type=int),
+            schema.immutabledict(["ran", "run"]),
+        ):
+            key_set = dict_.key_set()
+            self.assertIsInstance(key_set, ImmutableSet)
+            self.assertEqual(immutableset(dict_.keys()), key_set)
+            self.assertEqual(hash(immutableset(dict_.keys())), hash(key_set))
+            self.assertEqual(list(dict_), list(key_set))
+            for key in dict_:
+                self.assertIn(key, key_set)
+            self.assertNotIn("missing", key_set)
+            self.assertEqual(key_set, pickle.loads(pickle.dumps(key_set)))
+
+        # the key set is a view of the dictionary's storage, so it is cached or shared
+        large = immutabledict((name, i) for (i, name) in enumerate(names))
+        self.assertIs(large.key_set(), large.key_set())
+        self.assertEqual(
+            ["key0", "key1"], list(large.key_set().intersection(["key1", "key0", "z"]))
+        )
+        self.assertEqual(
+            immutableset(names[2:]), large.key_set().difference(["key0", "key1"])
+        )
+        self.assertIs(
+            schema.immutabledict(["ran", "run"]).key_set(),
+            schema.immutabledict(["walked", "walk"]).key_set(),
+        )
+
+    def test_positional_access(self):
+        names = [f"key{i}" for i in range(20)]
+        schema = immutabledict_schema(["word", "pos", "lemma"])
+        for dict_ in (
+            immutabledict({"a": 1, "b": 2, "c": 3}),
+            immutabledict((name, i) for (i, name) in enumerate(names)),
+            immutabledict((name, i) for (i, name) in enumerate(names)).with_item("x", 1),
+            immutabledict_lazy((name, i) for (i, name) in enumerate(names)),
+            immutabledict(((i, str(i)) for i in range(20)), key_type=int),
+            immutabledict(((i, str(i)) for i in range(60, 0, -3)), key_type=int),
+            schema.immutabledict(["ran", "VERB", "run"]),
+        ):
+            items = list(dict_.items())
+            for index in (0, 1, len(items) - 1, -1, -len(items)):
+                self.assertEqual(items[index][0], dict_.key_at(index))
+                self.assertEqual(items[index][1], dict_.value_at(index))
+                self.assertEqual(items[index], dict_.item_at(index))
+            for index in (len(items), -len(items) - 1):
+                with self.assertRaisesRegex(
+                    IndexError, "out of range for an ImmutableDict"
+                ):
+                    dict_.key_at(index)
+                with self.assertRaises(IndexError):
+                    dict_.value_at(index)
+            for (index, (key, _)) in enumerate(items):
+                self.assertEqual(index, dict_.index_of_key(key))
+            for missing in ("missing", -100):
+                with self.assertRaises(ValueError):
+                    dict_.index_of_key(missing)
+
+            for (start, stop, step) in (
+                (1, 3, None),
+                (None, 2, None),
+                (-2, None, None),
+                (None, None, 2),
+                (None, None, -1),
+                (5, 1, None),
+            ):
+                sliced = dict_.slice_by_position(start, stop, step)
+                self.assertIsInstance(sliced, ImmutableDict)
+                self.assertEqual(items[start:stop:step], list(sliced.items()))
+            self.assertIs(dict_, dict_.slice_by_position())
+            self.assertIs(dict_, dict_.slice_by_position(0, len(items) + 5))
+
+        # paging through a dictionary
+        large = immutabledict((name, i) for (i, name) in enumerate(names))
+        self.assertEqual(
+            [list(names[i : i + 8]) for i in range(0, 20, 8)],
+            [list(large.slice_by_position(i, i + 8)) for i in range(0, 20, 8)],
+        )
+        large.check_types(str, int)
+        self.assertEqual((str, int), large.slice_by_position(2, 4)._verified_types())
+
+    def test_bidict(self):
+        tokens = ["the", "cat", "sat", "on", "mat"]
+        bidict = immutablebidict((token, i) for (i, token) in enumerate(tokens))
+        self.assertIsInstance(bidict, ImmutableBiDict)
+        self.assertEqual(
+            immutabledict((token, i) for (i, token) in enumerate(tokens)), bidict
+        )
+        self.assertEqual(tokens, list(bidict))
+
+        inverse = bidict.inverse()
+        self.assertIsInstance(inverse, ImmutableBiDict)
+        self.assertEqual(dict(enumerate(tokens)), inverse)
+        self.assertEqual(list(range(5)), list(inverse))
+        # the inverse is built once and the two refer to each other
+        self.assertIs(inverse, bidict.inverse())
+        self.assertIs(bidict, inverse.inverse())
+        self.assertEqual(bidict.inverse(), ImmutableDict.inverse(bidict))
+
+        self.assertEqual("sat", bidict.get_key(2))
+        self.assertEqual(2, inverse.get_key("sat"))
+        self.assertIsNone(bidict.get_key(10))
+        self.assertEqual("?", bidict.get_key(10, "?"))
+
+        self.assertIs(bidict, immutablebidict(bidict))
+        self.assertIs(bidict, immutabledict(bidict))
+        self.assertEqual(bidict, immutablebidict(dict(bidict)))
+        self.assertEqual(hash(immutabledict(bidict.items())), hash(bidict))
+        self.assertIs(immutablebidict(), immutablebidict({}))
+        self.assertIs(immutablebidict(), immutablebidict().inverse())
+
+        unpickled = pickle.loads(pickle.dumps(bidict))
+        self.assertIsInstance(unpickled, ImmutableBiDict)
+        self.assertEqual(bidict, unpickled)
+        self.assertEqual(inverse, unpickled.inverse())
+
+        # types checked in one direction are known in the other
+        bidict.check_types(str, int)
+        self.assertEqual((int, str), inverse._verified_types())
+
+        # derived dictionaries are ordinary ones
+        self.assertEqual({"the": 0, "cat": 1}, bidict.filter_values(lambda i: i < 2))
+        self.assertEqual(dict(bidict, dog=0), bidict.with_item("dog", 0))
+
+        # as for immutabledict, the last value for a key wins
+        self.assertEqual(
+            {"a": 2, "b": 1}, immutablebidict([("a", 1), ("b", 1), ("a", 2)])
+        )
+        with self.assertRaisesRegex(ValueError, "'a' and 'b' are both mapped to 1"):
+            immutablebidict([("a", 1), ("b", 1)])
+        with self.assertRaises(TypeError):
+            immutablebidict(5)
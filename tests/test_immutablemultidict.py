@@ -1,6 +1,7 @@
 import pickle
 from collections.abc import Mapping
 from unittest import TestCase
+from unittest.mock import patch
 
 from immutablecollections import (
     ImmutableListMultiDict,
@@ -27,6 +28,24 @@ class TestImmutableSetMultiDict(TestCase):
         empty4 = ImmutableSetMultiDict.of(dict())
         self.assertIs(empty1, empty4)
 
+    def test_keys(self):
+        for multidict in (
+            immutablesetmultidict([(1, "a"), (2, "b"), (1, "c")]),
+            immutablelistmultidict([(1, "a"), (2, "b"), (1, "c")]),
+            immutablelistmultidict((i % 10, i) for i in range(100)),
+            immutablesetmultidict((f"key{i % 10}", i) for i in range(100)),
+        ):
+            keys = multidict.keys()
+            self.assertIsInstance(keys, ImmutableSet)
+            self.assertEqual(multidict.as_dict().key_set(), keys)
+            self.assertEqual(list(multidict.as_dict()), list(keys))
+            self.assertEqual(immutableset(multidict.as_dict()), keys)
+            self.assertIn(next(iter(multidict.as_dict())), keys)
+            self.assertNotIn(20, keys)
+        self.assertEqual(immutableset(), immutablesetmultidict().keys())
+        # the keys of larger multidicts are a cached view of their storage
+        self.assertIs(multidict.keys(), multidict.keys())
+
     def test_set_repr(self):
         self.assertEqual(
             "i{1: {2, 3}, 4: {5, 6}}",
@@ -44,6 +63,112 @@ class TestImmutableSetMultiDict(TestCase):
         self.assertEqual(ImmutableSet.of([2, 3]), x[1])
         y = immutablesetmultidict([(1, 2), (1, 2), (1, 3), (4, 5), (4, 6)])
         self.assertEqual(immutableset([2, 3]), y[1])
+        self.assertEqual([1, 4], list(y.keys()))
+        self.assertEqual([(1, 2), (1, 3), (4, 5), (4, 6)], list(y.items()))
+        self.assertEqual(y, x)
+        self.assertEqual(hash(y), hash(x))
+
+    def test_of_mapping(self):
+        group = immutableset([3, 4])
+        x = immutablesetmultidict({1: {2}, 2: [], 3: group, 4: (x for x in [5, 5])})
+        self.assertEqual([1, 3, 4], list(x.keys()))
+        self.assertEqual(immutableset([2]), x[1])
+        self.assertEqual(immutableset([5]), x[4])
+        # groups which are already sets are not copied
+        self.assertIs(group, x[3])
+
+    @patch(
+        "immutablecollections._immutablemultidict.DICT_ITERATION_IS_DETERMINISTIC", False
+    )
+    def test_of_without_deterministic_dict_iteration(self):
+        x = ImmutableSetMultiDict.of({1: [2, 2, 3], 4: [5, 6]})
+        self.assertEqual([(1, 2), (1, 3), (4, 5), (4, 6)], list(x.items()))
+        y = immutablesetmultidict([(1, 2), (1, 2), (1, 3), (4, 5), (4, 6)])
+        self.assertEqual(x, y)
+        self.assertEqual(immutableset([3, 4]), immutablesetmultidict({2: {3, 4}})[2])
+        group = immutableset([3, 4])
+        self.assertIs(group, immutablesetmultidict({2: group, 3: []})[2])
+        self.assertEqual([1, 4], list(x.keys()))
+        self.assertIsInstance(x.keys(), ImmutableSet)
+        compact = immutablesetmultidict([(1, 2), (1, 2), (1, 3), (4, 5)], compact=True)
+        self.assertIsNot(type(x), type(compact))
+        self.assertEqual([(1, 2), (1, 3), (4, 5)], list(compact.items()))
+
+    def test_compact(self):
+        pairs = [(i % 7, i) for i in range(100)] + [("x", 1), ("x", 1), ("y", 2)]
+        regular = immutablesetmultidict(pairs)
+        compact = immutablesetmultidict(pairs, compact=True)
+        self.assertIsInstance(compact, ImmutableSetMultiDict)
+        self.assertIsNot(type(regular), type(compact))
+        self.assertEqual(regular, compact)
+        self.assertEqual(compact, regular)
+        self.assertEqual(hash(regular), hash(compact))
+        self.assertEqual(len(regular), len(compact))
+        self.assertEqual(list(regular.items()), list(compact.items()))
+        self.assertEqual(regular.keys(), compact.keys())
+        self.assertEqual(list(regular.keys()), list(compact.keys()))
+        self.assertEqual(dict(regular.as_dict()), dict(compact.as_dict()))
+        self.assertIn("x", compact)
+        self.assertNotIn("z", compact)
+        self.assertEqual(immutableset(), compact["z"])
+        self.assertEqual(immutableset([1]), compact["x"])
+        # groups are views which check containment by scanning small groups and
+        # indexing larger ones
+        for key in (0, "y"):
+            group = compact[key]
+            self.assertIsInstance(group, ImmutableSet)
+            self.assertEqual(regular[key], group)
+            self.assertEqual(hash(regular[key]), hash(group))
+            self.assertEqual(list(regular[key]), list(group))
+            for value in regular[key]:
+                self.assertIn(value, group)
+                self.assertEqual(regular[key].index(value), group.index(value))
+            self.assertNotIn(1, group)
+            self.assertEqual(list(regular[key])[1:3], list(group[1:3]))
+        # values of several large groups are found in each of those groups only
+        shared = immutablesetmultidict(
+            [(key, value) for key in "ab" for value in range(20)]
+            + [("c", value) for value in range(10, 40)],
+            compact=True,
+        )
+        self.assertEqual(5, shared["b"].index(5))
+        self.assertIn(5.0, shared["a"])
+        self.assertNotIn(5, shared["c"])
+        self.assertEqual(2, shared["c"].index(12))
+        self.assertNotIn(30, shared["a"])
+        self.assertIs(compact, immutablesetmultidict(compact, compact=True))
+        self.assertIs(compact, compact.map_keys(lambda k: k))
+        self.assertEqual(compact, immutablesetmultidict(regular, compact=True))
+        self.assertEqual(
+            regular.filter_values(lambda v: v % 2 == 0),
+            compact.filter_values(lambda v: v % 2 == 0),
+        )
+        self.assertEqual(
+            regular.map_keys(lambda k: "all"), compact.map_keys(lambda k: "all")
+        )
+        self.assertEqual(
+            regular.modified_copy_builder().put(0, -1).build(),
+            compact.modified_copy_builder().put(0, -1).build(),
+        )
+        self.assertNotEqual(immutablelistmultidict(pairs), compact)
+        unpickled = pickle.loads(pickle.dumps(compact))
+        self.assertEqual(compact, unpickled)
+        self.assertIs(type(compact), type(unpickled))
+        self.assertIs(
+            immutablesetmultidict(), immutablesetmultidict({1: []}, compact=True)
+        )
+
+    def test_group_by(self):
+        words = ["apple", "avocado", "banana", "apple", "cherry", "blueberry"]
+        grouped = ImmutableSetMultiDict.group_by(words, lambda word: word[0])
+        self.assertEqual(
+            immutablesetmultidict((word[0], word) for word in words), grouped
+        )
+        self.assertEqual(["a", "b", "c"], list(grouped.keys()))
+        self.assertEqual(["apple", "avocado"], list(grouped["a"]))
+        self.assertIs(
+            immutablesetmultidict(), ImmutableSetMultiDict.group_by([], lambda x: x)
+        )
 
     def test_unmodified_copy_builder(self):
         ref: ImmutableSetMultiDict[str, int] = (
@@ -56,6 +181,21 @@ class TestImmutableSetMultiDict(TestCase):
 
         self.assertEqual(ref, ref.modified_copy_builder().build())
 
+    def test_modified_copy_builder_reuses_groups(self):
+        start = immutablesetmultidict([("foo", 5), ("bar", 6), ("foo", 4)])
+        updated = start.modified_copy_builder().put("bar", 6).put("foo", 7).build()
+        self.assertEqual([5, 4, 7], list(updated["foo"]))
+        self.assertEqual([5, 4], list(start["foo"]))
+        # only the value groups which were added to are copied
+        self.assertIs(start["bar"], updated["bar"])
+
+    def test_modified_copy_builder_typed_group(self):
+        start = ImmutableSetMultiDict.of(
+            {"foo": ImmutableSet.builder(int).add(5).build()}
+        )
+        updated = start.modified_copy_builder().put("foo", "a").build()
+        self.assertEqual([5, "a"], list(updated["foo"]))
+
     def test_modified_copy_builder(self):
         start: ImmutableSetMultiDict[str, int] = (
             ImmutableSetMultiDict.builder()
@@ -94,6 +234,25 @@ class TestImmutableSetMultiDict(TestCase):
     def test_hash(self):
         hash(immutablesetmultidict({1: [2, 2, 3], 4: [5, 6]}))
 
+    def test_check_types(self):
+        multidict = immutablesetmultidict([("a", 1), ("a", 2), ("b", 3)])
+        self.assertIs(multidict, multidict.check_types(str, int))
+        with self.assertRaises(TypeError):
+            multidict.check_types(key_type=int)
+        with self.assertRaises(TypeError):
+            multidict.check_types(value_type=str)
+        # pylint:disable=protected-access
+        self.assertEqual((str, int), multidict.check_types(object)._verified_types())
+        self.assertEqual(
+            (str, int), multidict.filter_keys(lambda k: k == "a")._verified_types()
+        )
+        self.assertEqual(
+            (int, str), multidict.invert_to_set_multidict()._verified_types()
+        )
+        self.assertEqual(
+            (int, str), multidict.invert_to_list_multidict()._verified_types()
+        )
+
     def test_inversion(self):
         x = ImmutableSetMultiDict.of({1: [2, 2, 3, 6], 4: [5, 6]})
         # when you start from a set multidict, your inverses as a list
@@ -147,6 +306,30 @@ class TestImmutableListMultiDict(TestCase):
         self.assertEqual([2, 2, 3], list(x[1]))
         y = immutablelistmultidict([(1, 2), (1, 2), (1, 3), (4, 5), (4, 6)])
         self.assertEqual([2, 2, 3], list(y[1]))
+        self.assertEqual([1, 4], list(y.keys()))
+        self.assertEqual(y, x)
+        self.assertEqual(hash(y), hash(x))
+
+    def test_of_mapping(self):
+        group = (3, 4)
+        x = immutablelistmultidict({1: [2, 2], 2: [], 3: group, 4: (x for x in [5, 5])})
+        self.assertEqual([1, 3, 4], list(x.keys()))
+        self.assertEqual((2, 2), x[1])
+        self.assertEqual((5, 5), x[4])
+        # groups which are already tuples are not copied
+        self.assertIs(group, x[3])
+
+    def test_group_by(self):
+        words = ["apple", "avocado", "banana", "apple", "cherry", "blueberry"]
+        grouped = ImmutableListMultiDict.group_by(words, lambda word: word[0])
+        self.assertEqual(
+            immutablelistmultidict((word[0], word) for word in words), grouped
+        )
+        self.assertEqual(["a", "b", "c"], list(grouped.keys()))
+        self.assertEqual(("apple", "avocado", "apple"), grouped["a"])
+        self.assertIs(
+            immutablelistmultidict(), ImmutableListMultiDict.group_by([], lambda x: x)
+        )
 
     def test_repr(self):
         self.assertEqual(
@@ -158,6 +341,14 @@ class TestImmutableListMultiDict(TestCase):
 
     def test_hash(self):
         hash(immutablelistmultidict({1: [2, 2, 3], 4: [5, 6]}))
+        # repeated values don't cancel each other out
+        self.assertNotEqual(
+            hash(immutablelistmultidict({1: [2, 2]})), hash(immutablelistmultidict())
+        )
+        self.assertNotEqual(
+            hash(immutablelistmultidict({1: [2, 2, 3]})),
+            hash(immutablelistmultidict({1: [3]})),
+        )
 
     def test_immutable_keys(self):
         x = ImmutableListMultiDict.of({1: [2, 2, 3], 4: [5, 6]})
@@ -209,6 +400,51 @@ class TestImmutableListMultiDict(TestCase):
         updated = orig.modified_copy_builder().put(4, 5).build()
         expected = ImmutableListMultiDict.of({1: [2, 2, 3], 4: [5, 6, 5]})
         self.assertEqual(expected, updated)
+        self.assertIs(orig[1], updated[1])
+        self.assertEqual((5, 6), orig[4])
+
+    def test_transforms(self):
+        orig = immutablelistmultidict([(1, 1), (1, 2), (2, 2), (3, 3), (1, 1)])
+        self.assertIs(orig, orig.filter_values(lambda value: value < 10))
+        self.assertIs(orig, orig.filter_items(lambda key, value: key <= 3))
+        self.assertIs(orig, orig.map_values(lambda value: value))
+        self.assertIs(orig, orig.map_keys(lambda key: key))
+
+        odd = orig.filter_values(lambda value: value % 2 == 1)
+        self.assertIsInstance(odd, ImmutableListMultiDict)
+        self.assertEqual([(1, 1), (1, 1), (3, 3)], list(odd.items()))
+        # unchanged value groups are reused
+        self.assertIs(orig[3], odd[3])
+        self.assertEqual(
+            [(1, 2), (2, 2)],
+            list(orig.filter_items(lambda key, value: value in (key + 1, 2)).items()),
+        )
+        self.assertEqual(
+            [(1, 10), (1, 20), (1, 10), (2, 20), (3, 30)],
+            list(orig.map_values(lambda value: value * 10).items()),
+        )
+        self.assertEqual(
+            [(1, 1), (1, 2), (1, 1), (1, 2), (3, 3)],
+            list(orig.map_keys(lambda key: 1 if key < 3 else key).items()),
+        )
+        self.assertIs(
+            immutablelistmultidict(), orig.filter_values(lambda value: value > 10)
+        )
+
+        set_multidict = immutablesetmultidict([(1, 1), (1, 2), (2, 2), (3, 3)])
+        halved = set_multidict.map_values(lambda value: value // 2)
+        self.assertIsInstance(halved, ImmutableSetMultiDict)
+        self.assertEqual(
+            immutablesetmultidict([(1, 0), (1, 1), (2, 1), (3, 1)]), halved
+        )
+        self.assertEqual(
+            immutablesetmultidict([(1, 1), (1, 2), (3, 3)]),
+            set_multidict.map_keys(lambda key: 1 if key < 3 else key),
+        )
+        self.assertEqual(
+            immutablesetmultidict([(1, 2), (2, 2)]),
+            set_multidict.filter_items(lambda key, value: value == 2),
+        )
 
     def test_filter_keys(self):
         orig = ImmutableListMultiDict.of({1: [1], 2: [2], 3: [3], 4: [4]})
@@ -1,12 +1,18 @@
 import pickle
+import tracemalloc
 from collections.abc import Set
+from threading import Thread
 from unittest import TestCase
 from unittest.mock import patch
 
 from immutablecollections import (
     ImmutableSet,
+    ImmutableSortedSet,
+    immutabledict,
     immutableset,
     immutableset_from_unique_elements,
+    immutableset_lazy,
+    immutablesortedset,
 )
 
 
@@ -138,6 +144,34 @@ class TestImmutableSet(TestCase):
         with self.assertRaises(TypeError):
             ImmutableSet.of(unchecked_string_set, check_top_type_matches=int)
 
+    def test_type_provenance(self):
+        checked = ImmutableSet.of(["a", "b", "c"], check_top_type_matches=str)
+        unchecked = immutableset(["a", "b", "c", "d"])
+        with patch("immutablecollections._immutableset._check_all_isinstance") as check:
+            ImmutableSet.of(checked, check_top_type_matches=str)
+            ImmutableSet.of(checked, check_top_type_matches=object)
+            # the elements of the results of set algebra are already known to be strs
+            ImmutableSet.of(checked - ["a"], check_top_type_matches=str)
+            ImmutableSet.of(checked & ["a", "b", "x"], check_top_type_matches=str)
+            ImmutableSet.of(checked - immutableset(["a"]), check_top_type_matches=str)
+            ImmutableSet.of(checked.without("a"), check_top_type_matches=str)
+            ImmutableSet.of(checked.with_added("z"), check_top_type_matches=str)
+            check.assert_not_called()
+            ImmutableSet.of(checked.with_added(1), check_top_type_matches=object)
+            check.assert_called_once()
+        # once a set has been checked, it doesn't need to be checked again
+        ImmutableSet.of(unchecked, check_top_type_matches=str)
+        union = checked.union(unchecked, check_top_type_matches=str)
+        with patch("immutablecollections._immutableset._check_all_isinstance") as check:
+            ImmutableSet.of(unchecked, check_top_type_matches=str)
+            ImmutableSet.of(union, check_top_type_matches=str)
+            check.assert_not_called()
+        # being checked against a supertype doesn't make a set fail a check it would pass
+        numbers = ImmutableSet.of([1, 2], check_top_type_matches=object)
+        ImmutableSet.of(numbers, check_top_type_matches=int)
+        with self.assertRaises(TypeError):
+            checked.union(["d", 5], check_top_type_matches=str)
+
     def test_require_ordered_input(self):
         with self.assertRaises(ValueError):
             immutableset({"a", "b", "c"})
@@ -259,6 +293,44 @@ class TestImmutableSet(TestCase):
         self.assertEqual(1, s.index("c"))
         with self.assertRaises(ValueError):
             s.index("z")
+        self.assertEqual(2, s.index("b", 1))
+        self.assertEqual(2, s.index("b", -1))
+        with self.assertRaises(ValueError):
+            s.index("a", 1)
+        with self.assertRaises(ValueError):
+            s.index("b", 0, -1)
+        self.assertEqual(0, immutableset(["a"]).index("a"))
+        with self.assertRaises(ValueError):
+            immutableset().index("a")
+
+    def test_indices_of(self):
+        s = immutableset(["a", "c", "b", "c"])
+        self.assertEqual((2, 0, 2), s.indices_of(["b", "a", "b"]))
+        self.assertEqual((), s.indices_of([]))
+        with self.assertRaisesRegex(ValueError, "'z' is not in ImmutableSet"):
+            s.indices_of(["a", "z"])
+
+    def test_precompute_index(self):
+        s = immutableset(["a", "c", "b"], precompute_index=True)
+        self.assertEqual(1, s.index("c"))
+        self.assertIs(s, immutableset(s, precompute_index=True))
+
+    def test_index_large(self):
+        words = [f"w{i}" for i in range(50)]
+        for precompute_index in (False, True):
+            s = immutableset(words + words[:10], precompute_index=precompute_index)
+            self.assertEqual(list(range(50)), [s.index(word) for word in words])
+            self.assertEqual((49, 0), s.indices_of(["w49", "w0"]))
+            self.assertEqual(("w3", "w4"), tuple(s[3:5]))
+            self.assertEqual(immutableset(words), s)
+            self.assertEqual(hash(frozenset(words)), hash(s))
+            self.assertEqual(s, pickle.loads(pickle.dumps(s)))
+            with self.assertRaises(ValueError):
+                s.index("z")
+        # the set shares the dict of a dictionary, so it can't store positions in it
+        d = immutabledict((word, word.upper()) for word in words)
+        self.assertEqual(7, d.key_set().index("w7"))
+        self.assertEqual("W7", d["w7"])
 
     # pylint: disable=pointless-statement
     def test_singleton_index(self):
@@ -303,7 +375,122 @@ class TestImmutableSet(TestCase):
 
     def test_slice(self):
         self.assertEqual(2, immutableset([1, 2, 3])[1])
-        self.assertEqual((2, 3), immutableset([1, 2, 3])[1:])
+        self.assertEqual((2, 3), tuple(immutableset([1, 2, 3])[1:]))
+        self.assertEqual(immutableset([2, 3]), immutableset([1, 2, 3])[1:])
+
+    def test_slice_view(self):
+        s = immutableset(["a", "b", "c", "d", "e", "f"])
+        view = s[1:5]
+        self.assertIsInstance(view, ImmutableSet)
+        self.assertEqual(("b", "c", "d", "e"), tuple(view))
+        self.assertEqual(4, len(view))
+        self.assertIn("c", view)
+        self.assertNotIn("a", view)
+        self.assertNotIn("z", view)
+        self.assertEqual(2, view.index("d"))
+        with self.assertRaises(ValueError):
+            view.index("f")
+        self.assertEqual(("c", "d"), tuple(view[1:3]))
+        self.assertEqual(("e", "c"), tuple(view[::-2]))
+        self.assertEqual(("f", "d", "b"), tuple(s[::-2]))
+        self.assertEqual(frozenset("bcde"), view)
+        self.assertEqual(hash(frozenset("bcde")), hash(view))
+        self.assertEqual(immutableset("bcde"), pickle.loads(pickle.dumps(view)))
+        self.assertEqual(immutableset("bc"), view & immutableset("abc"))
+        # trivial slices do not make views
+        self.assertIs(s, s[:])
+        self.assertIs(immutableset(), s[3:3])
+        self.assertEqual(immutableset("c"), s[2:3])
+        # slices of int and range-backed sets are views too
+        ints = immutableset([5, 1, 3, 9], element_type=int)
+        self.assertEqual((1, 3), tuple(ints[1:3]))
+        self.assertIn(3, ints[1:3])
+        self.assertNotIn(9, ints[1:3])
+        self.assertEqual(immutableset(range(2, 8, 2)), immutableset(range(10))[2:8:2])
+
+    # this is about the sets made when dicts keep their insertion order
+    @patch("immutablecollections._immutableset.DICT_ITERATION_IS_DETERMINISTIC", True)
+    def test_slice_view_memory(self):
+        s = immutableset(str(i) for i in range(100000))
+        tracemalloc.start()
+        try:
+            view = s[10:13]
+            self.assertIn("11", view)
+            self.assertNotIn("20", view)
+            allocated = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        # Neither a tuple of the elements of the set nor a separate map from them to their
+        # positions is made, only the positions stored in the set's own dict
+        self.assertLess(allocated, 30 * len(s))
+        self.assertEqual(("10", "11", "12"), tuple(view))
+
+    def test_builder_reuse_after_build(self):
+        for builder in (
+            ImmutableSet.builder(),
+            ImmutableSet.builder(int),
+            ImmutableSet.builder(order_key=lambda x: -x),
+        ):
+            builder.add_all(range(10))
+            first = builder.build()
+            # building hands the builder's storage to the set, so later additions must not
+            # be seen by it
+            builder.add(10).add_all([11, 3])
+            second = builder.build()
+            self.assertEqual(immutableset(range(10)), first)
+            self.assertEqual(10, len(first))
+            self.assertNotIn(10, first)
+            self.assertEqual(immutableset(range(12)), second)
+            self.assertIn(11, second)
+            self.assertEqual(builder.build(), second)
+
+    def test_modified_copy_builder(self):
+        source = immutableset([3, 1, 2])
+        self.assertIs(source, source.modified_copy_builder().build())
+        self.assertIs(source, source.modified_copy_builder().add(3).build())
+        builder = source.modified_copy_builder()
+        self.assertIn(1, builder)
+        self.assertEqual((3, 1, 2, 0), tuple(builder.add(0).add_all([2, 5]).build()[:4]))
+        self.assertEqual((3, 1, 2), tuple(source))
+
+        sorted_source = immutablesortedset([3, 1, 2])
+        derived = sorted_source.modified_copy_builder().add(0).build()
+        self.assertIsInstance(derived, ImmutableSortedSet)
+        self.assertEqual((0, 1, 2, 3), tuple(derived))
+
+        # the type a set is known to hold doesn't restrict what can be added to it, but is
+        # kept if all the added elements are instances of it
+        typed = ImmutableSet.builder(str).add_all(["a", "b"]).build()
+        self.assertEqual(str, typed._top_level_type)
+        self.assertEqual(
+            str, typed.modified_copy_builder().add("c").build()._top_level_type
+        )
+        self.assertEqual(
+            str,
+            typed.modified_copy_builder()
+            .add_all(x for x in "cd")
+            .build()
+            ._top_level_type,
+        )
+        mixed = typed.modified_copy_builder().add(1).build()
+        self.assertEqual(["a", "b", 1], list(mixed))
+        self.assertIsNone(mixed._top_level_type)
+        self.assertIsNone(
+            typed.modified_copy_builder().add_all(["c", 2]).build()._top_level_type
+        )
+        self.assertEqual(
+            [0, 1, 2, "a"],
+            list(immutableset(range(3)).modified_copy_builder().add("a").build()),
+        )
+        self.assertEqual(
+            [0, 1, "a"],
+            list(
+                immutablesortedset([0, 1], key=str)
+                .modified_copy_builder()
+                .add("a")
+                .build()
+            ),
+        )
 
     @staticmethod
     def type_annotations() -> int:
@@ -380,3 +567,468 @@ class TestImmutableSet(TestCase):
         immutableset_from_unique_elements(good)
         immutableset((x for x in good), forbid_duplicate_elements=True)
         immutableset_from_unique_elements(x for x in good)
+        self.assertEqual(
+            good, list(immutableset(tuple(good), forbid_duplicate_elements=True))
+        )
+        # the keys of a mapping can't repeat
+        self.assertEqual(
+            good, list(immutableset(dict.fromkeys(good), forbid_duplicate_elements=True))
+        )
+
+    def test_general_implementation(self):
+        s = immutableset(["b", "a", "c", "a"])
+        self.assertEqual(("b", "a", "c"), tuple(s))
+        self.assertEqual("a", s[1])
+        self.assertEqual("c", s[-1])
+        self.assertEqual(("a", "c"), tuple(s[1:]))
+        self.assertEqual(["c", "a", "b"], list(reversed(s)))
+        self.assertTrue("c" in s)
+        self.assertFalse("d" in s)
+        # equality and hashing agree with frozenset and with the other implementations
+        self.assertEqual(frozenset(["a", "b", "c"]), s)
+        self.assertEqual(hash(frozenset(["a", "b", "c"])), hash(s))
+        self.assertEqual(s, ImmutableSet.builder().add_all(["c", "b", "a"]).build())
+        self.assertNotEqual(s, immutableset(["a", "b"]))
+        self.assertNotEqual(immutableset(["a"]), s)
+        self.assertNotEqual(immutableset(), s)
+        self.assertEqual(s, pickle.loads(pickle.dumps(s)))
+        self.assertEqual(tuple(s), tuple(pickle.loads(pickle.dumps(s))))
+
+    def test_algebra_reuses_operands(self):
+        s = immutableset([4, 2, 3, 1])
+        subset = immutableset([3, 2])
+        self.assertIs(s, s.union(subset))
+        self.assertIs(s, s | frozenset([1]))
+        self.assertIs(s, s | set())
+        self.assertIs(s, immutableset().union(s))
+        self.assertIs(s, s.intersection(frozenset(range(10))))
+        self.assertIs(immutableset(), s.intersection(frozenset([7])))
+        self.assertIs(s, s.difference(frozenset([7])))
+        self.assertIs(s, s - immutableset())
+        self.assertIs(immutableset(), s - set(range(10)))
+        self.assertIs(s, s ^ immutableset())
+
+    def test_algebra_order(self):
+        s = immutableset([4, 2, 3, 1])
+        self.assertEqual((4, 2, 3, 1, 7, 5), tuple(s | immutableset([3, 7, 5])))
+        self.assertEqual((2, 1), tuple(s & immutableset([1, 5, 2])))
+        self.assertEqual((4, 3), tuple(s - {1, 2, 6}))
+        self.assertEqual((4, 2, 7, 5), tuple(s ^ immutableset([3, 7, 1, 5])))
+        self.assertEqual((2,), tuple(s & [2, 6]))
+        self.assertEqual((4, 3, 1), tuple(s - [2, 6]))
+
+    def test_native_comparisons(self):
+        s = immutableset([4, 2, 3, 1])
+        self.assertTrue(s <= frozenset([1, 2, 3, 4]))
+        self.assertTrue(s >= {1, 4})
+        self.assertFalse(s >= immutableset([1, 5]))
+        self.assertTrue(s < immutableset([1, 2, 3, 4, 5]))
+        self.assertTrue(s > immutableset([1]))
+        self.assertFalse(immutableset([1]) > s)
+        self.assertTrue(s.isdisjoint(immutableset([5, 6])))
+        self.assertFalse(s.isdisjoint({4}))
+        self.assertTrue(s.isdisjoint([5, 6]))
+        self.assertTrue(immutableset([5]).isdisjoint(s))
+
+    def test_union_all(self):
+        s1 = immutableset([3, 1])
+        self.assertEqual(
+            (3, 1, 2, 5, 4),
+            tuple(ImmutableSet.union_all([s1, immutableset([1, 2]), [5, 2, 4]])),
+        )
+        self.assertIs(s1, ImmutableSet.union_all([immutableset(), s1, set()]))
+        self.assertIs(s1, ImmutableSet.union_all([s1, immutableset([1])]))
+        self.assertIs(immutableset(), ImmutableSet.union_all([]))
+
+    def test_intersection_all(self):
+        s1 = immutableset([4, 3, 2, 1])
+        self.assertEqual(
+            (3, 1),
+            tuple(
+                ImmutableSet.intersection_all(
+                    [s1, immutableset([1, 3, 5, 2]), frozenset([1, 3, 4])]
+                )
+            ),
+        )
+        self.assertEqual((2, 1), tuple(ImmutableSet.intersection_all([[2, 2, 1], s1])))
+        self.assertIs(s1, ImmutableSet.intersection_all([s1, range(5)]))
+        self.assertIs(immutableset(), ImmutableSet.intersection_all([s1, set()]))
+        self.assertIs(immutableset(), ImmutableSet.intersection_all([]))
+
+    def test_difference_all(self):
+        s1 = immutableset([4, 3, 2, 1])
+        self.assertEqual(
+            (4, 2),
+            tuple(ImmutableSet.difference_all([s1, immutableset([1, 5]), {3}, []])),
+        )
+        self.assertIs(s1, ImmutableSet.difference_all([s1]))
+        self.assertIs(s1, ImmutableSet.difference_all([s1, [7], set()]))
+        self.assertIs(immutableset(), ImmutableSet.difference_all([s1, range(5)]))
+        self.assertIs(immutableset(), ImmutableSet.difference_all([]))
+
+    def test_int_set(self):
+        s = immutableset([5, 3, 9, 3, 1], element_type=int)
+        self.assertEqual((5, 3, 9, 1), tuple(s))
+        self.assertEqual([1, 9, 3, 5], list(reversed(s)))
+        self.assertEqual(4, len(s))
+        self.assertTrue(3 in s)
+        self.assertTrue(3.0 in s)
+        self.assertFalse(4 in s)
+        self.assertFalse("3" in s)
+        self.assertEqual(9, s[2])
+        self.assertEqual(2, s.index(9))
+        self.assertEqual(frozenset([1, 3, 5, 9]), s)
+        self.assertEqual(s, immutableset([1, 3, 5, 9]))
+        self.assertEqual(immutableset([1, 3, 5, 9]), s)
+        self.assertNotEqual(s, immutableset([1, 3, 5, 8], element_type=int))
+        self.assertEqual(hash(frozenset([1, 3, 5, 9])), hash(s))
+        self.assertEqual(s, pickle.loads(pickle.dumps(s)))
+        self.assertEqual(tuple(s), tuple(pickle.loads(pickle.dumps(s))))
+        ImmutableSet.of(s, check_top_type_matches=int)
+        with self.assertRaises(TypeError):
+            immutableset([1, "a"], element_type=int)
+        with self.assertRaises(ValueError):
+            immutableset([1, 2], element_type=str)
+        # ints too big for the array are still handled
+        self.assertTrue(2 ** 70 in immutableset([1, 2 ** 70], element_type=int))
+        with self.assertRaisesRegex(TypeError, "Expected instance of type"):
+            immutableset(["a"], element_type=int)
+        with self.assertRaises(ValueError):
+            immutableset(range(3), element_type=str)
+        # bools can't be stored as machine integers without becoming ints
+        with_bool = immutableset([True, 2], element_type=int)
+        self.assertIs(True, with_bool[0])
+        self.assertEqual((True, 2), tuple(with_bool))
+
+    def test_int_set_algebra(self):
+        s = immutableset([5, 3, 9, 1], element_type=int)
+        t = immutableset([1, 2, 3, 4, 5, 6], element_type=int)
+        self.assertEqual((5, 3, 1), tuple(s & t))
+        self.assertEqual((1, 3, 5), tuple(t & s))
+        self.assertEqual((9,), tuple(s - t))
+        self.assertEqual((5, 3, 9, 1, 2, 4, 6), tuple(s | t))
+        self.assertEqual((1, 2, 3, 4, 5, 6, 9), tuple(t | s))
+        self.assertIs(s, s | immutableset([1, 9], element_type=int))
+        self.assertIs(s, s & immutableset(range(10)))
+        self.assertIs(s, s - immutableset(range(10, 20)))
+        self.assertEqual((5, 1), tuple(s & immutableset([1, "a", 5])))
+        self.assertEqual((3, 9), tuple(s - frozenset([1, 5])))
+
+    def test_range_set(self):
+        s = immutableset(range(10 ** 12))
+        self.assertEqual(10 ** 12, len(s))
+        self.assertTrue(10 ** 11 in s)
+        self.assertFalse(-1 in s)
+        self.assertEqual(10 ** 12 - 1, s[-1])
+        self.assertEqual(77, s.index(77))
+        self.assertEqual(s, immutableset(range(10 ** 12)))
+        descending = immutableset(range(10, 0, -3))
+        self.assertEqual((10, 7, 4, 1), tuple(descending))
+        self.assertEqual(immutableset([1, 4, 7, 10]), descending)
+        self.assertEqual(hash(frozenset([1, 4, 7, 10])), hash(descending))
+        self.assertEqual(
+            (10, 7, 4, 1, 2, 3), tuple(descending | immutableset(range(1, 5)))
+        )
+        self.assertEqual((7, 4), tuple(descending & immutableset(range(2, 8))))
+        self.assertEqual(descending, pickle.loads(pickle.dumps(descending)))
+        self.assertEqual(immutableset([3]), immutableset(range(3, 4)))
+        self.assertIs(immutableset(), immutableset(range(0)))
+        self.assertEqual((5,), tuple(s & immutableset([5, "a", -1])))
+        self.assertEqual((7, 4), tuple(descending & immutableset([4, 7, "a"])))
+
+    def test_range_set_algebra_memory(self):
+        s = immutableset(range(10 ** 6))
+        others = immutableset(["a", "b", 7])
+        tracemalloc.start()
+        try:
+            self.assertEqual((7,), tuple(others & s))
+            self.assertEqual(("a", "b"), tuple(others - s))
+            self.assertFalse(s <= others)
+            self.assertFalse(others <= s)
+            self.assertFalse(s.isdisjoint(others))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # the range is never copied into a frozenset
+        self.assertLess(peak, 100_000)
+
+    def test_with_added(self):
+        source = immutableset(["a", "b"])
+        added = source.with_added("c")
+        self.assertEqual(("a", "b", "c"), tuple(added))
+        self.assertEqual(("a", "b"), tuple(source))
+        self.assertIs(added, added.with_added("a"))
+        self.assertEqual(immutableset(["a", "b", "c"]), added)
+        self.assertEqual(frozenset("abc"), added)
+        self.assertEqual(hash(frozenset("abc")), hash(added))
+        self.assertIn("c", added)
+        self.assertNotIn("c", source)
+        self.assertEqual("c", added[2])
+        self.assertEqual("c", added[-1])
+        self.assertEqual(2, added.index("c"))
+        self.assertEqual(("b", "c"), tuple(added[1:]))
+        self.assertEqual(added, pickle.loads(pickle.dumps(added)))
+        self.assertEqual((1,), tuple(immutableset().with_added(1)))
+
+    @patch("immutablecollections._immutableset.DICT_ITERATION_IS_DETERMINISTIC", False)
+    def test_with_added_to_frozenset_backed(self):
+        source = immutableset(str(i) for i in range(100))
+        for hashed in (False, True):
+            if hashed:
+                hash(source)
+            added = source.with_added("new")
+            self.assertEqual(hash(frozenset(added)), hash(added))
+            self.assertEqual(hash(frozenset(source)), hash(added.without("new")))
+        self.assertEqual(hash(frozenset([1])), hash(immutableset().with_added(1)))
+
+    def test_without(self):
+        source = immutableset(range(100, 200))
+        self.assertIs(source, source.without(5))
+        current = source
+        for i in range(100, 200, 3):
+            current = current.without(i)
+        remaining = [i for i in range(100, 200) if i % 3 != 100 % 3]
+        self.assertEqual(tuple(remaining), tuple(current))
+        self.assertEqual(immutableset(remaining), current)
+        self.assertEqual(remaining[5], current[5])
+        self.assertEqual(5, current.index(remaining[5]))
+        self.assertEqual(100, len(source))
+        self.assertEqual(tuple(remaining) + (100,), tuple(current.with_added(100)))
+        self.assertIs(immutableset(), immutableset([1]).without(1))
+        # removing most elements compacts the set, which must not disturb its order
+        for i in range(100, 190):
+            source = source.without(i)
+        self.assertEqual(tuple(range(190, 200)), tuple(source))
+        self.assertEqual(3, source.index(193))
+
+    def test_derived_hash(self):
+        source = immutableset(str(i) for i in range(100))
+        hash(source)
+        derived = [
+            source.with_added("new"),
+            source.with_added("new").with_added("newer").without("5"),
+            source.without("7"),
+            source.union(["0", "new"]),
+            source.difference({"3", "4", "new"}),
+        ]
+        for derived_set in derived:
+            # the hash was computed when the set was derived
+            # pylint:disable=protected-access
+            self.assertIsNotNone(derived_set._cached_hash())
+            self.assertEqual(hash(frozenset(derived_set)), hash(derived_set))
+        self.assertEqual(hash(frozenset([1])), hash(immutableset([1])))
+
+    @patch("immutablecollections._immutableset.DICT_ITERATION_IS_DETERMINISTIC", False)
+    def test_derived_hash_without_deterministic_dict_iteration(self):
+        # sets are backed by frozensets here
+        self.test_derived_hash()
+        # pylint:disable=protected-access
+        frozenset_backed = immutableset(str(i) for i in range(100))
+        self.assertEqual(
+            "_FrozenSetBackedImmutableSet", type(frozenset_backed).__name__
+        )
+        self.assertIsNone(frozenset_backed._cached_hash())
+        hash(frozenset_backed)
+        self.assertEqual(hash(frozenset_backed), frozenset_backed._cached_hash())
+
+    def test_sorted_with_added(self):
+        s = immutablesortedset([3, 1, 5])
+        self.assertEqual((1, 3, 4, 5), tuple(s.with_added(4)))
+        self.assertIsInstance(s.with_added(4), ImmutableSortedSet)
+        self.assertEqual((1, 5), tuple(s.without(3)))
+        self.assertIsInstance(s.without(3), ImmutableSortedSet)
+        self.assertIs(s, s.with_added(3))
+
+    def test_sorted_set(self):
+        s = immutablesortedset([7, 3, 11, 3, 5])
+        self.assertIsInstance(s, ImmutableSortedSet)
+        self.assertEqual((3, 5, 7, 11), tuple(s))
+        self.assertEqual(immutableset([3, 5, 7, 11]), s)
+        self.assertEqual(hash(frozenset([3, 5, 7, 11])), hash(s))
+        # sets are fine as input since the result is sorted anyway
+        self.assertEqual(s, immutablesortedset({3, 5, 7, 11}))
+        self.assertIs(s, immutablesortedset(s))
+        self.assertEqual(5, s.floor(5))
+        self.assertEqual(5, s.floor(6))
+        self.assertIsNone(s.floor(2))
+        self.assertEqual(7, s.ceiling(6))
+        self.assertEqual(3, s.ceiling(1))
+        self.assertIsNone(s.ceiling(12))
+        self.assertEqual(0, s.rank(3))
+        self.assertEqual(2, s.rank(6))
+        self.assertEqual(4, s.rank(20))
+        self.assertEqual(7, s.select(2))
+        self.assertEqual(2, s.index(7))
+        self.assertEqual((5, 7), tuple(s.range(4, 11)))
+        self.assertIsInstance(s.range(4, 11), ImmutableSortedSet)
+        self.assertEqual((3, 5), tuple(s.range(high=7)))
+        self.assertEqual((7, 11), tuple(s.range(low=7)))
+        self.assertEqual(5, s.range(low=4).floor(6))
+        self.assertEqual((5, 7), tuple(s[1:3]))
+        self.assertEqual((11, 7), tuple(s[:1:-1]))
+        self.assertIsInstance(s[1:3], ImmutableSortedSet)
+        self.assertEqual(7, s[1:3].ceiling(6))
+        self.assertEqual(1, s[1:3].rank(6))
+        self.assertIsInstance(s.range(20, 30), ImmutableSortedSet)
+        self.assertIsInstance(s[1:2], ImmutableSortedSet)
+        self.assertEqual(s, pickle.loads(pickle.dumps(s)))
+        self.assertEqual(0, len(immutablesortedset()))
+
+    def test_sorted_set_key(self):
+        s = immutablesortedset(["ccc", "a", "bb", "dd"], key=len)
+        self.assertEqual(("a", "bb", "dd", "ccc"), tuple(s))
+        self.assertEqual("dd", s.floor("xx"))
+        self.assertEqual("bb", s.ceiling("xx"))
+        self.assertEqual(("bb", "dd"), tuple(s.range("xx", "xxx")))
+        self.assertEqual(1, s.rank("xx"))
+        self.assertEqual(2, s.index("dd"))
+        self.assertIs(s, immutablesortedset(s, key=len))
+        self.assertEqual(("a", "bb", "ccc", "dd"), tuple(immutablesortedset(s)))
+
+    def test_sorted_set_algebra(self):
+        s = immutablesortedset([9, 1, 5])
+        union = s | immutablesortedset([4, 5, 10])
+        self.assertIsInstance(union, ImmutableSortedSet)
+        self.assertEqual((1, 4, 5, 9, 10), tuple(union))
+        self.assertEqual((1, 3, 5, 9), tuple(s.union([3, 1])))
+        self.assertIs(s, s.union([9]))
+        self.assertEqual((1, 9), tuple(s & immutableset([9, 7, 1])))
+        self.assertIsInstance(s & immutableset([9, 7, 1]), ImmutableSortedSet)
+        self.assertEqual((5,), tuple(s - immutableset([9, 7, 1])))
+        self.assertIsInstance(s - [9, 7, 1], ImmutableSortedSet)
+        self.assertIs(s, s & immutableset(range(20)))
+        xor = s ^ immutableset([10, 5, 0])
+        self.assertIsInstance(xor, ImmutableSortedSet)
+        self.assertEqual((0, 1, 9, 10), tuple(xor))
+        self.assertEqual((1, 3, 9), tuple(s.symmetric_difference([5, 3])))
+        self.assertIs(s, s ^ immutableset())
+
+    def test_sorted_set_index_of_equal_element(self):
+        # 2.0 is equal to the stored 2 but has a different sort key
+        s = immutablesortedset([3, 1, 2], key=lambda x: (type(x) is not int, x))
+        self.assertIn(2.0, s)
+        self.assertEqual(1, s.index(2.0))
+        self.assertEqual(1, s[1:].index(3.0))
+        with self.assertRaises(ValueError):
+            s.index(4.0)
+
+    def test_sorted_set_typed_union(self):
+        s = (
+            ImmutableSortedSet.builder(check_top_type_matches=int)
+            .add_all([9, 1, 5])
+            .build()
+        )
+        union = s.union((x for x in [3, 1]), check_top_type_matches=int)
+        self.assertIsInstance(union, ImmutableSortedSet)
+        self.assertEqual((1, 3, 5, 9), tuple(union))
+        self.assertEqual(int, union._top_level_type)
+        # the most specific type known for both sides is kept
+        typed_other = ImmutableSet.of([2], check_top_type_matches=int)
+        self.assertEqual(int, s.union(typed_other)._top_level_type)
+        self.assertEqual(int, s.union(typed_other, object)._top_level_type)
+        self.assertEqual(object, s.union([2.0], object)._top_level_type)
+        self.assertIsNone(s.union([2])._top_level_type)
+        with self.assertRaises(TypeError):
+            s.union(["a"], check_top_type_matches=int)
+        with self.assertRaises(TypeError):
+            immutablesortedset(["a"]).union([], check_top_type_matches=int)
+
+    def test_sorted_builder(self):
+        s = ImmutableSortedSet.builder().add_all([3, 1, 2]).build()
+        self.assertIsInstance(s, ImmutableSortedSet)
+        self.assertEqual((1, 2, 3), tuple(s))
+        by_key = ImmutableSortedSet.builder(key=lambda x: -x).add_all([3, 1, 2]).build()
+        self.assertIsInstance(by_key, ImmutableSortedSet)
+        self.assertEqual((3, 2, 1), tuple(by_key))
+        self.assertEqual(2, by_key.ceiling(2))
+        self.assertEqual(1, by_key.ceiling(1))
+        # order_key only sorts the built set, which is a plain ImmutableSet as before
+        ordered = ImmutableSet.builder(order_key=lambda x: -x).add_all([3, 1, 2]).build()
+        self.assertNotIsInstance(ordered, ImmutableSortedSet)
+        self.assertEqual((3, 2, 1), tuple(ordered))
+        self.assertEqual((3, 2, 1, 0), tuple(ordered | [0]))
+        self.assertEqual(ordered, pickle.loads(pickle.dumps(ordered)))
+        with self.assertRaises(TypeError):
+            ImmutableSortedSet.builder(check_top_type_matches=int).add("a")
+
+    def test_small(self):
+        for size in range(12):
+            elements = [str(i) for i in range(size)]
+            for small in (
+                immutableset(elements),
+                immutableset(elements + elements),
+                ImmutableSet.builder().add_all(elements).build(),
+            ):
+                self.assertEqual(elements, list(small))
+                self.assertEqual(size > 0, "0" in small)
+                self.assertNotIn(str(size), small)
+                self.assertEqual(frozenset(elements), small)
+                self.assertEqual(hash(frozenset(elements)), hash(small))
+                self.assertEqual(list(reversed(elements)), list(reversed(small)))
+                self.assertEqual(elements[1::2], list(small[1::2]))
+                self.assertEqual(small, pickle.loads(pickle.dumps(small)))
+                if size:
+                    self.assertEqual(size - 1, small.index(str(size - 1)))
+
+    def test_lazy(self):
+        consumed = []
+
+        def elements():
+            for x in ["b", "a", "c", "a"]:
+                consumed.append(x)
+                yield x
+
+        lazy = immutableset_lazy(elements())
+        self.assertIsInstance(lazy, ImmutableSet)
+        self.assertEqual([], consumed)
+        self.assertIn("a", lazy)
+        self.assertEqual(4, len(consumed))
+        self.assertEqual(("b", "a", "c"), tuple(lazy))
+        self.assertEqual(immutableset(["a", "b", "c"]), lazy)
+        self.assertEqual(lazy, immutableset_lazy(["c", "b", "a"]))
+        self.assertEqual(hash(frozenset(["a", "b", "c"])), hash(lazy))
+        self.assertEqual(1, lazy.index("a"))
+        self.assertEqual(("a", "c"), tuple(lazy[1:]))
+        self.assertEqual(immutableset(["b", "c"]), lazy - ["a"])
+        self.assertEqual(("b", "a", "c", "d"), tuple(lazy.with_added("d")))
+        self.assertEqual(immutableset(["b", "a", "c"]), pickle.loads(pickle.dumps(lazy)))
+        # the generator is only consumed once
+        self.assertEqual(4, len(consumed))
+
+        existing = immutableset([1, 2])
+        self.assertIs(existing, immutableset_lazy(existing))
+        self.assertIs(immutableset(), immutableset_lazy())
+        # errors are raised on first use
+        lazy_bad = immutableset_lazy([1, 1], forbid_duplicate_elements=True)
+        with self.assertRaisesRegex(ValueError, "[Dd]uplicate"):
+            len(lazy_bad)
+        # later uses still report why materializing failed
+        with self.assertRaises(ValueError) as context:
+            len(lazy_bad)
+        self.assertRegex(str(context.exception.__cause__), "[Dd]uplicate")
+
+        # recording the element type doesn't consume the source
+        consumed.clear()
+        typed = immutableset_lazy(elements())
+        typed._top_level_type = str  # pylint:disable=protected-access
+        self.assertEqual([], consumed)
+        self.assertEqual(("b", "a", "c"), tuple(typed))
+        self.assertIs(str, typed._top_level_type)  # pylint:disable=protected-access
+        self.assertEqual((3, 4), tuple(immutableset_lazy([3, 4], element_type=int)))
+
+    def test_lazy_threads(self):
+        num_consumed = []
+
+        def elements():
+            num_consumed.append(1)
+            yield from range(1000)
+
+        lazy = immutableset_lazy(str(x) for x in elements())
+        lengths = []
+        threads = [Thread(target=lambda: lengths.append(len(lazy))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([1000] * 8, lengths)
+        self.assertEqual([1], num_consumed)
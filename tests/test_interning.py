@@ -0,0 +1,130 @@
+import gc
+from unittest import TestCase
+
+from immutablecollections import (
+    ImmutableSortedSet,
+    clear_intern_table,
+    immutabledict,
+    immutablelistmultidict,
+    immutableset,
+    immutablesetmultidict,
+    immutablesortedset,
+    intern_statistics,
+    set_intern_max_size,
+)
+from immutablecollections._interning import _DEFAULT_MAX_SIZE
+
+
+class TestInterning(TestCase):
+    def setUp(self):
+        clear_intern_table()
+
+    def tearDown(self):
+        set_intern_max_size(_DEFAULT_MAX_SIZE)
+        clear_intern_table()
+
+    def test_set(self):
+        first = immutableset(["a", "b"], intern=True)
+        self.assertIs(first, immutableset(["a", "b"], intern=True))
+        self.assertIs(first, immutableset(["a", "b", "a"], intern=True))
+        # only interned if requested
+        self.assertIsNot(first, immutableset(["a", "b"]))
+        # iteration order matters
+        self.assertIsNot(first, immutableset(["b", "a"], intern=True))
+        # as do the element types
+        self.assertIsNot(
+            immutableset([1, 2], intern=True), immutableset([1.0, 2.0], intern=True)
+        )
+        # a sorted set isn't interchangeable with an unsorted one in the same order
+        plain = immutableset([1, 2], intern=True)
+        sorted_set = immutableset(immutablesortedset([1, 2]), intern=True)
+        self.assertIsInstance(sorted_set, ImmutableSortedSet)
+        self.assertIsNot(plain, sorted_set)
+        self.assertIs(immutableset(), immutableset([], intern=True))
+
+    def test_nested_types(self):
+        # element types are distinguished within tuples and nested collections
+        self.assertIsNot(
+            immutableset([(1,)], intern=True), immutableset([(1.0,)], intern=True)
+        )
+        nested = immutableset([immutableset([1])], intern=True)
+        self.assertIs(nested, immutableset([immutableset([1])], intern=True))
+        self.assertIsNot(nested, immutableset([immutableset([1.0])], intern=True))
+        self.assertIsNot(
+            immutabledict({1: (2,)}, intern=True), immutabledict({1: (2.0,)}, intern=True)
+        )
+        # but other values are only compared with ==
+        self.assertIs(
+            immutableset([frozenset([1])], intern=True),
+            immutableset([frozenset([1.0])], intern=True),
+        )
+
+    def test_same_hash(self):
+        # -1 and -2 have the same hash in CPython, so these sets are looked up together
+        kept = [immutableset([-1], intern=True), immutableset([-2], intern=True)]
+        self.assertEqual(hash(kept[0]), hash(kept[1]))
+        self.assertIsNot(kept[0], kept[1])
+        self.assertIs(kept[0], immutableset([-1], intern=True))
+        self.assertIs(kept[1], immutableset([-2], intern=True))
+        self.assertEqual(2, intern_statistics().size)
+        del kept[0]
+        gc.collect()
+        self.assertEqual(1, intern_statistics().size)
+        self.assertIs(kept[0], immutableset([-2], intern=True))
+
+    def test_dict(self):
+        first = immutabledict([(1, "a"), (2, "b")], intern=True)
+        self.assertIs(first, immutabledict({1: "a", 2: "b"}, intern=True))
+        self.assertIsNot(first, immutabledict({2: "b", 1: "a"}, intern=True))
+        self.assertIsNot(first, immutabledict({1: "a", 2: "c"}, intern=True))
+        # unhashable values can't be interned, but that's not an error
+        unhashable = immutabledict({1: [2]}, intern=True)
+        self.assertEqual({1: [2]}, unhashable)
+        self.assertIsNot(unhashable, immutabledict({1: [2]}, intern=True))
+
+    def test_multidicts(self):
+        pairs = [(1, "a"), (1, "b"), (2, "a")]
+        set_multidict = immutablesetmultidict(pairs, intern=True)
+        self.assertIs(set_multidict, immutablesetmultidict(pairs, intern=True))
+        list_multidict = immutablelistmultidict(pairs, intern=True)
+        self.assertIs(list_multidict, immutablelistmultidict(pairs, intern=True))
+        self.assertIsNot(
+            list_multidict, immutablelistmultidict(pairs + [(2, "a")], intern=True)
+        )
+
+    def test_statistics(self):
+        # keep the canonical instances alive
+        kept = [immutableset([1, 2], intern=True)]
+        kept.append(immutableset([1, 2], intern=True))
+        kept.append(immutableset([3, 4], intern=True))
+        stats = intern_statistics()
+        self.assertEqual(1, stats.hits)
+        self.assertEqual(2, stats.misses)
+        self.assertEqual(0, stats.evictions)
+        self.assertEqual(2, stats.size)
+
+    def test_weak(self):
+        first = immutableset([1, 2], intern=True)
+        self.assertEqual(1, intern_statistics().size)
+        del first
+        gc.collect()
+        self.assertEqual(0, intern_statistics().size)
+        # a new canonical instance is made after the old one is collected
+        self.assertEqual(immutableset([1, 2]), immutableset([1, 2], intern=True))
+        self.assertEqual(0, intern_statistics().hits)
+
+    def test_eviction(self):
+        set_intern_max_size(2)
+        first = immutableset([1, 2], intern=True)
+        second = immutableset([3, 4], intern=True)
+        # use the first again so the second is least recently used
+        self.assertIs(first, immutableset([1, 2], intern=True))
+        third = immutableset([5, 6], intern=True)
+        stats = intern_statistics()
+        self.assertEqual(1, stats.evictions)
+        self.assertEqual(2, stats.size)
+        self.assertIs(first, immutableset([1, 2], intern=True))
+        self.assertIs(third, immutableset([5, 6], intern=True))
+        self.assertIsNot(second, immutableset([3, 4], intern=True))
+        with self.assertRaises(ValueError):
+            set_intern_max_size(-1)